@@ -0,0 +1,164 @@
+"""Brand validation rules from the design tokens.
+
+The checks behind validate_brand, kept free of the MCP SDK so that
+scripts/validate-staged.py can run them in a pre-commit hook without
+paying for the SDK import. Rules are built from tokens.json once per
+tokens text (rules_for), so repeated validations reuse them.
+
+Prose lines are (line_number, text) pairs from strip_code_blocks, so
+callers can check any subset of a document's lines and get issues with
+the document's own numbers.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+Issue = dict[str, str | int]
+
+HEX_PATTERN = re.compile(r"#[0-9A-Fa-f]{6}\b")
+CODE_BLOCK_PATTERN = re.compile(r"```.*?```", re.DOTALL)
+INLINE_CODE_PATTERN = re.compile(r"`[^`]+`")
+CSS_ATTR_PATTERN = re.compile(
+    r'(?:color|background-color|background|fill|stroke)\s*[:=]\s*["\']?#[0-9A-Fa-f]{6}',
+    re.IGNORECASE,
+)
+# Match 'color' as a standalone word (not part of 'colour')
+COLOR_PATTERN = re.compile(r"\bcolor\b", re.IGNORECASE)
+
+# Fonts flagged unless tokens.json names them
+COMMON_FONTS = frozenset(
+    {
+        "Arial",
+        "Helvetica",
+        "Times New Roman",
+        "Times",
+        "Courier New",
+        "Courier",
+        "Georgia",
+        "Verdana",
+        "Trebuchet MS",
+        "Comic Sans MS",
+        "Impact",
+        "Palatino",
+        "Garamond",
+        "Bookman",
+        "Roboto",
+        "Open Sans",
+        "Lato",
+        "Montserrat",
+        "Raleway",
+        "Nunito",
+        "Fira Code",
+        "Source Code Pro",
+        "Consolas",
+        "Menlo",
+        "Monaco",
+    }
+)
+
+
+def strip_code_blocks(content: str) -> list[tuple[int, str]]:
+    """Return (line_number, text) pairs for lines outside code blocks.
+
+    Removes fenced code blocks and inline code spans so validation only
+    checks prose.
+    """
+    # Remove fenced code blocks, replacing with empty lines to preserve numbering
+    stripped = CODE_BLOCK_PATTERN.sub(lambda m: "\n" * m.group().count("\n"), content)
+    # Remove inline code spans
+    stripped = INLINE_CODE_PATTERN.sub("", stripped)
+    return list(enumerate(stripped.splitlines(), 1))
+
+
+@dataclass(frozen=True)
+class BrandRules:
+    """The token colours and fonts, ready to check prose against."""
+
+    colours: frozenset[str]  # Upper-case hex codes
+    fonts: tuple[str, ...]  # Brand fonts, sorted
+    off_brand_fonts: tuple[str, ...]  # Common fonts that are not brand fonts, sorted
+
+    @classmethod
+    def from_tokens(cls, tokens: dict) -> BrandRules:
+        fonts = set(tokens.get("fonts", {}).values())
+        return cls(
+            colours=frozenset(v.upper() for v in tokens.get("colours", {}).values()),
+            fonts=tuple(sorted(fonts)),
+            off_brand_fonts=tuple(sorted(COMMON_FONTS - fonts)),
+        )
+
+    def check_colours(self, prose_lines: Iterable[tuple[int, str]]) -> list[Issue]:
+        """Flag hex colour codes not present in tokens.json colours."""
+        issues: list[Issue] = []
+        for line_num, line in prose_lines:
+            for match in HEX_PATTERN.finditer(line):
+                if match.group().upper() not in self.colours:
+                    issues.append(
+                        {
+                            "type": "off_brand_colour",
+                            "found": match.group(),
+                            "line": line_num,
+                            "suggestion": "Use a colour from tokens.json",
+                        }
+                    )
+        return issues
+
+    def check_fonts(self, prose_lines: Iterable[tuple[int, str]]) -> list[Issue]:
+        """Flag font-family references not present in tokens.json fonts."""
+        suggestion = f"Use a font from tokens.json: {', '.join(self.fonts)}"
+        lowered = [(font, font.lower()) for font in self.off_brand_fonts]
+        issues: list[Issue] = []
+        for line_num, line in prose_lines:
+            lower = line.lower()
+            for font, font_lower in lowered:
+                if font_lower in lower:
+                    issues.append(
+                        {
+                            "type": "off_brand_font",
+                            "found": font,
+                            "line": line_num,
+                            "suggestion": suggestion,
+                        }
+                    )
+        return issues
+
+    def check_spelling(self, prose_lines: Iterable[tuple[int, str]]) -> list[Issue]:
+        """Flag American 'color' spelling outside code blocks and CSS attributes."""
+        issues: list[Issue] = []
+        for line_num, line in prose_lines:
+            # Skip lines that look like CSS/HTML attributes
+            if CSS_ATTR_PATTERN.search(line):
+                continue
+            for match in COLOR_PATTERN.finditer(line):
+                issues.append(
+                    {
+                        "type": "spelling",
+                        "found": match.group(),
+                        "line": line_num,
+                        "suggestion": "Use British English 'colour'",
+                    }
+                )
+        return issues
+
+    def check(self, prose_lines: Iterable[tuple[int, str]]) -> list[Issue]:
+        """All brand issues in prose_lines: colours, fonts, then spelling."""
+        prose_lines = list(prose_lines)
+        return (
+            self.check_colours(prose_lines)
+            + self.check_fonts(prose_lines)
+            + self.check_spelling(prose_lines)
+        )
+
+
+@functools.lru_cache(maxsize=4)
+def rules_for(tokens_text: str) -> BrandRules:
+    """Rules for a tokens.json text, built once per text.
+
+    Raises json.JSONDecodeError for invalid JSON.
+    """
+    return BrandRules.from_tokens(json.loads(tokens_text))
@@ -7,6 +7,7 @@ auto-discovered — adding a new guideline requires no code changes.
 
 Usage:
     python .brandmcp/server.py
+    python .brandmcp/server.py --snapshot output/mcp-snapshot.sqlite
 
 Configured for Claude Code via .mcp.json (stdio transport).
 """
@@ -15,13 +16,21 @@ from __future__ import annotations
 
 import json
 import logging
-import re
 import sys
 from dataclasses import asdict, dataclass
 from pathlib import Path
 
+from brand_rules import BrandRules, rules_for
+from brand_rules import strip_code_blocks as _strip_code_blocks
 from mcp.server.fastmcp import FastMCP
 
+# The servers share their runtime through scripts/ (mcp_common, mcp_snapshot)
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.append(str(SCRIPTS_DIR))
+
+from mcp_common import encode, instrumented, read_text, stats_report  # noqa: E402
+from mcp_snapshot import MARKDOWN, Snapshot, snapshot_from_args  # noqa: E402
+
 # Logging must go to stderr — stdout is reserved for stdio transport.
 logging.basicConfig(stream=sys.stderr, level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -32,6 +41,19 @@ TOKENS_PATH = BRAND_DIR / "tokens.json"
 mcp = FastMCP("sdd-book-brand")
 
 
+# ---------------------------------------------------------------------------
+# Snapshot
+# ---------------------------------------------------------------------------
+
+# With --snapshot, brand/ is read from a packed, read-only SQLite file
+# (scripts/mcp_snapshot.py) instead of the directory: startup opens one
+# file, and listings and lookups are indexed reads. Edits to brand/ are
+# not seen until the snapshot is rebuilt, so authoring uses the live tree.
+SNAPSHOT_ROOT = "brand"
+
+_snapshot: Snapshot | None = None
+
+
 # ---------------------------------------------------------------------------
 # Discovery
 # ---------------------------------------------------------------------------
@@ -50,7 +72,7 @@ class BrandInfo:
 
 def _extract_title(path: Path) -> str:
     """Extract the first markdown heading from a file."""
-    for line in path.read_text(encoding="utf-8").splitlines():
+    for line in read_text(path).splitlines():
         if line.startswith("# "):
             return line.removeprefix("# ").strip()
     return path.stem
@@ -58,6 +80,9 @@ def _extract_title(path: Path) -> str:
 
 def discover_brand(category: str | None = None) -> list[BrandInfo]:
     """Scan brand/ and return metadata for every .md file found."""
+    if _snapshot is not None:
+        where = f"{MARKDOWN} AND category = coalesce(?, category)"
+        return [BrandInfo(*row) for row in _snapshot.infos(where, category or None)]
     resources: list[BrandInfo] = []
     for md_file in sorted(BRAND_DIR.rglob("*.md")):
         if md_file.stem.endswith(".provenance"):
@@ -79,135 +104,37 @@ def discover_brand(category: str | None = None) -> list[BrandInfo]:
 
 def load_brand(name: str) -> str:
     """Load a brand guideline by name. Raises ValueError if not found."""
-    for md_file in BRAND_DIR.rglob("*.md"):
-        if md_file.stem.endswith(".provenance"):
-            continue
-        if md_file.stem == name:
-            return md_file.read_text(encoding="utf-8")
+    if _snapshot is not None:
+        text = _snapshot.text(f"name = ? AND {MARKDOWN}", name)
+        if text is not None:
+            return text
+    else:
+        for md_file in BRAND_DIR.rglob("*.md"):
+            if md_file.stem.endswith(".provenance"):
+                continue
+            if md_file.stem == name:
+                return read_text(md_file)
     available = [r.name for r in discover_brand()]
     msg = f"Brand guideline '{name}' not found. Available: {', '.join(available)}"
     raise ValueError(msg)
 
 
-def _load_tokens() -> dict:
-    """Load and parse tokens.json. Raises FileNotFoundError or json.JSONDecodeError."""
-    return json.loads(TOKENS_PATH.read_text(encoding="utf-8"))
-
-
-# ---------------------------------------------------------------------------
-# Validation helpers
-# ---------------------------------------------------------------------------
+def _read_tokens() -> str:
+    """The text of tokens.json. Raises FileNotFoundError if there is none."""
+    if _snapshot is None:
+        return read_text(TOKENS_PATH)
+    text = _snapshot.text("path = ?", TOKENS_PATH.name)
+    if text is None:
+        raise FileNotFoundError(f"No {TOKENS_PATH.name} in the snapshot")
+    return text
 
-_HEX_PATTERN = re.compile(r"#[0-9A-Fa-f]{6}\b")
-_CODE_BLOCK_PATTERN = re.compile(r"```.*?```", re.DOTALL)
-_INLINE_CODE_PATTERN = re.compile(r"`[^`]+`")
-_CSS_ATTR_PATTERN = re.compile(
-    r'(?:color|background-color|background|fill|stroke)\s*[:=]\s*["\']?#[0-9A-Fa-f]{6}',
-    re.IGNORECASE,
-)
 
+def _load_rules() -> BrandRules:
+    """Brand rules from tokens.json, built once per tokens text.
 
-def _strip_code_blocks(content: str) -> list[tuple[int, str]]:
-    """Return (line_number, text) pairs for lines outside code blocks.
-
-    Removes fenced code blocks and inline code spans so validation only
-    checks prose.
+    Raises FileNotFoundError or json.JSONDecodeError.
     """
-    # Remove fenced code blocks, replacing with empty lines to preserve numbering
-    stripped = _CODE_BLOCK_PATTERN.sub(lambda m: "\n" * m.group().count("\n"), content)
-    # Remove inline code spans
-    stripped = _INLINE_CODE_PATTERN.sub("", stripped)
-    return list(enumerate(stripped.splitlines(), 1))
-
-
-def _check_colours(prose_lines: list[tuple[int, str]], tokens: dict) -> list[dict[str, str | int]]:
-    """Flag hex colour codes not present in tokens.json colours."""
-    allowed = {v.upper() for v in tokens.get("colours", {}).values()}
-    issues: list[dict[str, str | int]] = []
-    for line_num, line in prose_lines:
-        for match in _HEX_PATTERN.finditer(line):
-            hex_code = match.group().upper()
-            if hex_code not in allowed:
-                issues.append(
-                    {
-                        "type": "off_brand_colour",
-                        "found": match.group(),
-                        "line": line_num,
-                        "suggestion": "Use a colour from tokens.json",
-                    }
-                )
-    return issues
-
-
-def _check_fonts(prose_lines: list[tuple[int, str]], tokens: dict) -> list[dict[str, str | int]]:
-    """Flag font-family references not present in tokens.json fonts."""
-    brand_fonts = set(tokens.get("fonts", {}).values())
-    # Build patterns for each brand font to detect near-misses
-    common_fonts = {
-        "Arial",
-        "Helvetica",
-        "Times New Roman",
-        "Times",
-        "Courier New",
-        "Courier",
-        "Georgia",
-        "Verdana",
-        "Trebuchet MS",
-        "Comic Sans MS",
-        "Impact",
-        "Palatino",
-        "Garamond",
-        "Bookman",
-        "Roboto",
-        "Open Sans",
-        "Lato",
-        "Montserrat",
-        "Raleway",
-        "Nunito",
-        "Fira Code",
-        "Source Code Pro",
-        "Consolas",
-        "Menlo",
-        "Monaco",
-    }
-    # Only flag fonts that are NOT brand fonts
-    off_brand = common_fonts - brand_fonts
-    issues: list[dict[str, str | int]] = []
-    for line_num, line in prose_lines:
-        for font in off_brand:
-            if font.lower() in line.lower():
-                issues.append(
-                    {
-                        "type": "off_brand_font",
-                        "found": font,
-                        "line": line_num,
-                        "suggestion": f"Use a font from tokens.json: {', '.join(sorted(brand_fonts))}",
-                    }
-                )
-    return issues
-
-
-def _check_spelling(
-    prose_lines: list[tuple[int, str]],
-) -> list[dict[str, str | int]]:
-    """Flag American 'color' spelling outside code blocks and CSS attributes."""
-    # Match 'color' as a standalone word (not part of 'colour')
-    color_pattern = re.compile(r"\bcolor\b", re.IGNORECASE)
-    issues: list[dict[str, str | int]] = []
-    for line_num, line in prose_lines:
-        # Skip lines that look like CSS/HTML attributes
-        if _CSS_ATTR_PATTERN.search(line):
-            continue
-        for match in color_pattern.finditer(line):
-            issues.append(
-                {
-                    "type": "spelling",
-                    "found": match.group(),
-                    "line": line_num,
-                    "suggestion": "Use British English 'colour'",
-                }
-            )
-    return issues
+    return rules_for(_read_tokens())
 
 
 # ---------------------------------------------------------------------------
@@ -216,17 +143,26 @@ def _check_spelling(
 
 
 @mcp.tool()
-def list_brand(category: str | None = None) -> str:
+@instrumented
+def list_brand(
+    category: str | None = None,
+    encoding: str | None = None,
+    fields: list[str] | None = None,
+) -> str:
     """List available brand guideline documents.
 
     Returns name, category, path, and title of each brand document.
     Optionally filter by category.
+
+    Pass encoding="compact" or "table" (columns plus rows) for smaller
+    responses, and fields to keep only some record fields.
     """
     resources = discover_brand(category)
-    return json.dumps([asdict(r) for r in resources], indent=2)
+    return encode([asdict(r) for r in resources], encoding, fields)
 
 
 @mcp.tool()
+@instrumented
 def get_brand(name: str) -> str:
     """Get the full content of a brand guideline document by name.
 
@@ -240,6 +176,7 @@ def get_brand(name: str) -> str:
 
 
 @mcp.tool()
+@instrumented
 def get_design_tokens() -> str:
     """Read and return the design tokens from brand/tokens.json.
 
@@ -248,43 +185,40 @@ def get_design_tokens() -> str:
     brand values.
     """
     try:
-        return TOKENS_PATH.read_text(encoding="utf-8")
+        return _read_tokens()
     except (FileNotFoundError, OSError) as exc:
         return f"Error reading tokens.json: {exc}"
 
 
 @mcp.tool()
-def validate_brand(content: str) -> str:
+@instrumented
+def validate_brand(
+    content: str,
+    encoding: str | None = None,
+    fields: list[str] | None = None,
+) -> str:
     """Validate content against the brand guidelines.
 
     Checks for off-brand colours, off-brand fonts, and American spelling
     of 'color'. Reads tokens.json for canonical values. Returns a JSON
     report with pass/fail status and any issues found.
+
+    Pass encoding="compact" or "table" (columns plus rows) for smaller
+    responses, and fields to keep only some issue fields.
     """
     try:
-        tokens = _load_tokens()
+        rules = _load_rules()
     except (FileNotFoundError, json.JSONDecodeError) as exc:
-        return json.dumps(
+        issues = [
             {
-                "passed": False,
-                "issue_count": 1,
-                "issues": [
-                    {
-                        "type": "error",
-                        "found": str(exc),
-                        "line": 0,
-                        "suggestion": "Ensure brand/tokens.json exists and is valid JSON",
-                    }
-                ],
-            },
-            indent=2,
-        )
-
-    prose_lines = _strip_code_blocks(content)
-    issues: list[dict[str, str | int]] = []
-    issues.extend(_check_colours(prose_lines, tokens))
-    issues.extend(_check_fonts(prose_lines, tokens))
-    issues.extend(_check_spelling(prose_lines))
+                "type": "error",
+                "found": str(exc),
+                "line": 0,
+                "suggestion": "Ensure brand/tokens.json exists and is valid JSON",
+            }
+        ]
+    else:
+        issues = rules.check(_strip_code_blocks(content))
 
     passed = len(issues) == 0
     report: dict = {
@@ -299,7 +233,19 @@ def validate_brand(content: str) -> str:
             by_type[t] = by_type.get(t, 0) + 1
         report["summary"] = ", ".join(f"{v} {k}" for k, v in by_type.items())
 
-    return json.dumps(report, indent=2)
+    return encode(report, encoding, fields, records_key="issues")
+
+
+@mcp.tool()
+def server_stats(encoding: str | None = None) -> str:
+    """Get performance metrics for this server's tools.
+
+    Returns per-tool call counts, error counts, latency (total, mean,
+    max and a histogram), payload bytes in and out, and the file cache
+    hit ratio, aggregated since the server started. Pass
+    encoding="compact" for a smaller response.
+    """
+    return encode(stats_report(mcp.name), encoding)
 
 
 # ---------------------------------------------------------------------------
@@ -309,6 +255,8 @@ def validate_brand(content: str) -> str:
 
 def main() -> None:
     """Run the MCP server with stdio transport."""
+    global _snapshot
+    _snapshot = snapshot_from_args(__doc__.splitlines()[0], SNAPSHOT_ROOT)
     mcp.run(transport="stdio")
 
 
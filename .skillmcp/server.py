@@ -7,13 +7,13 @@ skill requires no code changes.
 
 Usage:
     python .skillmcp/server.py
+    python .skillmcp/server.py --snapshot output/mcp-snapshot.sqlite
 
 Configured for Claude Code via .mcp.json (stdio transport).
 """
 
 from __future__ import annotations
 
-import json
 import logging
 import sys
 from dataclasses import asdict, dataclass
@@ -21,6 +21,13 @@ from pathlib import Path
 
 from mcp.server.fastmcp import FastMCP
 
+# The servers share their runtime through scripts/ (mcp_common, mcp_snapshot)
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.append(str(SCRIPTS_DIR))
+
+from mcp_common import encode, instrumented, read_text, stats_report  # noqa: E402
+from mcp_snapshot import MARKDOWN, Snapshot, snapshot_from_args  # noqa: E402
+
 # Logging must go to stderr — stdout is reserved for stdio transport.
 logging.basicConfig(stream=sys.stderr, level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -30,6 +37,19 @@ SKILLS_DIR = Path(__file__).resolve().parent / "skills"
 mcp = FastMCP("sdd-book-skills")
 
 
+# ---------------------------------------------------------------------------
+# Snapshot
+# ---------------------------------------------------------------------------
+
+# With --snapshot, skills/ is read from a packed, read-only SQLite file
+# (scripts/mcp_snapshot.py) instead of the directory: startup opens one
+# file, and listings and lookups are indexed reads. Edits to skills/ are
+# not seen until the snapshot is rebuilt, so authoring uses the live tree.
+SNAPSHOT_ROOT = "skills"
+
+_snapshot: Snapshot | None = None
+
+
 # ---------------------------------------------------------------------------
 # Discovery
 # ---------------------------------------------------------------------------
@@ -48,7 +68,7 @@ class SkillInfo:
 
 def _extract_title(path: Path) -> str:
     """Extract the first markdown heading from a file."""
-    for line in path.read_text(encoding="utf-8").splitlines():
+    for line in read_text(path).splitlines():
         if line.startswith("# "):
             return line.removeprefix("# ").strip()
     return path.stem
@@ -56,6 +76,9 @@ def _extract_title(path: Path) -> str:
 
 def discover_skills(category: str | None = None) -> list[SkillInfo]:
     """Scan skills/ and return metadata for every .md file found."""
+    if _snapshot is not None:
+        where = f"{MARKDOWN} AND category = coalesce(?, category)"
+        return [SkillInfo(*row) for row in _snapshot.infos(where, category or None)]
     skills: list[SkillInfo] = []
     for md_file in sorted(SKILLS_DIR.rglob("*.md")):
         if md_file.stem.endswith(".provenance"):
@@ -77,11 +100,16 @@ def discover_skills(category: str | None = None) -> list[SkillInfo]:
 
 def load_skill(name: str) -> str:
     """Load a skill by name. Raises ValueError if not found."""
-    for md_file in SKILLS_DIR.rglob("*.md"):
-        if md_file.stem.endswith(".provenance"):
-            continue
-        if md_file.stem == name:
-            return md_file.read_text(encoding="utf-8")
+    if _snapshot is not None:
+        text = _snapshot.text(f"name = ? AND {MARKDOWN}", name)
+        if text is not None:
+            return text
+    else:
+        for md_file in SKILLS_DIR.rglob("*.md"):
+            if md_file.stem.endswith(".provenance"):
+                continue
+            if md_file.stem == name:
+                return read_text(md_file)
     available = [s.name for s in discover_skills()]
     msg = f"Skill '{name}' not found. Available: {', '.join(available)}"
     raise ValueError(msg)
@@ -93,17 +121,26 @@ def load_skill(name: str) -> str:
 
 
 @mcp.tool()
-def list_skills(category: str | None = None) -> str:
+@instrumented
+def list_skills(
+    category: str | None = None,
+    encoding: str | None = None,
+    fields: list[str] | None = None,
+) -> str:
     """List available skills in the SDD book repository.
 
     Returns the name, category, path, and title of each skill document.
     Optionally filter by category (e.g., 'mcp-builder').
+
+    Pass encoding="compact" or "table" (columns plus rows) for smaller
+    responses, and fields to keep only some record fields.
     """
     skills = discover_skills(category)
-    return json.dumps([asdict(s) for s in skills], indent=2)
+    return encode([asdict(s) for s in skills], encoding, fields)
 
 
 @mcp.tool()
+@instrumented
 def get_skill(name: str) -> str:
     """Get the full content of a skill document by name.
 
@@ -116,6 +153,18 @@ def get_skill(name: str) -> str:
         return str(exc)
 
 
+@mcp.tool()
+def server_stats(encoding: str | None = None) -> str:
+    """Get performance metrics for this server's tools.
+
+    Returns per-tool call counts, error counts, latency (total, mean,
+    max and a histogram), payload bytes in and out, and the file cache
+    hit ratio, aggregated since the server started. Pass
+    encoding="compact" for a smaller response.
+    """
+    return encode(stats_report(mcp.name), encoding)
+
+
 # ---------------------------------------------------------------------------
 # Entry point
 # ---------------------------------------------------------------------------
@@ -123,6 +172,8 @@ def get_skill(name: str) -> str:
 
 def main() -> None:
     """Run the MCP server with stdio transport."""
+    global _snapshot
+    _snapshot = snapshot_from_args(__doc__.splitlines()[0], SNAPSHOT_ROOT)
     mcp.run(transport="stdio")
 
 
@@ -0,0 +1,75 @@
+"""Chapter context bundles from the editorial specs.
+
+The assembly behind get_chapter_context, kept free of the MCP SDK so
+that scripts/export-chapter-contexts.py can build every bundle from one
+load of the specs without starting a server. Specs are read through a
+load function (name -> text, raising ValueError for an unknown name),
+so the server passes its cached load_spec and the export a dict lookup.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Callable
+
+# Chapters with an outline section and a context bundle
+CHAPTERS = range(1, 27)
+
+
+def extract_chapter_section(outline: str, chapter_number: int) -> str:
+    """Extract a single chapter's section from the chapter outline text."""
+    pattern = rf"^### Chapter {chapter_number}:"
+    lines = outline.splitlines()
+    start = None
+    for i, line in enumerate(lines):
+        if re.match(pattern, line):
+            start = i
+        elif start is not None and re.match(r"^###? ", line) and i > start:
+            return "\n".join(lines[start:i]).strip()
+    if start is not None:
+        return "\n".join(lines[start:]).strip()
+    return f"No outline found for chapter {chapter_number}."
+
+
+def extract_chapter_diataxis(diataxis: str, chapter_number: int) -> str:
+    """Extract the diataxis classification row for a chapter."""
+    for line in diataxis.splitlines():
+        if re.match(rf"^\|\s*{chapter_number}\s*\|", line):
+            return line.strip()
+    return f"No diataxis classification found for chapter {chapter_number}."
+
+
+def chapter_context(chapter_number: int, load_spec: Callable[[str], str]) -> str:
+    """The context bundle for one chapter: book brief, writers guide,
+    glossary, chapter outline excerpt, prior-art, continuity state,
+    diataxis classification, and the chapter brief (if one exists)."""
+    sections: list[str] = []
+
+    def _add(heading: str, content: str) -> None:
+        sections.append(f"=== {heading} ===\n\n{content}")
+
+    _add("BOOK BRIEF", load_spec("book-brief"))
+    _add("WRITERS GUIDE", load_spec("writers-guide"))
+    _add("GLOSSARY", load_spec("glossary"))
+    _add(
+        f"CHAPTER OUTLINE (Chapter {chapter_number})",
+        extract_chapter_section(load_spec("chapter-outline"), chapter_number),
+    )
+    _add("PRIOR ART", load_spec("prior-art"))
+    _add("CONTINUITY STATE", load_spec("continuity-tracker"))
+    _add(
+        f"DIATAXIS CLASSIFICATION (Chapter {chapter_number})",
+        extract_chapter_diataxis(load_spec("diataxis-integration"), chapter_number),
+    )
+
+    # Chapter brief — may not exist yet
+    brief_name = f"ch{chapter_number:02d}-brief"
+    try:
+        _add("CHAPTER BRIEF", load_spec(brief_name))
+    except ValueError:
+        _add(
+            "CHAPTER BRIEF",
+            f"No chapter brief found ({brief_name}.md). Create one in specs/editorial/chapter-briefs/.",
+        )
+
+    return "\n\n".join(sections)
@@ -0,0 +1,138 @@
+"""Content validation rules from the writers guide.
+
+The checks behind validate_content, kept free of the MCP SDK so that
+scripts/validate-staged.py can run them in a pre-commit hook without
+paying for the SDK import. Rules are parsed from writers-guide.md once
+per guide text (rules_for), so repeated validations reuse them.
+
+Lines are (line_number, text) pairs, so callers can check any subset
+of a document's lines and get issues with the document's own numbers.
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+Issue = dict[str, str | int]
+
+_BANNED_PATTERN = re.compile(r'^- "(.+?)"(?: \(use "(.+?)"\))?')
+
+
+def parse_banned_words(guide: str) -> list[tuple[str, str]]:
+    """Parse banned words from the writers guide.
+
+    Returns (banned_word, suggestion) pairs.
+    """
+    banned: list[tuple[str, str]] = []
+    in_banned = False
+    for line in guide.splitlines():
+        if "Banned words and phrases" in line:
+            in_banned = True
+            continue
+        if in_banned and line.startswith("---"):
+            break
+        if in_banned and line.startswith("- "):
+            match = _BANNED_PATTERN.match(line)
+            if match:
+                word = match.group(1)
+                suggestion = match.group(2) or ""
+                banned.append((word, suggestion))
+    return banned
+
+
+def parse_terminology_map(guide: str) -> dict[str, str]:
+    """Parse preferred terminology from the writers guide.
+
+    Returns {wrong_term: preferred_term}.
+    """
+    terms: dict[str, str] = {}
+    in_table = False
+    for line in guide.splitlines():
+        if "| Preferred Term" in line:
+            in_table = True
+            continue
+        if in_table and line.startswith("|---"):
+            continue
+        if in_table and line.startswith("|"):
+            cols = [c.strip() for c in line.split("|")[1:-1]]
+            if len(cols) >= 2:
+                preferred = cols[0]
+                wrong_terms = [t.strip() for t in cols[1].split(",")]
+                for wrong in wrong_terms:
+                    # Strip parenthetical notes
+                    clean = re.sub(r"\(.*?\)", "", wrong).strip()
+                    if clean:
+                        terms[clean.lower()] = preferred
+        elif in_table and not line.strip():
+            break
+    return terms
+
+
+@dataclass(frozen=True)
+class ContentRules:
+    """The writers guide's banned words and terminology, ready to check."""
+
+    banned: tuple[tuple[str, str], ...]
+    terms: tuple[tuple[str, str], ...]  # (wrong_term, preferred_term)
+
+    def check(self, lines: Iterable[tuple[int, str]]) -> list[Issue]:
+        """Issues in lines, in validate_content's order: banned words,
+        terminology, then structure.
+
+        The document must start with a heading; that is only checked
+        when line 1 is among lines.
+        """
+        lines = list(lines)
+        lowered = [(i, line.lower()) for i, line in lines]
+        banned = [(word, word.lower(), suggestion) for word, suggestion in self.banned]
+        issues: list[Issue] = []
+
+        # 1. Banned words
+        for i, lower in lowered:
+            for word, word_lower, suggestion in banned:
+                if word_lower in lower:
+                    issue: Issue = {"type": "banned_word", "word": word, "line": i}
+                    if suggestion:
+                        issue["suggestion"] = suggestion
+                    issues.append(issue)
+
+        # 2. Terminology
+        for i, lower in lowered:
+            for wrong, preferred in self.terms:
+                if wrong in lower:
+                    issues.append(
+                        {"type": "terminology", "found": wrong, "preferred": preferred, "line": i}
+                    )
+
+        # 3. Structure
+        if lines and lines[0][0] == 1 and not lines[0][1].startswith("#"):
+            issues.append(
+                {"type": "structure", "issue": "Content should start with a heading", "line": 1}
+            )
+
+        for i, line in lines:
+            stripped = line.strip()
+            if stripped.endswith("?") and (
+                stripped.startswith("Have you") or stripped.startswith("What if")
+            ):
+                issues.append(
+                    {
+                        "type": "structure",
+                        "issue": "Avoid rhetorical questions as transitions",
+                        "line": i,
+                    }
+                )
+
+        return issues
+
+
+@functools.lru_cache(maxsize=4)
+def rules_for(guide: str) -> ContentRules:
+    """Parsed rules for a writers guide text, parsed once per text."""
+    return ContentRules(
+        banned=tuple(parse_banned_words(guide)),
+        terms=tuple(parse_terminology_map(guide).items()),
+    )
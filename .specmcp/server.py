@@ -7,21 +7,30 @@ requires no code changes.
 
 Usage:
     python .specmcp/server.py
+    python .specmcp/server.py --snapshot output/mcp-snapshot.sqlite
 
 Configured for Claude Code via .mcp.json (stdio transport).
 """
 
 from __future__ import annotations
 
-import json
 import logging
-import re
 import sys
 from dataclasses import asdict, dataclass
 from pathlib import Path
+from types import ModuleType
 
+import chapter_context
+from content_rules import parse_banned_words, parse_terminology_map, rules_for
 from mcp.server.fastmcp import FastMCP
 
+# The servers share their runtime through scripts/ (mcp_common, mcp_snapshot)
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.append(str(SCRIPTS_DIR))
+
+from mcp_common import encode, instrumented, read_text, stats_report  # noqa: E402
+from mcp_snapshot import MARKDOWN, Snapshot, snapshot_from_args  # noqa: E402
+
 # Logging must go to stderr — stdout is reserved for stdio transport.
 logging.basicConfig(stream=sys.stderr, level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,6 +40,19 @@ SPECS_DIR = Path(__file__).resolve().parent / "specs"
 mcp = FastMCP("sdd-book-specs")
 
 
+# ---------------------------------------------------------------------------
+# Snapshot
+# ---------------------------------------------------------------------------
+
+# With --snapshot, specs/ is read from a packed, read-only SQLite file
+# (scripts/mcp_snapshot.py) instead of the directory: startup opens one
+# file, and listings and lookups are indexed reads. Edits to specs/ are
+# not seen until the snapshot is rebuilt, so authoring uses the live tree.
+SNAPSHOT_ROOT = "specs"
+
+_snapshot: Snapshot | None = None
+
+
 # ---------------------------------------------------------------------------
 # Spec discovery
 # ---------------------------------------------------------------------------
@@ -49,7 +71,7 @@ class SpecInfo:
 
 def _extract_title(path: Path) -> str:
     """Extract the first markdown heading from a file."""
-    for line in path.read_text(encoding="utf-8").splitlines():
+    for line in read_text(path).splitlines():
         if line.startswith("# "):
             return line.removeprefix("# ").strip()
     return path.stem
@@ -57,6 +79,9 @@ def _extract_title(path: Path) -> str:
 
 def discover_specs(category: str | None = None) -> list[SpecInfo]:
     """Scan specs/ and return metadata for every .md file found."""
+    if _snapshot is not None:
+        where = f"{MARKDOWN} AND category = coalesce(?, category)"
+        return [SpecInfo(*row) for row in _snapshot.infos(where, category or None)]
     specs: list[SpecInfo] = []
     for md_file in sorted(SPECS_DIR.rglob("*.md")):
         if md_file.stem.endswith(".provenance"):
@@ -76,13 +101,23 @@ def discover_specs(category: str | None = None) -> list[SpecInfo]:
     return specs
 
 
-def load_spec(name: str) -> str:
-    """Load a spec by name. Raises ValueError if not found."""
+def _find_spec(name: str) -> str | None:
+    """A spec's text by name, from the snapshot or specs/, or None."""
+    if _snapshot is not None:
+        return _snapshot.text(f"name = ? AND {MARKDOWN}", name)
     for md_file in SPECS_DIR.rglob("*.md"):
         if md_file.stem.endswith(".provenance"):
             continue
         if md_file.stem == name:
-            return md_file.read_text(encoding="utf-8")
+            return read_text(md_file)
+    return None
+
+
+def load_spec(name: str) -> str:
+    """Load a spec by name. Raises ValueError if not found."""
+    text = _find_spec(name)
+    if text is not None:
+        return text
     available = [s.name for s in discover_specs()]
     msg = f"Spec '{name}' not found. Available: {', '.join(available)}"
     raise ValueError(msg)
@@ -95,6 +130,8 @@ def load_spec(name: str) -> str:
 
 def discover_provenance() -> list[SpecInfo]:
     """Scan specs/ for provenance files and return metadata for each."""
+    if _snapshot is not None:
+        return [SpecInfo(*row) for row in _snapshot.infos("path GLOB '*.provenance.md'")]
     provenance: list[SpecInfo] = []
     for md_file in sorted(SPECS_DIR.rglob("*.provenance.md")):
         provenance.append(
@@ -112,9 +149,14 @@ def discover_provenance() -> list[SpecInfo]:
 def load_provenance(spec_name: str) -> str:
     """Load provenance for a spec by name. Returns error string if not found."""
     target = f"{spec_name}.provenance"
-    for md_file in SPECS_DIR.rglob("*.provenance.md"):
-        if md_file.stem == target:
-            return md_file.read_text(encoding="utf-8")
+    if _snapshot is not None:
+        text = _snapshot.text("name = ? AND path GLOB '*.provenance.md'", target)
+        if text is not None:
+            return text
+    else:
+        for md_file in SPECS_DIR.rglob("*.provenance.md"):
+            if md_file.stem == target:
+                return read_text(md_file)
     return f"No provenance found for spec '{spec_name}'."
 
 
@@ -125,27 +167,14 @@ def load_provenance(spec_name: str) -> str:
 
 def extract_chapter_section(chapter_number: int) -> str:
     """Extract a single chapter's section from chapter-outline.md."""
-    content = load_spec("chapter-outline")
-    pattern = rf"^### Chapter {chapter_number}:"
-    lines = content.splitlines()
-    start = None
-    for i, line in enumerate(lines):
-        if re.match(pattern, line):
-            start = i
-        elif start is not None and re.match(r"^###? ", line) and i > start:
-            return "\n".join(lines[start:i]).strip()
-    if start is not None:
-        return "\n".join(lines[start:]).strip()
-    return f"No outline found for chapter {chapter_number}."
+    return chapter_context.extract_chapter_section(load_spec("chapter-outline"), chapter_number)
 
 
 def extract_chapter_diataxis(chapter_number: int) -> str:
     """Extract the diataxis classification row for a chapter."""
-    content = load_spec("diataxis-integration")
-    for line in content.splitlines():
-        if re.match(rf"^\|\s*{chapter_number}\s*\|", line):
-            return line.strip()
-    return f"No diataxis classification found for chapter {chapter_number}."
+    return chapter_context.extract_chapter_diataxis(
+        load_spec("diataxis-integration"), chapter_number
+    )
 
 
 def get_banned_words() -> list[tuple[str, str]]:
@@ -153,22 +182,7 @@ def get_banned_words() -> list[tuple[str, str]]:
 
     Returns (banned_word, suggestion) pairs.
     """
-    content = load_spec("writers-guide")
-    banned: list[tuple[str, str]] = []
-    in_banned = False
-    for line in content.splitlines():
-        if "Banned words and phrases" in line:
-            in_banned = True
-            continue
-        if in_banned and line.startswith("---"):
-            break
-        if in_banned and line.startswith("- "):
-            match = re.match(r'^- "(.+?)"(?: \(use "(.+?)"\))?', line)
-            if match:
-                word = match.group(1)
-                suggestion = match.group(2) or ""
-                banned.append((word, suggestion))
-    return banned
+    return parse_banned_words(load_spec("writers-guide"))
 
 
 def get_terminology_map() -> dict[str, str]:
@@ -176,28 +190,18 @@ def get_terminology_map() -> dict[str, str]:
 
     Returns {wrong_term: preferred_term}.
     """
-    content = load_spec("writers-guide")
-    terms: dict[str, str] = {}
-    in_table = False
-    for line in content.splitlines():
-        if "| Preferred Term" in line:
-            in_table = True
-            continue
-        if in_table and line.startswith("|---"):
-            continue
-        if in_table and line.startswith("|"):
-            cols = [c.strip() for c in line.split("|")[1:-1]]
-            if len(cols) >= 2:
-                preferred = cols[0]
-                wrong_terms = [t.strip() for t in cols[1].split(",")]
-                for wrong in wrong_terms:
-                    # Strip parenthetical notes
-                    clean = re.sub(r"\(.*?\)", "", wrong).strip()
-                    if clean:
-                        terms[clean.lower()] = preferred
-        elif in_table and not line.strip():
-            break
-    return terms
+    return parse_terminology_map(load_spec("writers-guide"))
+
+
+def _spec_graph() -> ModuleType:
+    """The build scripts' spec_graph module, imported on first use.
+
+    It reads content/ through the build's content manifest, so it lives
+    with the scripts rather than in this server.
+    """
+    import spec_graph
+
+    return spec_graph
 
 
 # ---------------------------------------------------------------------------
@@ -206,17 +210,26 @@ def get_terminology_map() -> dict[str, str]:
 
 
 @mcp.tool()
-def list_specs(category: str | None = None) -> str:
+@instrumented
+def list_specs(
+    category: str | None = None,
+    encoding: str | None = None,
+    fields: list[str] | None = None,
+) -> str:
     """List available specifications in the SDD book repository.
 
     Returns the name, category, path, and title of each spec document.
     Optionally filter by category (e.g., 'editorial', 'workflow').
+
+    Pass encoding="compact" or "table" (columns plus rows) for smaller
+    responses, and fields to keep only some record fields.
     """
     specs = discover_specs(category)
-    return json.dumps([asdict(s) for s in specs], indent=2)
+    return encode([asdict(s) for s in specs], encoding, fields)
 
 
 @mcp.tool()
+@instrumented
 def get_spec(name: str) -> str:
     """Get the full content of a specification document by name.
 
@@ -230,16 +243,21 @@ def get_spec(name: str) -> str:
 
 
 @mcp.tool()
-def list_provenance() -> str:
+@instrumented
+def list_provenance(encoding: str | None = None, fields: list[str] | None = None) -> str:
     """List all provenance records across specs.
 
     Returns metadata for each provenance file found.
+
+    Pass encoding="compact" or "table" (columns plus rows) for smaller
+    responses, and fields to keep only some record fields.
     """
     records = discover_provenance()
-    return json.dumps([asdict(r) for r in records], indent=2)
+    return encode([asdict(r) for r in records], encoding, fields)
 
 
 @mcp.tool()
+@instrumented
 def get_provenance(spec_name: str) -> str:
     """Get the provenance (execution history) for a specific spec.
 
@@ -250,6 +268,7 @@ def get_provenance(spec_name: str) -> str:
 
 
 @mcp.tool()
+@instrumented
 def get_chapter_context(chapter_number: int) -> str:
     """Get bundled specification context for generating a specific chapter.
 
@@ -258,96 +277,64 @@ def get_chapter_context(chapter_number: int) -> str:
     excerpt, prior-art, continuity state, diataxis classification, and the
     chapter brief (if one exists).
     """
-    if chapter_number < 1 or chapter_number > 26:
+    if chapter_number not in chapter_context.CHAPTERS:
         return "Chapter number must be between 1 and 26."
+    return chapter_context.chapter_context(chapter_number, load_spec)
 
-    sections: list[str] = []
-
-    def _add(heading: str, content: str) -> None:
-        sections.append(f"=== {heading} ===\n\n{content}")
 
-    _add("BOOK BRIEF", load_spec("book-brief"))
-    _add("WRITERS GUIDE", load_spec("writers-guide"))
-    _add("GLOSSARY", load_spec("glossary"))
-    _add(f"CHAPTER OUTLINE (Chapter {chapter_number})", extract_chapter_section(chapter_number))
-    _add("PRIOR ART", load_spec("prior-art"))
-    _add("CONTINUITY STATE", load_spec("continuity-tracker"))
-    _add(
-        f"DIATAXIS CLASSIFICATION (Chapter {chapter_number})",
-        extract_chapter_diataxis(chapter_number),
-    )
-
-    # Chapter brief — may not exist yet
-    brief_name = f"ch{chapter_number:02d}-brief"
-    try:
-        _add("CHAPTER BRIEF", load_spec(brief_name))
-    except ValueError:
-        _add(
-            "CHAPTER BRIEF",
-            f"No chapter brief found ({brief_name}.md). Create one in specs/editorial/chapter-briefs/.",
-        )
-
-    return "\n\n".join(sections)
+@mcp.tool()
+@instrumented
+def get_affected_chapters(
+    paths: list[str] | None = None,
+    update: bool = False,
+    encoding: str | None = None,
+    fields: list[str] | None = None,
+) -> str:
+    """List the chapters affected by spec or content changes.
+
+    Compares the specs and content/ with the dependency graph saved by
+    the last update (scripts/spec_graph.py). Each chapter comes with its
+    reasons: the changed spec sections it depends on (e.g.
+    "chapter-outline#3", "glossary#Drift") and "content" if its own file
+    changed. Pass paths (relative to the repository) to count only
+    changes to those files, and
+    update=True to save the current graph afterwards. Specs are read as
+    get_spec reads them, from the snapshot when the server has one.
+
+    Pass encoding="compact" or "table" (columns plus rows) for smaller
+    responses, and fields to keep only some record fields.
+    """
+    spec_graph = _spec_graph()
+    previous = spec_graph.load_graph()
+    current = spec_graph.build_graph(previous, read_spec=_find_spec)
+    records = [
+        {"chapter": c.number, "title": c.title, "path": c.path, "reasons": reasons}
+        for c, reasons in spec_graph.affected(previous, current, paths)
+    ]
+    if update:
+        current.save()
+    return encode(records, encoding, fields)
 
 
 @mcp.tool()
-def validate_content(content: str, chapter_number: int | None = None) -> str:
+@instrumented
+def validate_content(
+    content: str,
+    chapter_number: int | None = None,
+    encoding: str | None = None,
+    fields: list[str] | None = None,
+) -> str:
     """Validate content against SDD book specifications.
 
     Checks for banned words from the writers guide, terminology consistency,
     and basic structural requirements. Returns a JSON report.
-    """
-    issues: list[dict[str, str | int]] = []
-    lines = content.splitlines()
-
-    # 1. Banned words
-    banned = get_banned_words()
-    for i, line in enumerate(lines, 1):
-        lower = line.lower()
-        for word, suggestion in banned:
-            if word.lower() in lower:
-                issue: dict[str, str | int] = {
-                    "type": "banned_word",
-                    "word": word,
-                    "line": i,
-                }
-                if suggestion:
-                    issue["suggestion"] = suggestion
-                issues.append(issue)
-
-    # 2. Terminology
-    term_map = get_terminology_map()
-    for i, line in enumerate(lines, 1):
-        lower = line.lower()
-        for wrong, preferred in term_map.items():
-            if wrong in lower:
-                issues.append(
-                    {
-                        "type": "terminology",
-                        "found": wrong,
-                        "preferred": preferred,
-                        "line": i,
-                    }
-                )
-
-    # 3. Structure
-    if lines and not lines[0].startswith("#"):
-        issues.append(
-            {"type": "structure", "issue": "Content should start with a heading", "line": 1}
-        )
 
-    for i, line in enumerate(lines, 1):
-        stripped = line.strip()
-        if stripped.endswith("?") and (
-            stripped.startswith("Have you") or stripped.startswith("What if")
-        ):
-            issues.append(
-                {
-                    "type": "structure",
-                    "issue": "Avoid rhetorical questions as transitions",
-                    "line": i,
-                }
-            )
+    Pass encoding="compact" or "table" (columns plus rows) for smaller
+    responses, and fields to keep only some issue fields.
+    """
+    # Rules are parsed once per writers-guide text (content_rules.rules_for)
+    rules = rules_for(load_spec("writers-guide"))
+    issues = rules.check(enumerate(content.splitlines(), 1))
 
     passed = len(issues) == 0
     report = {
@@ -362,7 +349,19 @@ def validate_content(content: str, chapter_number: int | None = None) -> str:
             by_type[t] = by_type.get(t, 0) + 1
         report["summary"] = ", ".join(f"{v} {k}" for k, v in by_type.items())
 
-    return json.dumps(report, indent=2)
+    return encode(report, encoding, fields, records_key="issues")
+
+
+@mcp.tool()
+def server_stats(encoding: str | None = None) -> str:
+    """Get performance metrics for this server's tools.
+
+    Returns per-tool call counts, error counts, latency (total, mean,
+    max and a histogram), payload bytes in and out, and the file cache
+    hit ratio, aggregated since the server started. Pass
+    encoding="compact" for a smaller response.
+    """
+    return encode(stats_report(mcp.name), encoding)
 
 
 # ---------------------------------------------------------------------------
@@ -372,6 +371,8 @@ def validate_content(content: str, chapter_number: int | None = None) -> str:
 
 def main() -> None:
     """Run the MCP server with stdio transport."""
+    global _snapshot
+    _snapshot = snapshot_from_args(__doc__.splitlines()[0], SNAPSHOT_ROOT)
     mcp.run(transport="stdio")
 
 
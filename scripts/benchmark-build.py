@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""Benchmark the book build pipeline against synthetic manuscripts.
+
+Generates a content/ tree of a given size in a scratch copy of the
+repository (the real front matter, then N chapters spread over the five
+parts, each with prose, code blocks, tables and images) and times:
+
+  assemble[Nch]    assemble_blocks() on the synthetic manifest's parsed
+                   ASTs, serialized as streamed to pandoc (in process;
+                   parsing is not timed)
+  epub-cold[Nch]   build-epub.py with an empty fragment cache
+  epub-warm[Nch]   build-epub.py again with the cache populated
+  pdf[Nch]         build-pdf.py --variant print
+
+Manuscripts are generated deterministically, so results are comparable
+across commits. When pandoc or XeLaTeX is not installed, a local fake
+is put on PATH: fake XeLaTeX writes a placeholder PDF, so real pandoc
+still does its LaTeX conversion; fake pandoc does a rough markdown
+conversion. Results from fakes measure the build scripts, not
+typesetting, and are labelled as such.
+
+For the build steps, "peak KB" is the child process's peak RSS.
+Results are compared with benchmarks/build-baseline.json.
+
+Usage:
+  python scripts/benchmark-build.py [--chapters 2,8,26] [--code-blocks N]
+                                    [--tables N] [--images N] [--repeats N]
+                                    [--fake-tools] [--save-baseline] [--check]
+                                    [--history FILE]
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import textwrap
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+from benchmark_harness import BenchResult, add_arguments, finish, measure, time_command
+from book_ast import READER_OPTIONS, ParsedFiles, iter_dumps
+from book_content import SECTION_ORDER, scan
+from pandoc_backend import Conversion, SubprocessBackend
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BASELINE_FILE = REPO_ROOT / "benchmarks" / "build-baseline.json"
+
+# Copied into the scratch tree; fonts are large and only read, so linked
+COPIED = ["scripts", "build", "assets/cover"]
+LINKED = ["assets/fonts", ".specmcp/specs/editorial"]
+
+PART_DIRS = SECTION_ORDER[1:6]
+DEFAULT_CHAPTERS = [2, 8, 26]
+SEED = 2024
+
+# Filler vocabulary for generated prose
+VOCABULARY = (
+    "spec agent model workflow review context intent outcome system change team code test "
+    "chapter evidence practice constraint boundary decision contract quality factory level "
+    "delivery feedback loop engineer product failure signal structure drift governance the "
+    "a of and to in is that for with on as it by this be are from at not"
+)
+WORDS = VOCABULARY.split()
+
+FAKE_XELATEX = '''\
+#!{python}
+"""Benchmark stand-in for XeLaTeX: writes a placeholder PDF."""
+import sys
+from pathlib import Path
+
+args = sys.argv[1:]
+if "--version" in args:
+    print("XeTeX 3.141592653 (benchmark fake)")
+    sys.exit(0)
+outdir = Path(args[args.index("-output-directory") + 1]) if "-output-directory" in args else Path()
+tex = Path(args[-1])
+(outdir / f"{{tex.stem}}.pdf").write_bytes({pdf!r})
+(outdir / f"{{tex.stem}}.log").write_text("")
+'''
+
+FAKE_PANDOC = '''\
+#!{python}
+"""Benchmark stand-in for pandoc: rough markdown to a JSON AST, to HTML, placeholder PDF."""
+import html
+import json
+import re
+import sys
+from pathlib import Path
+
+args = sys.argv[1:]
+if "--version" in args:
+    print("pandoc 3.1 (benchmark fake)")
+    sys.exit(0)
+out = args[args.index("-o") + 1] if "-o" in args else None
+inputs = [a for a in args if not a.startswith("-") and a != out]
+text = Path(inputs[0]).read_text(encoding="utf-8") if inputs else sys.stdin.read()
+
+if out and out.endswith(".pdf"):
+    Path(out).write_bytes({pdf!r})
+    sys.exit(0)
+
+
+def parse(text):
+    blocks = []
+    for block in re.split(r"\\n{{2,}}", text.strip()):
+        heading = re.match(r"^(#{{1,6}})\\s+(.+?)\\s*(?:\\{{([^}}]*)\\}})?$", block)
+        image = re.match(r"^!\\[(.*?)\\]\\((.+?)\\)$", block)
+        if heading:
+            level, title = len(heading.group(1)), heading.group(2)
+            anchor = re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-")
+            inlines = [{{"t": "Str", "c": title}}]
+            blocks.append({{"t": "Header", "c": [level, [anchor, [], []], inlines]}})
+        elif image:
+            alt = [{{"t": "Str", "c": image.group(1)}}]
+            inline = {{"t": "Image", "c": [["", [], []], alt, [image.group(2), ""]]}}
+            blocks.append({{"t": "Para", "c": [inline]}})
+        elif block:
+            blocks.append({{"t": "Para", "c": [{{"t": "Str", "c": block}}]}})
+    return {{"pandoc-api-version": [1, 23, 1], "meta": {{}}, "blocks": blocks}}
+
+
+if "--to=json" in args:
+    sys.stdout.write(json.dumps(parse(text)))
+    sys.exit(0)
+
+doc = json.loads(text) if "--from=json" in args else parse(text)
+output = []
+for block in doc["blocks"]:
+    if block["t"] == "Header":
+        level, (anchor, _, _), inlines = block["c"]
+        title = html.escape(inlines[0]["c"])
+        output.append(f'<h{{level}} id="{{anchor}}">{{title}}</h{{level}}>')
+    elif block["t"] != "Para" or not block["c"]:
+        if block["t"] == "RawBlock" and block["c"][0] == "html":
+            output.append(block["c"][1])
+    elif block["c"][0]["t"] == "Image":
+        _, alt, (src, _) = block["c"][0]["c"]
+        output.append(f'<img src="{{src}}" alt="{{html.escape(alt[0]["c"])}}" />')
+    else:
+        text = "".join(inline.get("c", " ") for inline in block["c"] if inline["t"] != "Code")
+        output.append(f"<p>{{html.escape(text)}}</p>")
+sys.stdout.write("\\n".join(output) + "\\n")
+'''
+
+
+@dataclass
+class ManuscriptSpec:
+    """Shape of a synthetic manuscript."""
+
+    chapters: int
+    code_blocks: int = 2
+    tables: int = 1
+    images: int = 1
+    sections: int = 4
+    paragraphs: int = 6
+
+
+def placeholder_pdf(pages: int = 1) -> bytes:
+    """A minimal PDF whose page tree reports `pages` pages."""
+    kids = " ".join(f"{i + 3} 0 R" for i in range(pages))
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>",
+        *["<< /Type /Page /Parent 2 0 R /MediaBox [0 0 432 648] >>"] * pages,
+    ]
+    body = "%PDF-1.4\n" + "".join(f"{i} 0 obj\n{obj}\nendobj\n" for i, obj in enumerate(objects, 1))
+    return (body + "trailer\n<< /Root 1 0 R >>\n%%EOF\n").encode("ascii")
+
+
+def placeholder_png(seed: int, size: int = 64) -> bytes:
+    """A small solid-colour PNG; the colour varies with seed."""
+    rng = random.Random(seed)
+    pixel = bytes(rng.randrange(256) for _ in range(3))
+    raw = b"".join(b"\x00" + pixel * size for _ in range(size))
+
+    def _chunk(kind: bytes, data: bytes) -> bytes:
+        crc = zlib.crc32(kind + data)
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", crc)
+
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _chunk(b"IHDR", header)
+        + _chunk(b"IDAT", zlib.compress(raw))
+        + _chunk(b"IEND", b"")
+    )
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng: random.Random) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(3, 6)))
+
+
+def _code_block(rng: random.Random) -> str:
+    lines = [f"def step_{i}(spec):\n    return spec.{rng.choice(WORDS)}()" for i in range(3)]
+    return "```python\n" + "\n\n".join(lines) + "\n```"
+
+
+def _table(rng: random.Random) -> str:
+    rows = [
+        f"| {rng.choice(WORDS)} | {rng.choice(WORDS)} | {rng.randint(1, 99)} |" for _ in range(5)
+    ]
+    return "| Term | Meaning | Count |\n|------|---------|-------|\n" + "\n".join(rows)
+
+
+def chapter_markdown(title: str, spec: ManuscriptSpec, rng: random.Random, images: list[str]):
+    """One chapter's markdown, with blocks spread over its sections."""
+    blocks = [f"# {title}"]
+    extras = (
+        [_code_block(rng) for _ in range(spec.code_blocks)]
+        + [_table(rng) for _ in range(spec.tables)]
+        + [f"![Figure: {name}](images/{name})" for name in images]
+    )
+    rng.shuffle(extras)
+    for s in range(spec.sections):
+        blocks.append(f"## Section {s + 1}: {_sentence(rng).rstrip('.')}")
+        blocks.extend(_paragraph(rng) for _ in range(spec.paragraphs))
+        blocks.extend(extras[s :: spec.sections])
+    return "\n\n".join(blocks) + "\n"
+
+
+def generate_content(root: Path, spec: ManuscriptSpec) -> None:
+    """Write a synthetic content/ tree: real front matter plus N chapters."""
+    rng = random.Random(SEED)
+    content = root / "content"
+    shutil.copytree(REPO_ROOT / "content" / SECTION_ORDER[0], content / SECTION_ORDER[0])
+
+    parts = PART_DIRS[: max(1, min(len(PART_DIRS), spec.chapters))]
+    per_part = [spec.chapters // len(parts)] * len(parts)
+    for i in range(spec.chapters % len(parts)):
+        per_part[i] += 1
+
+    chapter = 0
+    for p, (dirname, count) in enumerate(zip(parts, per_part, strict=True), 1):
+        part_dir = content / dirname
+        (part_dir / "images").mkdir(parents=True)
+        intro = f"# Part {p}: {_sentence(rng).rstrip('.')[:40]} {{.part}}\n\n{_paragraph(rng)}\n"
+        (part_dir / "00-part-intro.md").write_text(intro, encoding="utf-8")
+        for n in range(1, count + 1):
+            chapter += 1
+            images = [f"fig-{chapter:02d}-{i + 1}.png" for i in range(spec.images)]
+            for i, name in enumerate(images):
+                (part_dir / "images" / name).write_bytes(placeholder_png(chapter * 100 + i))
+            markdown = chapter_markdown(f"Chapter {chapter}", spec, rng, images)
+            (part_dir / f"{n:02d}-chapter-{chapter:02d}.md").write_text(markdown, encoding="utf-8")
+
+
+def make_workspace(root: Path, spec: ManuscriptSpec) -> None:
+    """A scratch repository: build scripts and assets plus synthetic content."""
+    for rel in COPIED:
+        shutil.copytree(REPO_ROOT / rel, root / rel, ignore=shutil.ignore_patterns("__pycache__"))
+    for rel in LINKED:
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).symlink_to(REPO_ROOT / rel)
+    generate_content(root, spec)
+
+
+def install_fakes(bin_dir: Path, force: bool) -> list[str]:
+    """Put fake pandoc/xelatex on bin_dir for whichever tools are missing."""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    faked = []
+    for tool, template in (("pandoc", FAKE_PANDOC), ("xelatex", FAKE_XELATEX)):
+        if force or not shutil.which(tool):
+            path = bin_dir / tool
+            path.write_text(template.format(python=sys.executable, pdf=placeholder_pdf(4)))
+            path.chmod(0o755)
+            faked.append(tool)
+    return faked
+
+
+def load_build_pdf():
+    """Import build-pdf.py (hyphenated, so not importable by name)."""
+    spec = importlib.util.spec_from_file_location(
+        "build_pdf", REPO_ROOT / "scripts" / "build-pdf.py"
+    )
+    if spec is None or spec.loader is None:
+        raise ImportError("Cannot load build-pdf.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_size(spec: ManuscriptSpec, args: argparse.Namespace, build_pdf) -> list[BenchResult]:
+    label = f"{spec.chapters}ch"
+    wanted = [
+        case
+        for case in ("assemble", "epub-cold", "epub-warm", "pdf")
+        if not args.filter or args.filter in f"{case}[{label}]"
+    ]
+    if not wanted:
+        return []
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-build-") as tmp:
+        root = Path(tmp)
+        make_workspace(root, spec)
+        faked = install_fakes(root / "bin", args.fake_tools)
+        env = {**os.environ, "PATH": f"{root / 'bin'}{os.pathsep}{os.environ.get('PATH', '')}"}
+        env.pop("BUILD_TRACE", None)
+
+        manifest = scan(root / "content")
+        size_kb = sum(f.size for f in manifest.files) / 1024
+        fakes = f" (fake {', '.join(faked)})" if faked else ""
+        print(f"{spec.chapters} chapters: {len(manifest.files)} files, {size_kb:.0f} KB{fakes}")
+
+        documents = ParsedFiles({})
+        if "assemble" in wanted:
+            files = [f for f in manifest.files if f.kind != "part-intro"]
+            backend = SubprocessBackend(lambda _, cmd, **kw: subprocess.run(cmd, env=env, **kw))
+            parsed = backend.convert_many([Conversion(f.text, READER_OPTIONS) for f in files])
+            documents = ParsedFiles({f.path: doc for f, doc in zip(files, parsed, strict=True)})
+
+        def _assemble() -> int:
+            with contextlib.redirect_stdout(io.StringIO()):
+                blocks = build_pdf.assemble_blocks(manifest, documents)
+                return sum(len(chunk) for chunk in iter_dumps(blocks, documents.api_version))
+
+        epub = [sys.executable, "scripts/build-epub.py"]
+        pdf = [sys.executable, "scripts/build-pdf.py", "--variant", "print"]
+
+        def _clear_cache() -> None:
+            shutil.rmtree(root / "output" / ".cache", ignore_errors=True)
+
+        cases = {
+            "assemble": lambda: measure(f"assemble[{label}]", _assemble, min_time=args.min_time),
+            "epub-cold": lambda: time_command(
+                f"epub-cold[{label}]", epub, root, env, args.repeats, before=_clear_cache
+            ),
+            "epub-warm": lambda: time_command(f"epub-warm[{label}]", epub, root, env, args.repeats),
+            "pdf": lambda: time_command(f"pdf[{label}]", pdf, root, env, args.repeats),
+        }
+        for case in wanted:
+            result = cases[case]()
+            print(f"  {result.name:<20} {result.p50_ms:>10.1f} ms p50")
+            results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the book builds on synthetic content")
+    parser.add_argument(
+        "--chapters",
+        default=",".join(str(n) for n in DEFAULT_CHAPTERS),
+        help="Comma-separated chapter counts (default: 2,8,26)",
+    )
+    parser.add_argument("--code-blocks", type=int, default=2, help="Code blocks per chapter")
+    parser.add_argument("--tables", type=int, default=1, help="Tables per chapter")
+    parser.add_argument("--images", type=int, default=1, help="Images per chapter")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per build step (default: 3)")
+    parser.add_argument(
+        "--fake-tools",
+        action="store_true",
+        help="Use the fake pandoc and XeLaTeX even if the real ones are installed",
+    )
+    add_arguments(parser, BASELINE_FILE)
+    args = parser.parse_args()
+
+    build_pdf = load_build_pdf()
+    results = []
+    for chapters in (int(n) for n in args.chapters.split(",")):
+        spec = ManuscriptSpec(chapters, args.code_blocks, args.tables, args.images)
+        try:
+            results.extend(run_size(spec, args, build_pdf))
+        except RuntimeError as exc:
+            print(f"ERROR: {textwrap.shorten(str(exc), 2000)}")
+            sys.exit(1)
+
+    finish(args, results)
+
+
+if __name__ == "__main__":
+    main()
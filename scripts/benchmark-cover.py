@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Benchmark the cover build, including the 300-dpi full-wrap cover.
+
+Runs build-cover.py with --force in a scratch copy of the scripts and
+cover sources, so output/ is left alone, and times:
+
+  covers        the three cover PNGs
+  wrap[Ndpi]    the covers plus the full-wrap PDF (converted to CMYK)
+                and PNG, for a PAGES-page interior at N dpi
+
+"peak KB" is the build's peak RSS, which includes the rsvg-convert and
+Ghostscript runs it waits for. Besides the relative check against
+benchmarks/cover-baseline.json, --check fails any case whose peak RSS
+exceeds --max-peak-mb: the wrap is rendered straight from SVG, so its
+memory should stay near one raster of the wrap.
+
+When rsvg-convert or Ghostscript is not installed, a local fake that
+copies its input is put on PATH. Results from fakes measure the build
+script, not rendering, and are labelled as such.
+
+Usage:
+  python scripts/benchmark-cover.py [--dpi 300] [--pages N] [--repeats N]
+                                    [--max-peak-mb MB] [--fake-tools]
+                                    [--save-baseline] [--check] [--history FILE]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import textwrap
+from pathlib import Path
+
+from benchmark_harness import add_arguments, finish, time_command
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BASELINE_FILE = REPO_ROOT / "benchmarks" / "cover-baseline.json"
+
+COPIED = ["scripts", "assets/cover", ".brandmcp/brand"]
+
+DEFAULT_DPI = 300
+DEFAULT_PAGES = 400  # A one-inch spine at the tokens.json caliper
+DEFAULT_MAX_PEAK_MB = 512
+
+FAKE_RSVG_CONVERT = '''\
+#!{python}
+"""Benchmark stand-in for rsvg-convert: writes the SVG it is given."""
+import sys
+
+args = sys.argv[1:]
+if "--version" in args:
+    print("rsvg-convert version 2.58 (benchmark fake)")
+    sys.exit(0)
+with open(args[args.index("-o") + 1], "wb") as f:
+    f.write(sys.stdin.buffer.read())
+'''
+
+FAKE_GS = '''\
+#!{python}
+"""Benchmark stand-in for Ghostscript: copies the input PDF."""
+import shutil
+import sys
+
+args = sys.argv[1:]
+output = next(a for a in args if a.startswith("-sOutputFile="))
+shutil.copyfile(args[-1], output.removeprefix("-sOutputFile="))
+'''
+
+
+def make_workspace(root: Path) -> None:
+    """A scratch repository holding what build-cover.py reads."""
+    for rel in COPIED:
+        shutil.copytree(REPO_ROOT / rel, root / rel, ignore=shutil.ignore_patterns("__pycache__"))
+
+
+def install_fakes(bin_dir: Path, force: bool) -> list[str]:
+    """Put fake rsvg-convert/gs on bin_dir for whichever tools are missing."""
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    faked = []
+    for tool, template in (("rsvg-convert", FAKE_RSVG_CONVERT), ("gs", FAKE_GS)):
+        if force or not shutil.which(tool):
+            path = bin_dir / tool
+            path.write_text(template.format(python=sys.executable))
+            path.chmod(0o755)
+            faked.append(tool)
+    return faked
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cover and full-wrap builds")
+    parser.add_argument(
+        "--dpi", type=int, default=DEFAULT_DPI, help=f"Wrap PNG resolution (default: {DEFAULT_DPI})"
+    )
+    parser.add_argument(
+        "--pages",
+        type=int,
+        default=DEFAULT_PAGES,
+        help=f"Interior page count for the spine (default: {DEFAULT_PAGES})",
+    )
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per case (default: 3)")
+    parser.add_argument(
+        "--max-peak-mb",
+        type=float,
+        default=DEFAULT_MAX_PEAK_MB,
+        help=f"Peak RSS --check allows any case (default: {DEFAULT_MAX_PEAK_MB})",
+    )
+    parser.add_argument(
+        "--fake-tools",
+        action="store_true",
+        help="Use the fake rsvg-convert and gs even if the real ones are installed",
+    )
+    add_arguments(parser, BASELINE_FILE)
+    args = parser.parse_args()
+
+    build = [sys.executable, "scripts/build-cover.py", "--force"]
+    cases = [
+        ("covers", build),
+        (f"wrap[{args.dpi}dpi]", [*build, "--wrap", f"--pages={args.pages}", f"--dpi={args.dpi}"]),
+    ]
+    cases = [(name, cmd) for name, cmd in cases if not args.filter or args.filter in name]
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-cover-") as tmp:
+        root = Path(tmp)
+        make_workspace(root)
+        faked = install_fakes(root / "bin", args.fake_tools)
+        env = {**os.environ, "PATH": f"{root / 'bin'}{os.pathsep}{os.environ.get('PATH', '')}"}
+        env.pop("BUILD_TRACE", None)
+        if faked:
+            print(f"Fake {', '.join(faked)}")
+
+        for name, cmd in cases:
+            try:
+                result = time_command(name, cmd, root, env, args.repeats)
+            except RuntimeError as exc:
+                print(f"ERROR: {textwrap.shorten(str(exc), 2000)}")
+                sys.exit(1)
+            print(f"  {result.name:<14} {result.p50_ms:>10.1f} ms p50")
+            results.append(result)
+
+    finish(args, results, peak_limit_kb=args.max_peak_mb * 1024)
+
+
+if __name__ == "__main__":
+    main()
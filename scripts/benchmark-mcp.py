@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""Benchmark the MCP servers' discovery and validation paths.
+
+Loads .specmcp/server.py and .brandmcp/server.py directly (no MCP
+transport) and times:
+
+  discover_specs, load_spec, get_chapter_context   against the spec tree
+  the same three with @snapshot, plus open_snapshot  against a packed
+                                                   snapshot of the tree
+  validate_content, validate_brand, _strip_code_blocks   against a document
+
+at 1x, 10x and 100x the current corpus. Scaled corpora are generated
+deterministically in a temporary directory: the spec tree gains N-1
+renamed, lightly varied copies of every spec and provenance file, and
+the document is the manuscript repeated N times with seeded trigger
+lines (banned words, hex colours, code blocks, 'color') mixed in.
+
+Results are compared with benchmarks/mcp-baseline.json.
+
+Usage:
+  python scripts/benchmark-mcp.py [--scales 1,10,100] [--filter NAME]
+                                  [--min-time SECONDS] [--save-baseline]
+                                  [--check] [--threshold 0.5]
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from types import ModuleType
+
+from benchmark_harness import BenchResult, add_arguments, finish, measure
+from book_content import load_manifest
+from mcp_snapshot import Snapshot, pack
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SPEC_SERVER = REPO_ROOT / ".specmcp" / "server.py"
+BRAND_SERVER = REPO_ROOT / ".brandmcp" / "server.py"
+BASELINE_FILE = REPO_ROOT / "benchmarks" / "mcp-baseline.json"
+
+DEFAULT_SCALES = [1, 10, 100]
+SEED = 2024
+
+# Lines mixed into the scaled document so every validator has work to do
+TRIGGER_LINES = [
+    "We leverage the spec to utilize a robust, seamless workflow.",
+    "The header color is #FF00FF, not a brand colour.",
+    "Set the body in Comic Sans MS for a very friendly tone.",
+    "In order to ship, the team had to optimize the review loop.",
+    "```python\nprint('color #123456 is code, not prose')\n```",
+    "Inline `fill: #ABCDEF` stays out of the prose check.",
+    "What if the specification were the product?",
+]
+
+
+def load_server(path: Path, name: str) -> ModuleType:
+    """Import a server.py by path without running its stdio transport."""
+    spec = importlib.util.spec_from_file_location(name, path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module  # dataclasses resolves annotations through sys.modules
+    # Servers import their rule modules from their own directory
+    sys.path.insert(0, str(path.parent))
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_spec_tree(source: Path, dest: Path, scale: int) -> None:
+    """Copy the spec tree, adding scale-1 varied copies of every file."""
+    shutil.copytree(source, dest)
+    rng = random.Random(SEED)
+    for path in sorted(source.rglob("*.md")):
+        text = path.read_text(encoding="utf-8")
+        parent = dest / path.parent.relative_to(source)
+        stem, provenance = path.stem.removesuffix(".provenance"), path.stem.endswith(".provenance")
+        for copy in range(1, scale):
+            name = f"{stem}-x{copy:03d}" + (".provenance" if provenance else "")
+            note = rng.choice(TRIGGER_LINES)
+            (parent / f"{name}.md").write_text(f"{text}\n\n{note}\n", encoding="utf-8")
+
+
+def build_document(scale: int) -> str:
+    """The manuscript repeated scale times, with seeded trigger lines."""
+    rng = random.Random(SEED)
+    base = [f.text for f in load_manifest(cache=None).files]
+    parts = []
+    for _ in range(scale):
+        for text in base:
+            lines = text.splitlines()
+            for _ in range(max(1, len(lines) // 20)):
+                lines.insert(rng.randrange(len(lines) + 1), rng.choice(TRIGGER_LINES))
+            parts.append("\n".join(lines))
+    return "\n\n".join(parts)
+
+
+def run_scale(
+    specs: ModuleType, brand: ModuleType, scale: int, args: argparse.Namespace
+) -> list[BenchResult]:
+    cases = [
+        ("discover_specs", lambda: specs.discover_specs()),
+        ("load_spec", lambda: specs.load_spec("writers-guide")),
+        ("get_chapter_context", lambda: specs.get_chapter_context(1)),
+        ("validate_content", lambda: specs.validate_content(document)),
+        ("validate_brand", lambda: brand.validate_brand(document)),
+        ("_strip_code_blocks", lambda: brand._strip_code_blocks(document)),
+        ("open_snapshot", lambda: Snapshot(snapshot_file, specs.SNAPSHOT_ROOT).close()),
+        # Served from the packed snapshot (specs._snapshot is set for these)
+        ("discover_specs@snapshot", lambda: specs.discover_specs()),
+        ("load_spec@snapshot", lambda: specs.load_spec("writers-guide")),
+        ("get_chapter_context@snapshot", lambda: specs.get_chapter_context(1)),
+    ]
+    selected = [(f"{name}[{scale}x]", fn) for name, fn in cases]
+    selected = [(name, fn) for name, fn in selected if not args.filter or args.filter in name]
+    if not selected:
+        return []
+
+    document = build_document(scale)
+    original_specs_dir = specs.SPECS_DIR
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-specs-") as tmp:
+        specs.SPECS_DIR = Path(tmp) / "specs"
+        build_spec_tree(original_specs_dir, specs.SPECS_DIR, scale)
+        spec_count = sum(1 for _ in specs.SPECS_DIR.rglob("*.md"))
+        print(f"Scale {scale}x: {spec_count} spec files, {len(document) / 1024:.0f} KB document")
+        snapshot_file = Path(tmp) / "snapshot.sqlite"
+        pack({specs.SNAPSHOT_ROOT: specs.SPECS_DIR}, snapshot_file)
+        snapshot = Snapshot(snapshot_file, specs.SNAPSHOT_ROOT)
+        try:
+            for name, fn in selected:
+                specs._snapshot = snapshot if "@snapshot" in name else None
+                result = measure(name, fn, min_time=args.min_time)
+                print(f"  {name:<36} {result.p50_ms:>9.3f} ms p50")
+                results.append(result)
+        finally:
+            specs.SPECS_DIR = original_specs_dir
+            specs._snapshot = None
+            snapshot.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the MCP validators and discovery")
+    parser.add_argument(
+        "--scales",
+        default=",".join(str(s) for s in DEFAULT_SCALES),
+        help="Comma-separated corpus multipliers (default: 1,10,100)",
+    )
+    add_arguments(parser, BASELINE_FILE)
+    args = parser.parse_args()
+
+    # Slow-call warnings would flood stderr at 100x; server_stats is not used here
+    os.environ.setdefault("MCP_SLOW_CALL_MS", "inf")
+    try:
+        specs = load_server(SPEC_SERVER, "specmcp_server")
+        brand = load_server(BRAND_SERVER, "brandmcp_server")
+    except ImportError as exc:
+        print(f"Error: {exc}. Install the server requirements (pip install 'mcp>=1.2.0').")
+        sys.exit(1)
+
+    results = []
+    for scale in (int(s) for s in args.scales.split(",")):
+        results.extend(run_scale(specs, brand, scale, args))
+
+    finish(args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Benchmark per-conversion pandoc overhead: subprocesses vs a pandoc server.
+
+Times the EPUB chapter conversion (markdown to an XHTML fragment) through
+both backends in scripts/pandoc_backend.py:
+
+  overhead   an empty document: pure process start-up or request cost
+  chapter    the longest manuscript file, one conversion
+  book       every manuscript file: a thread pool of processes, or one
+             server /batch request
+
+Server cases run only when a pandoc server answers at --server
+($PANDOC_SERVER, default http://127.0.0.1:3030); start one with
+`pandoc server`. Results are compared with benchmarks/pandoc-baseline.json.
+
+Usage:
+  python scripts/benchmark-pandoc.py [--server URL] [--filter NAME]
+                                     [--min-time SECONDS] [--save-baseline] [--check]
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+from benchmark_harness import add_arguments, finish, measure
+from book_content import load_manifest
+from pandoc_backend import (
+    DEFAULT_SERVER_URL,
+    SERVER_ENV,
+    Conversion,
+    ServerBackend,
+    SubprocessBackend,
+)
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BASELINE_FILE = REPO_ROOT / "benchmarks" / "pandoc-baseline.json"
+
+# The EPUB build's per-chapter conversion
+OPTIONS = {"from": "markdown", "to": "html5", "wrap": "none"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pandoc subprocesses vs server")
+    parser.add_argument(
+        "--server",
+        default=os.environ.get(SERVER_ENV, DEFAULT_SERVER_URL),
+        help="pandoc server URL (default: $PANDOC_SERVER or %(default)s)",
+    )
+    add_arguments(parser, BASELINE_FILE)
+    args = parser.parse_args()
+
+    texts = [f.text for f in load_manifest(cache=None).files]
+    empty = [Conversion("", OPTIONS)]
+    chapter = [Conversion(max(texts, key=len), OPTIONS)]
+    book = [Conversion(text, OPTIONS) for text in texts]
+
+    backends = [SubprocessBackend()]
+    server = ServerBackend(args.server)
+    if server.available():
+        backends.append(server)
+    else:
+        print(f"No pandoc server at {args.server}; timing subprocesses only.")
+        print("Start one with `pandoc server` to compare.\n")
+
+    cases = []
+    for backend in backends:
+        for name, conversions in (("overhead", empty), ("chapter", chapter), ("book", book)):
+            cases.append(
+                (f"{name}/{backend.name}", lambda b=backend, c=conversions: b.convert_many(c))
+            )
+
+    results = [
+        measure(name, fn, min_time=args.min_time)
+        for name, fn in cases
+        if not args.filter or args.filter in name
+    ]
+
+    by_name = {r.name: r for r in results}
+    print("Per-conversion cost (p50):")
+    for backend in backends:
+        overhead = by_name.get(f"overhead/{backend.name}")
+        whole = by_name.get(f"book/{backend.name}")
+        if overhead:
+            print(f"  {backend.name:<10} overhead {overhead.p50_ms:>8.2f} ms", end="")
+            if whole:
+                print(f"   book {whole.p50_ms / len(book):>8.2f} ms/file", end="")
+            print()
+
+    finish(args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Microbenchmark for escape_latex.
+
+Compares the present-character plan in text_transform.py with the
+sixteen sequential str.replace() passes it replaced, and with a
+str.translate() table (the obvious single-pass alternative, slower on
+CPython), on:
+
+  title       one part title per call (uncached: its first escape)
+  index       every index entry's display name in the manuscript, one
+              call each, as book_index.index_command makes them
+  chapter     the longest manuscript file
+  book10      the whole manuscript repeated ten times
+  fields1000  1,000 glossary-style fields: one call each, or one many() call
+
+Results are compared with benchmarks/text-baseline.json.
+
+Usage:
+  python scripts/benchmark-text.py [--filter NAME] [--min-time SECONDS]
+                                   [--save-baseline] [--check]
+"""
+
+import argparse
+from pathlib import Path
+
+from benchmark_harness import add_arguments, finish, measure
+from book_content import load_manifest
+from book_index import load_matcher
+from text_transform import LATEX_ESCAPE, escape_latex
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BASELINE_FILE = REPO_ROOT / "benchmarks" / "text-baseline.json"
+
+
+def escape_latex_replace(text: str) -> str:
+    """The previous implementation, kept as the comparison point."""
+    for old, new in [
+        ("\\", r"\textbackslash{}"),
+        ("&", r"\&"),
+        ("%", r"\%"),
+        ("$", r"\$"),
+        ("#", r"\#"),
+        ("_", r"\_"),
+        ("{", r"\{"),
+        ("}", r"\}"),
+        ("~", r"\textasciitilde{}"),
+        ("^", r"\textasciicircum{}"),
+    ]:
+        text = text.replace(old, new)
+    text = text.replace("—", "---")
+    text = text.replace("–", "--")
+    text = text.replace("‘", "`")
+    text = text.replace("’", "'")
+    text = text.replace("“", "``")
+    text = text.replace("”", "''")
+    return text
+
+
+_TRANSLATE_TABLE = str.maketrans(LATEX_ESCAPE.mapping)
+
+
+def escape_latex_translate(text: str) -> str:
+    return text.translate(_TRANSLATE_TABLE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark escape_latex implementations")
+    add_arguments(parser, BASELINE_FILE)
+    args = parser.parse_args()
+
+    texts = [f.text for f in load_manifest(cache=None).files]
+    title = "Spec-Driven Development: R&D — 100% of the “Dark Factory”"
+    chapter = max(texts, key=len)
+    book = "\n\n".join(texts) * 10
+    fields = [f"{t.splitlines()[0]} — entry {i} costs $5 & 10%" for i, t in enumerate(texts * 200)]
+    fields = fields[:1000]
+    matcher = load_matcher()
+    names = [name for text in texts for _, _, name in matcher.find(text)] if matcher else []
+
+    # The old version escaped the braces of its own \textbackslash{}; with
+    # no backslashes in the input both must agree exactly.
+    for sample in (title, chapter, book):
+        clean = sample.replace("\\", "")
+        assert escape_latex(clean) == escape_latex_replace(clean) == escape_latex_translate(clean)
+
+    cases = [
+        ("title/replace", lambda: escape_latex_replace(title)),
+        ("title/translate", lambda: escape_latex_translate(title)),
+        ("title/transform", lambda: escape_latex(title)),
+        ("title/uncached", lambda: LATEX_ESCAPE._substitute(title)),
+        ("index/replace", lambda: [escape_latex_replace(name) for name in names]),
+        ("index/transform", lambda: [escape_latex(name) for name in names]),
+        ("chapter/replace", lambda: escape_latex_replace(chapter)),
+        ("chapter/translate", lambda: escape_latex_translate(chapter)),
+        ("chapter/transform", lambda: escape_latex(chapter)),
+        ("book10/replace", lambda: escape_latex_replace(book)),
+        ("book10/translate", lambda: escape_latex_translate(book)),
+        ("book10/transform", lambda: escape_latex(book)),
+        ("fields1000/replace", lambda: [escape_latex_replace(f) for f in fields]),
+        ("fields1000/transform", lambda: [escape_latex(f) for f in fields]),
+        ("fields1000/many", lambda: LATEX_ESCAPE.many(fields)),
+    ]
+
+    results = [
+        measure(name, fn, min_time=args.min_time)
+        for name, fn in cases
+        if not args.filter or args.filter in name
+    ]
+
+    by_name = {r.name: r for r in results}
+    print("Speedup over sequential replace (p50):")
+    for name in ("title", "index", "chapter", "book10", "fields1000"):
+        old = by_name.get(f"{name}/replace")
+        for variant in ("translate", "transform", "uncached", "many"):
+            new = by_name.get(f"{name}/{variant}")
+            if old and new and new.p50_ms:
+                print(f"  {name + '/' + variant:<22} {old.p50_ms / new.p50_ms:>6.1f}x")
+
+    finish(args, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""Shared timing harness for the benchmark scripts.
+
+Runs each case repeatedly for a minimum time, then reports throughput,
+p50/p99 latency and the peak Python allocation of a single call
+(measured in a separate tracemalloc run so tracing does not skew the
+timings). Results can be saved as a baseline JSON file and later runs
+checked against it with a relative regression threshold, or appended
+with the current commit to a JSON Lines history file for tracking
+trends across commits. time_command times a whole script instead, with
+the child's peak RSS as its peak memory; a benchmark can also set an
+absolute peak limit that --check enforces.
+
+Timings depend on the machine: regenerate the baseline with
+--save-baseline when moving to different hardware.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from build_trace import Tracer
+
+DEFAULT_THRESHOLD = 0.5
+
+
+@dataclass
+class BenchResult:
+    """Timing and memory figures for one benchmark case."""
+
+    name: str
+    iterations: int
+    ops_per_sec: float
+    p50_ms: float
+    p99_ms: float
+    peak_kb: float
+
+
+def percentile(sorted_samples: list[int], q: float) -> int:
+    """Nearest-rank percentile of pre-sorted samples."""
+    index = min(len(sorted_samples) - 1, max(0, round(q * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+
+def measure(
+    name: str,
+    fn: Callable[[], object],
+    min_time: float = 0.5,
+    min_iterations: int = 5,
+    max_iterations: int = 100_000,
+) -> BenchResult:
+    """Time fn() until both min_time and min_iterations are reached."""
+    fn()  # Warm caches and imports
+
+    samples: list[int] = []
+    start = time.perf_counter()
+    while len(samples) < max_iterations and (
+        len(samples) < min_iterations or time.perf_counter() - start < min_time
+    ):
+        t0 = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - t0)
+    total_ns = sum(samples)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    samples.sort()
+    return BenchResult(
+        name=name,
+        iterations=len(samples),
+        ops_per_sec=len(samples) / (total_ns / 1e9) if total_ns else 0.0,
+        p50_ms=percentile(samples, 0.50) / 1e6,
+        p99_ms=percentile(samples, 0.99) / 1e6,
+        peak_kb=peak / 1024,
+    )
+
+
+def time_command(
+    name: str,
+    cmd: list[str],
+    cwd: Path,
+    env: dict[str, str],
+    repeats: int,
+    before: Callable[[], object] | None = None,
+) -> BenchResult:
+    """Run cmd `repeats` times (calling before() ahead of each run).
+
+    Peak KB is the child's peak RSS, which includes the processes it
+    waited for. Raises RuntimeError if a run fails.
+    """
+    tracer = Tracer(name)
+    samples: list[int] = []
+    peak_kb = 0
+    for _ in range(repeats):
+        if before:
+            before()
+        start = time.perf_counter_ns()
+        result = tracer.run(name, cmd, cwd=cwd, env=env, capture_output=True, text=True)
+        samples.append(time.perf_counter_ns() - start)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(cmd)} failed:\n{result.stdout}{result.stderr}")
+        peak_kb = max(peak_kb, tracer.events[-1]["args"]["max_rss_kb"])
+
+    samples.sort()
+    return BenchResult(
+        name=name,
+        iterations=repeats,
+        ops_per_sec=repeats / (sum(samples) / 1e9),
+        p50_ms=percentile(samples, 0.50) / 1e6,
+        p99_ms=percentile(samples, 0.99) / 1e6,
+        peak_kb=float(peak_kb),
+    )
+
+
+def load_baseline(path: Path) -> dict[str, dict]:
+    """Baseline results keyed by case name ({} if the file does not exist)."""
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8")).get("results", {})
+
+
+def save_baseline(path: Path, results: list[BenchResult]) -> None:
+    data = {
+        "environment": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "system": platform.system(),
+        },
+        "results": {r.name: asdict(r) for r in results},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+
+def append_history(path: Path, results: list[BenchResult]) -> None:
+    """Append one JSON line of results, tagged with the current commit."""
+    commit = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+    ).stdout.strip()
+    record = {"commit": commit or None, "results": {r.name: asdict(r) for r in results}}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def find_regressions(
+    results: list[BenchResult], baseline: dict[str, dict], threshold: float
+) -> list[str]:
+    """Cases whose p50 latency or peak memory grew by more than threshold."""
+    regressions = []
+    for r in results:
+        base = baseline.get(r.name)
+        if not base:
+            continue
+        for metric in ("p50_ms", "peak_kb"):
+            old, new = base[metric], getattr(r, metric)
+            if old > 0 and new > old * (1 + threshold):
+                regressions.append(
+                    f"{r.name}: {metric} {old:.3f} -> {new:.3f} (+{new / old - 1:.0%})"
+                )
+    return regressions
+
+
+def find_over_limit(results: list[BenchResult], peak_limit_kb: float) -> list[str]:
+    """Cases whose peak memory exceeded an absolute limit."""
+    return [
+        f"{r.name}: peak_kb {r.peak_kb:.0f} over the {peak_limit_kb:.0f} KB limit"
+        for r in results
+        if r.peak_kb > peak_limit_kb
+    ]
+
+
+def print_results(results: list[BenchResult], baseline: dict[str, dict]) -> None:
+    width = max((len(r.name) for r in results), default=10)
+    header = f"  {'case':<{width}} {'ops/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'peak KB':>9}"
+    print(f"{header} {'vs base':>8}" if baseline else header)
+    for r in results:
+        line = (
+            f"  {r.name:<{width}} {r.ops_per_sec:>10.1f} {r.p50_ms:>9.3f}"
+            f" {r.p99_ms:>9.3f} {r.peak_kb:>9.1f}"
+        )
+        base = baseline.get(r.name)
+        if base and base["p50_ms"] > 0:
+            line += f" {r.p50_ms / base['p50_ms'] - 1:>+8.0%}"
+        print(line)
+
+
+def add_arguments(parser: argparse.ArgumentParser, default_baseline: Path) -> None:
+    """Options shared by every benchmark script."""
+    parser.add_argument("--filter", help="Only run cases whose name contains this text")
+    parser.add_argument(
+        "--min-time", type=float, default=0.5, help="Seconds to run each case (default: 0.5)"
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=default_baseline,
+        help=f"Baseline file (default: {default_baseline.name})",
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Write these results as the new baseline"
+    )
+    parser.add_argument("--check", action="store_true", help="Exit non-zero if any case regressed")
+    parser.add_argument(
+        "--history", type=Path, help="Append results with the current commit to this JSONL file"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Allowed relative slowdown for --check (default: {DEFAULT_THRESHOLD})",
+    )
+
+
+def finish(
+    args: argparse.Namespace, results: list[BenchResult], peak_limit_kb: float | None = None
+) -> None:
+    """Print results, then save or check the baseline as requested.
+
+    With peak_limit_kb, --check also fails any case whose peak memory
+    exceeded it, whatever the baseline says.
+    """
+    baseline = load_baseline(args.baseline)
+    print()
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"\nBaseline written: {args.baseline}")
+
+    if args.history:
+        append_history(args.history, results)
+        print(f"\nHistory appended: {args.history}")
+
+    if args.check:
+        if not baseline:
+            print(f"\nERROR: no baseline at {args.baseline}. Run with --save-baseline first.")
+            sys.exit(1)
+        regressions = find_regressions(results, baseline, args.threshold)
+        if peak_limit_kb is not None:
+            regressions.extend(find_over_limit(results, peak_limit_kb))
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%} or the limits:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}.")
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""Parse-once pandoc AST cache shared by the EPUB and PDF builds.
+
+Each content file is parsed by pandoc's markdown reader once, into
+pandoc's JSON AST, and cached in output/.cache/ast/ by a hash of the
+pandoc version, reader options and file text. Both builds load the
+cached ASTs and do their own structural work as Python transforms on
+them (part and mainmatter markers, build info, image variants) before
+handing the result to a pandoc writer with --from=json, so a full
+multi-format build reads each markdown file exactly once.
+
+Uncached files are parsed together through scripts/pandoc_backend.py,
+so a running pandoc server gets them as one batch.
+
+Usage:
+  python scripts/book_ast.py [--refresh]     # parse content/ ahead of the builds
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from pathlib import Path
+
+from book_content import OUTPUT_DIR, ContentFile, load_manifest
+from pandoc_backend import Conversion, get_backend
+
+CACHE_DIR = OUTPUT_DIR / ".cache" / "ast"
+
+# The reader both builds used before parsing was shared
+READER_OPTIONS = {"from": "markdown", "to": "json"}
+
+Element = dict
+Document = dict
+
+_HTML_IMG_SRC_PATTERN = re.compile(r'(<img\b[^>]*\bsrc=")([^"]+)(")')
+
+# Parsed documents this process has loaded, as JSON text so callers can
+# transform their own copies
+_parsed: dict[str, str] = {}
+
+
+def cache_path_for(text: str, version: str) -> Path:
+    """Cache location for a file text's AST."""
+    key = [version, *Conversion("", READER_OPTIONS).to_args(), text]
+    return CACHE_DIR / f"{hashlib.sha256(chr(0).join(key).encode('utf-8')).hexdigest()}.json"
+
+
+class ParsedFiles(Mapping[Path, Document]):
+    """Parsed ASTs by content file path, decoded from JSON text on lookup.
+
+    Every lookup returns a fresh copy, so transforms may modify it, and
+    only the documents a caller is working on are held as Python objects.
+    """
+
+    def __init__(self, texts: dict[Path, str], keys: dict[Path, str] | None = None):
+        self._texts = texts
+        self._keys = keys or {}
+
+    def __getitem__(self, path: Path) -> Document:
+        return json.loads(self._texts[path])
+
+    def __iter__(self) -> Iterator[Path]:
+        return iter(self._texts)
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def key(self, path: Path) -> str:
+        """A stable identifier for a file's AST, for caches derived from it."""
+        if path not in self._keys:
+            self._keys[path] = hashlib.sha256(self._texts[path].encode("utf-8")).hexdigest()
+        return self._keys[path]
+
+    @property
+    def api_version(self) -> list[int] | None:
+        """The pandoc AST API version the documents were parsed with."""
+        return self[next(iter(self))]["pandoc-api-version"] if self._texts else None
+
+
+def parse_files(files: list[ContentFile], backend=None) -> list[Document]:
+    """ASTs for files, parsing only those not already cached.
+
+    Each call returns fresh copies, so transforms may modify them.
+    """
+    parsed = parse_lazily(files, backend)
+    return [parsed[f.path] for f in files]
+
+
+def parse_lazily(files: list[ContentFile], backend=None) -> ParsedFiles:
+    """parse_files, decoding each AST only when it is looked up."""
+    backend = backend or get_backend("auto")
+    version = backend.version()
+    paths = [cache_path_for(f.text, version) for f in files]
+
+    missing = []
+    for f, path in zip(files, paths, strict=True):
+        if path.name in _parsed:
+            continue
+        if path.exists():
+            _parsed[path.name] = path.read_text(encoding="utf-8")
+        else:
+            missing.append((f, path))
+
+    if missing:
+        outputs = backend.convert_many([Conversion(f.text, READER_OPTIONS) for f, _ in missing])
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for (_, path), output in zip(missing, outputs, strict=True):
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(output, encoding="utf-8")
+            tmp_path.replace(path)
+            _parsed[path.name] = output
+
+    pairs = list(zip(files, paths, strict=True))
+    return ParsedFiles(
+        {f.path: _parsed[path.name] for f, path in pairs}, {f.path: path.stem for f, path in pairs}
+    )
+
+
+def prune_cache(files: list[ContentFile], version: str) -> None:
+    """Drop cached ASTs, loaded and on disk, for texts not among files.
+
+    Pass the whole manifest's files: the builds each parse only some of
+    them, and share the cache.
+    """
+    keep = {cache_path_for(f.text, version).name for f in files}
+    for name in _parsed.keys() - keep:
+        del _parsed[name]
+    if not CACHE_DIR.exists():
+        return
+    for path in CACHE_DIR.glob("*.json"):
+        if path.name not in keep:
+            path.unlink(missing_ok=True)
+
+
+# === Building and walking the AST ===
+
+
+# Elements with nothing under them worth visiting; most of any document
+_TEXT_ELEMENTS = frozenset({"Str", "Space", "SoftBreak", "LineBreak"})
+
+
+def elements(node, skip: Iterable[str] = ()) -> Iterator[Element]:
+    """Every AST element ({"t": ...}) under node in document order, except
+    plain text (Str, Space and breaks) and elements of the types in skip,
+    with everything inside them.
+
+    Iterative, and skipping text, so walking a chapter costs a fraction
+    of a recursive walk over every node.
+    """
+    skipped = _TEXT_ELEMENTS.union(skip)
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if type(node) is list:
+            stack.extend(reversed(node))
+        elif type(node) is dict:
+            kind = node.get("t")
+            if kind in skipped:
+                continue
+            if kind is not None:
+                yield node
+            children = node.get("c", node.get("blocks"))
+            if type(children) is list:
+                stack.append(children)
+
+
+def inlines(text: str) -> list[Element]:
+    """Plain text as Str and Space inlines."""
+    result: list[Element] = []
+    for word in text.split():
+        if result:
+            result.append({"t": "Space"})
+        result.append({"t": "Str", "c": word})
+    return result
+
+
+def code(text: str) -> Element:
+    return {"t": "Code", "c": [["", [], []], text]}
+
+
+def raw_block(fmt: str, text: str) -> Element:
+    return {"t": "RawBlock", "c": [fmt, text]}
+
+
+def dumps(doc: Document) -> str:
+    """Serialize a document for --from=json (compact, key order kept)."""
+    return json.dumps(doc, ensure_ascii=False, separators=(",", ":"))
+
+
+def iter_dumps(blocks: Iterable[Element], api_version: list[int]) -> Iterator[str]:
+    """Serialize a document block by block as blocks yields them.
+
+    Concatenated, the chunks are what dumps() returns for the same
+    document, so a writer can stream it to pandoc's stdin without
+    holding the whole document or its text.
+    """
+    yield f'{{"pandoc-api-version":{dumps(api_version)},"meta":{{}},"blocks":['
+    separator = ""
+    for block in blocks:
+        yield separator + dumps(block)
+        separator = ","
+    yield "]}"
+
+
+# === Transforms ===
+
+
+def append_build_info(doc: Document, git_hash: str | None, build_date: str | None) -> None:
+    """Append a rule and "Build `hash` · date" (the copyright page's build line)."""
+    parts: list[list[Element]] = []
+    if git_hash:
+        parts.append([{"t": "Str", "c": "Build"}, {"t": "Space"}, code(git_hash)])
+    if build_date:
+        parts.append(inlines(build_date))
+    line: list[Element] = []
+    for part in parts:
+        if line:
+            line.extend([{"t": "Space"}, {"t": "Str", "c": "·"}, {"t": "Space"}])
+        line.extend(part)
+    doc["blocks"].extend([{"t": "HorizontalRule"}, {"t": "Para", "c": line}])
+
+
+def rewrite_images(doc: Document, rewrite: Callable[[str], str | None]) -> None:
+    """Point image targets at rewrite(src) wherever it returns a new path.
+
+    Covers markdown images and <img src> in raw HTML.
+    """
+
+    def _raw(match: re.Match) -> str:
+        new = rewrite(match.group(2))
+        return match.group(0) if new is None else f"{match.group(1)}{new}{match.group(3)}"
+
+    for element in elements(doc["blocks"]):
+        if element["t"] == "Image":
+            target = element["c"][2]
+            target[0] = rewrite(target[0]) or target[0]
+        elif element["t"] in ("RawBlock", "RawInline") and element["c"][0] == "html":
+            element["c"][1] = _HTML_IMG_SRC_PATTERN.sub(_raw, element["c"][1])
+
+
+def header_identifiers(doc: Document) -> list[str]:
+    """The document's header identifiers, in order (headers without one are skipped)."""
+    return [e["c"][1][0] for e in elements(doc["blocks"]) if e["t"] == "Header" and e["c"][1][0]]
+
+
+def unique_identifier(identifier: str, seen: set[str]) -> str:
+    """identifier, numbered -1, -2, ... past those in seen, which it is added to."""
+    unique, n = identifier, 0
+    while unique in seen:
+        n += 1
+        unique = f"{identifier}-{n}"
+    seen.add(unique)
+    return unique
+
+
+def dedupe_identifiers(doc: Document, seen: set[str] | None = None) -> None:
+    """Number repeated header identifiers the way pandoc does in one document.
+
+    Files are parsed separately, so two files with the same heading both
+    get the same identifier; the second becomes id-1, the third id-2.
+    Pass the same seen set for each file of a book assembled file by file.
+    """
+    seen = set() if seen is None else seen
+    for element in elements(doc["blocks"]):
+        if element["t"] != "Header" or not element["c"][1][0]:
+            continue
+        attr = element["c"][1]
+        attr[0] = unique_identifier(attr[0], seen)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse content/ into the shared AST cache")
+    parser.add_argument("--refresh", action="store_true", help="Re-parse every file")
+    args = parser.parse_args()
+
+    manifest = load_manifest()
+    backend = get_backend("auto")
+    version = backend.version()
+    if args.refresh:
+        for f in manifest.files:
+            cache_path_for(f.text, version).unlink(missing_ok=True)
+    cached = sum(1 for f in manifest.files if cache_path_for(f.text, version).exists())
+    parse_files(manifest.files, backend)
+    prune_cache(manifest.files, version)
+    print(
+        f"{len(manifest.files)} files: {len(manifest.files) - cached} parsed "
+        f"({backend.name}), {cached} cached -> {CACHE_DIR}"
+    )
+
+
+if __name__ == "__main__":
+    main()
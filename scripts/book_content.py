@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Shared content model for the book builds.
+
+Scans content/ once in book order, reads each file once, and parses it
+into a typed manifest: which section it belongs to, whether it is front
+matter, a part intro, a chapter or back matter, its heading and classes,
+and the part it sits in. The PDF and EPUB builds (and the linters) load
+the manifest instead of walking content/ themselves.
+
+The manifest is cached in output/.cache/content-manifest.json. A cached
+manifest is reused while every file in it is unchanged on disk (same
+size and mtime) and no files were added or removed, so later steps in a
+pipeline run skip the scan and the reads entirely.
+
+Usage:
+  python scripts/book_content.py [--refresh]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+CONTENT_DIR = REPO_ROOT / "content"
+OUTPUT_DIR = REPO_ROOT / "output"
+MANIFEST_CACHE = OUTPUT_DIR / ".cache" / "content-manifest.json"
+
+# Bump when the serialized layout changes; older caches are rescanned.
+MANIFEST_VERSION = 1
+
+# Content directories in book order
+SECTION_ORDER = [
+    "00-front-matter",
+    "01-part-1-foundation",
+    "02-part-2-writing-specifications",
+    "03-part-3-the-workflow",
+    "04-part-4-practice",
+    "05-part-5-governance-and-evolution",
+    "06-closing",
+    "07-back-matter",
+]
+
+PART_INTRO = "00-part-intro.md"
+
+_HEADING_PATTERN = re.compile(r"^#\s+(.+?)\s*(?:\{([^}]*)\})?\s*$", re.MULTILINE)
+_PART_PATTERN = re.compile(r"^#\s+Part\s+\d+:\s*(.+?)\s*(?:\{[^}]*\})?\s*$", re.MULTILINE)
+
+
+@dataclass
+class ContentFile:
+    """A single content file and what the builds need to know about it."""
+
+    path: Path
+    section: str
+    kind: str  # "front-matter", "part-intro", "chapter" or "back-matter"
+    title: str
+    classes: list[str]
+    part_number: int | None
+    sha256: str
+    size: int
+    mtime_ns: int
+    text: str
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+
+@dataclass
+class ContentManifest:
+    """All content files in book order, plus sections with no files."""
+
+    root: Path
+    files: list[ContentFile] = field(default_factory=list)
+    missing_sections: list[str] = field(default_factory=list)
+
+    def by_section(self) -> dict[str, list[ContentFile]]:
+        """Group files by section, in book order."""
+        sections: dict[str, list[ContentFile]] = {}
+        for f in self.files:
+            sections.setdefault(f.section, []).append(f)
+        return sections
+
+    def to_dict(self) -> dict:
+        """Serialize with paths relative to the content root."""
+        files = []
+        for f in self.files:
+            entry = asdict(f)
+            entry["path"] = f.path.relative_to(self.root).as_posix()
+            files.append(entry)
+        return {
+            "version": MANIFEST_VERSION,
+            "root": str(self.root),
+            "files": files,
+            "missing_sections": self.missing_sections,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> ContentManifest:
+        root = Path(data["root"])
+        files = [ContentFile(**{**entry, "path": root / entry["path"]}) for entry in data["files"]]
+        return cls(root=root, files=files, missing_sections=data["missing_sections"])
+
+    def save(self, path: Path = MANIFEST_CACHE) -> None:
+        """Write the manifest atomically so concurrent builds never see half a file."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(self.to_dict()), encoding="utf-8")
+        tmp_path.replace(path)
+
+    def is_fresh(self) -> bool:
+        """Check, without reading any content, that the manifest matches disk."""
+        if list_content_files(self.root) != [f.path for f in self.files]:
+            return False
+        for f in self.files:
+            try:
+                stat = f.path.stat()
+            except FileNotFoundError:
+                return False
+            if stat.st_size != f.size or stat.st_mtime_ns != f.mtime_ns:
+                return False
+        return True
+
+
+def get_sort_key(path: Path) -> tuple[int, str]:
+    """Sort files by numeric prefix, then alphabetically."""
+    match = re.match(r"^(\d+)", path.stem)
+    return (int(match.group(1)) if match else 999, path.stem)
+
+
+def is_part_directory(dirname: str) -> bool:
+    """Check if a directory name represents a book part."""
+    return bool(re.match(r"^\d+-part-\d+", dirname))
+
+
+def get_markdown_files(directory: Path) -> list[Path]:
+    """Get sorted markdown files from a directory."""
+    if not directory.exists():
+        return []
+    return sorted(directory.glob("*.md"), key=get_sort_key)
+
+
+def list_content_files(content_dir: Path = CONTENT_DIR) -> list[Path]:
+    """All content files in book order, without reading them."""
+    files: list[Path] = []
+    for dirname in SECTION_ORDER:
+        files.extend(get_markdown_files(content_dir / dirname))
+    return files
+
+
+def parse_part_intro(text: str, source: Path) -> str:
+    """Extract the title from a part intro.
+
+    Expected: # Part N: Title {.part}
+    Returns the title string.
+    """
+    match = _PART_PATTERN.match(text.strip())
+    if not match:
+        raise ValueError(f"Could not parse part intro: {source}")
+    return match.group(1).strip()
+
+
+def parse_heading(text: str) -> tuple[str, list[str]]:
+    """Return the first level-one heading and its classes.
+
+    `# Copyright {.unnumbered}` gives ("Copyright", ["unnumbered"]).
+    Files without a heading (the epigraph) give ("", []).
+    """
+    match = _HEADING_PATTERN.search(text)
+    if not match:
+        return "", []
+    attrs = match.group(2) or ""
+    classes = [a.removeprefix(".") for a in attrs.split() if a.startswith(".")]
+    return match.group(1).strip(), classes
+
+
+def _kind(section: str, filename: str) -> str:
+    if section == SECTION_ORDER[0]:
+        return "front-matter"
+    if section == SECTION_ORDER[-1]:
+        return "back-matter"
+    if filename == PART_INTRO and is_part_directory(section):
+        return "part-intro"
+    return "chapter"
+
+
+def scan(content_dir: Path = CONTENT_DIR) -> ContentManifest:
+    """Scan content/ in book order, reading and parsing each file once."""
+    manifest = ContentManifest(root=content_dir)
+    part_number = 0
+
+    for dirname in SECTION_ORDER:
+        files = get_markdown_files(content_dir / dirname)
+        if not files:
+            manifest.missing_sections.append(dirname)
+            continue
+
+        in_part = is_part_directory(dirname)
+        for path in files:
+            data = path.read_bytes()
+            stat = path.stat()
+            text = data.decode("utf-8")
+            kind = _kind(dirname, path.name)
+
+            if kind == "part-intro":
+                part_number += 1
+                title, classes = parse_part_intro(text, path), ["part"]
+            else:
+                title, classes = parse_heading(text)
+
+            manifest.files.append(
+                ContentFile(
+                    path=path,
+                    section=dirname,
+                    kind=kind,
+                    title=title,
+                    classes=classes,
+                    part_number=part_number if in_part else None,
+                    sha256=hashlib.sha256(data).hexdigest(),
+                    size=stat.st_size,
+                    mtime_ns=stat.st_mtime_ns,
+                    text=text,
+                )
+            )
+
+    return manifest
+
+
+def load_manifest(
+    content_dir: Path = CONTENT_DIR,
+    cache: Path | None = MANIFEST_CACHE,
+    refresh: bool = False,
+) -> ContentManifest:
+    """Return the content manifest, reusing the cached copy when it is fresh.
+
+    Pass cache=None to scan without reading or writing the cache file.
+    """
+    if cache is not None and not refresh and cache.exists():
+        try:
+            data = json.loads(cache.read_text(encoding="utf-8"))
+            if data.get("version") == MANIFEST_VERSION and Path(data["root"]) == content_dir:
+                manifest = ContentManifest.from_dict(data)
+                if manifest.is_fresh():
+                    return manifest
+        except (json.JSONDecodeError, KeyError, TypeError):
+            pass  # Corrupt or outdated cache — rescan below
+
+    manifest = scan(content_dir)
+    if cache is not None:
+        manifest.save(cache)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan content/ and cache the content manifest")
+    parser.add_argument("--refresh", action="store_true", help="Ignore any cached manifest")
+    args = parser.parse_args()
+
+    manifest = load_manifest(refresh=args.refresh)
+    for section, files in manifest.by_section().items():
+        print(f"  {section}/")
+        for f in files:
+            print(f"    [{f.kind}] {f.name}" + (f" — {f.title}" if f.title else ""))
+    for section in manifest.missing_sections:
+        print(f"  {section}/ (empty or missing)")
+    print(f"\n{len(manifest.files)} files -> {MANIFEST_CACHE}")
+
+
+if __name__ == "__main__":
+    main()
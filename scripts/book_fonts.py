@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""Font subsetting for the EPUB and screen PDF builds.
+
+assets/fonts/ ships every weight of the book's four families at full
+size. This stage subsets only the faces a build uses, down to the
+characters its text contains, and hands the build a directory of
+subset fonts:
+
+  epub  faces chosen from the converted markup (<em>, <strong>, <code>,
+        headings), embedded with generated @font-face rules
+  pdf   the faces build/pdf/template.tex loads, passed to XeLaTeX as
+        the fontdir template variable (screen variant only)
+
+Subsets are cached in output/.cache/fonts/<build>/<glyph-set hash>/;
+the hash covers the character set, the source fonts and the fontTools
+version, so a rebuild with unchanged text reuses them. Each build keeps
+only its current glyph set: older ones are removed once it is complete. Faces are subset in a
+process pool. Without fontTools the builds use the installed fonts as
+before and the EPUB embeds none.
+
+Run directly to subset every face to the whole manuscript and report
+the savings.
+
+Usage:
+  python scripts/book_fonts.py [--refresh]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import string
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from book_content import REPO_ROOT, load_manifest
+
+try:
+    import fontTools  # fontTools.subset is imported by the workers: it is slow to load
+except ImportError:  # Optional: without fontTools the full installed fonts are used
+    fontTools = None
+
+FONT_DIR = REPO_ROOT / "assets" / "fonts"
+CACHE_DIR = REPO_ROOT / "output" / ".cache" / "fonts"
+
+# Always kept: generated text (page numbers, TOC, build info) is ASCII,
+# and TeX ligatures turn quotes and dashes into typographic glyphs
+BASE_CHARACTERS = string.printable + " ©–—‘’“”…•·"
+
+
+@dataclass(frozen=True)
+class FontFace:
+    """One font file and how stylesheets refer to it."""
+
+    file: str
+    family: str
+    role: str  # "serif", "sans", "mono" or "slab"
+    weight: int = 400
+    italic: bool = False
+
+    @property
+    def source(self) -> Path:
+        return FONT_DIR / self.file
+
+
+# The faces build/pdf/template.tex loads, which are also everything the
+# EPUB stylesheet can ask for. Inter ships regular and black only, so
+# black stands in for bold.
+FACES = [
+    FontFace("SourceSerif4-Regular.ttf", "Source Serif 4", "serif"),
+    FontFace("SourceSerif4-Italic.ttf", "Source Serif 4", "serif", italic=True),
+    FontFace("SourceSerif4-Bold.ttf", "Source Serif 4", "serif", weight=700),
+    FontFace("SourceSerif4-BoldItalic.ttf", "Source Serif 4", "serif", weight=700, italic=True),
+    FontFace("inter-regular.ttf", "Inter", "sans"),
+    FontFace("inter-black.ttf", "Inter", "sans", weight=700),
+    FontFace("JetBrainsMono-Regular.ttf", "JetBrains Mono", "mono"),
+    FontFace("JetBrainsMono-Italic.ttf", "JetBrains Mono", "mono", italic=True),
+    FontFace("JetBrainsMono-Bold.ttf", "JetBrains Mono", "mono", weight=700),
+    FontFace("JetBrainsMono-BoldItalic.ttf", "JetBrains Mono", "mono", weight=700, italic=True),
+    FontFace("alfa-slab-one.ttf", "Alfa Slab One", "slab"),
+]
+
+_ITALIC_PATTERN = re.compile(r"<(?:em|i|cite)\b")
+_BOLD_PATTERN = re.compile(r"<(?:strong|b|th|h[2-6])\b")
+_CODE_PATTERN = re.compile(r"<(?:code|pre|kbd|samp)\b")
+_SANS_PATTERN = re.compile(r"<h[2-6]\b")
+_SLAB_PATTERN = re.compile(r"<h1\b")
+
+
+@dataclass
+class FontSet:
+    """Subset fonts for one build, all in one directory."""
+
+    directory: Path
+    faces: list[FontFace] = field(default_factory=list)
+    built: int = 0
+
+    def path(self, face: FontFace) -> Path:
+        return self.directory / face.file
+
+    @property
+    def size(self) -> int:
+        return sum(self.path(face).stat().st_size for face in self.faces)
+
+    @property
+    def source_size(self) -> int:
+        return sum(face.source.stat().st_size for face in self.faces)
+
+
+def available() -> bool:
+    """True when fontTools is installed and the fonts are in the repo."""
+    return fontTools is not None and all(face.source.exists() for face in FACES)
+
+
+def faces_for_html(bodies: list[str]) -> list[FontFace]:
+    """The faces converted XHTML actually needs.
+
+    Regular serif is always used. Bold italic is included when the text
+    has both bold and italic, since the markup is not parsed for nesting.
+    """
+    html = "".join(bodies)
+    italic = bool(_ITALIC_PATTERN.search(html))
+    bold = bool(_BOLD_PATTERN.search(html))
+    code = bool(_CODE_PATTERN.search(html))
+    wanted = {
+        "serif": True,
+        "sans": bool(_SANS_PATTERN.search(html)),
+        "slab": bool(_SLAB_PATTERN.search(html)),
+        "mono": code,
+    }
+    faces = []
+    for face in FACES:
+        if not wanted[face.role]:
+            continue
+        if face.italic and not italic:
+            continue
+        if face.weight > 400 and not bold:
+            continue
+        if face.role == "mono" and (face.italic or face.weight > 400):
+            continue  # Code is set upright regular in the stylesheet
+        faces.append(face)
+    return faces
+
+
+def glyph_set(text: str) -> str:
+    """Sorted unique characters of text plus BASE_CHARACTERS."""
+    return "".join(sorted(set(text) | set(BASE_CHARACTERS)))
+
+
+def cache_key(characters: str) -> str:
+    """Hash a glyph set together with the source fonts and fontTools version."""
+    digest = hashlib.sha256(characters.encode("utf-8"))
+    digest.update(getattr(fontTools, "version", "").encode("utf-8"))
+    for face in FACES:
+        stat = face.source.stat()
+        digest.update(f"\0{face.file}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+def subset_face(source: Path, dest: Path, characters: str) -> Path:
+    """Subset one font file to characters. Runs in a worker process.
+
+    fontTools' default layout features (ligatures, kerning, contextual
+    alternates) are kept; keeping every feature doubles the subsetting
+    time for features neither build uses.
+    """
+    from fontTools import subset
+
+    options = subset.Options()
+    options.name_IDs = ["*"]
+    options.notdef_outline = True
+    font = subset.load_font(str(source), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(text=characters)
+    subsetter.subset(font)
+    tmp_path = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+    subset.save_font(font, str(tmp_path), options)
+    tmp_path.replace(dest)
+    return dest
+
+
+def prune_cache(build: str, keep: Path) -> None:
+    """Remove a build's subset directories other than keep."""
+    directory = CACHE_DIR / build
+    if not directory.exists():
+        return
+    for path in directory.iterdir():
+        if path != keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def subset_fonts(
+    text: str, faces: list[FontFace], build: str, refresh: bool = False
+) -> FontSet | None:
+    """Subset faces to the characters in text, reusing cached subsets.
+
+    build ("epub", "pdf") names the build's cache directory; its subsets
+    for other glyph sets are pruned. Returns None when fontTools or the
+    source fonts are missing.
+    """
+    if not available():
+        return None
+    characters = glyph_set(text)
+    fonts = FontSet(directory=CACHE_DIR / build / cache_key(characters), faces=list(faces))
+    pending = [face for face in faces if refresh or not fonts.path(face).exists()]
+    if pending:
+        fonts.directory.mkdir(parents=True, exist_ok=True)
+        with ProcessPoolExecutor(min(len(pending), os.cpu_count() or 1)) as pool:
+            jobs = [
+                pool.submit(subset_face, face.source, fonts.path(face), characters)
+                for face in pending
+            ]
+            for job in jobs:
+                job.result()
+        fonts.built = len(pending)
+    prune_cache(build, fonts.directory)
+    return fonts
+
+
+def font_face_css(fonts: FontSet, href_prefix: str) -> str:
+    """@font-face rules for an embedded FontSet."""
+    rules = []
+    for face in fonts.faces:
+        rules.append(
+            "@font-face {\n"
+            f'  font-family: "{face.family}";\n'
+            f"  font-weight: {face.weight};\n"
+            f"  font-style: {'italic' if face.italic else 'normal'};\n"
+            f'  src: url("{href_prefix}{face.file}");\n'
+            "}\n"
+        )
+    return "\n".join(rules)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Subset the book fonts to the manuscript")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached subsets")
+    args = parser.parse_args()
+
+    if not available():
+        print("Warning: fontTools not installed (pip install fonttools); nothing to subset")
+        return
+
+    text = "\n".join(f.text for f in load_manifest().files)
+    fonts = subset_fonts(text, FACES, "manuscript", refresh=args.refresh)
+    for face in fonts.faces:
+        before, after = face.source.stat().st_size, fonts.path(face).stat().st_size
+        print(f"  {face.file:<32} {before / 1024:>7.1f} KB -> {after / 1024:>6.1f} KB")
+    print(
+        f"\n{len(glyph_set(text))} characters, {fonts.built} subset, "
+        f"{fonts.source_size / 1024:.0f} KB -> {fonts.size / 1024:.0f} KB in {fonts.directory}"
+    )
+
+
+if __name__ == "__main__":
+    main()
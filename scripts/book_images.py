@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Per-target image variants for the book builds.
+
+Finds every local image referenced from content/ (markdown `![alt](src)`
+and HTML `<img src="...">`) and produces one variant per build target.
+The builds point each reference at its variant (variant_path) while
+transforming the parsed content:
+
+  epub  downscaled to EPUB_MAX_PX on the long edge and recompressed:
+        JPEG for opaque images, WebP for images with transparency
+  pdf   full resolution for print; only formats XeLaTeX cannot embed
+        (WebP, GIF) are converted, to PNG
+
+SVGs pass through unchanged for both targets. Variants are cached in
+output/.cache/images/ under a key covering the source bytes, the target
+profile and the Pillow version, and uncached variants are produced in a
+process pool. Without Pillow every target gets the original files.
+
+Usage:
+  python scripts/book_images.py [--target epub|pdf] [--refresh]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from book_content import REPO_ROOT, ContentManifest, load_manifest
+
+try:
+    from PIL import Image
+except ImportError:  # Optional: without Pillow the originals are used
+    Image = None
+
+OUTPUT_DIR = REPO_ROOT / "output"
+CACHE_DIR = OUTPUT_DIR / ".cache" / "images"
+
+EPUB_MAX_PX = 1400
+EPUB_JPEG_QUALITY = 80
+EPUB_WEBP_QUALITY = 80
+
+# Formats XeLaTeX embeds as-is
+PDF_NATIVE_SUFFIXES = {".png", ".jpg", ".jpeg", ".pdf"}
+
+# Images kept as they are for every target
+PASSTHROUGH_SUFFIXES = {".svg"}
+
+_MARKDOWN_IMAGE_PATTERN = re.compile(r"(!\[[^\]]*\]\(\s*)(<[^>]+>|[^)\s]+)")
+_HTML_IMAGE_PATTERN = re.compile(r"(<img\b[^>]*\bsrc=\")([^\"]+)(?=\")")
+
+
+@dataclass(frozen=True)
+class ImageProfile:
+    """How one build target wants its images."""
+
+    name: str
+    max_px: int | None  # Longest edge; None keeps full resolution
+    convert: bool  # Recompress everything, or only unsupported formats
+
+
+PROFILES = {
+    "epub": ImageProfile("epub", EPUB_MAX_PX, convert=True),
+    "pdf": ImageProfile("pdf", None, convert=False),
+}
+
+
+@dataclass
+class ImageVariant:
+    """A source image and the file a target should use instead."""
+
+    source: Path
+    path: Path
+    cached: bool
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.source.stat().st_size - self.path.stat().st_size
+
+
+def _is_remote(src: str) -> bool:
+    return bool(re.match(r"^[a-z][a-z0-9+.-]*:", src))
+
+
+def resolve_image(src: str, base: Path) -> Path | None:
+    """Resolve an image reference the way build-epub's media collector does."""
+    src = src.strip("<>")
+    if _is_remote(src):
+        return None
+    for root in (base, REPO_ROOT):
+        candidate = (root / src).resolve()
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def find_images(manifest: ContentManifest) -> list[Path]:
+    """Every local image referenced from the manuscript, in first-use order."""
+    found: dict[Path, None] = {}
+    for f in manifest.files:
+        for pattern in (_MARKDOWN_IMAGE_PATTERN, _HTML_IMAGE_PATTERN):
+            for match in pattern.finditer(f.text):
+                path = resolve_image(match.group(2), f.path.parent)
+                if path is not None:
+                    found.setdefault(path)
+    return list(found)
+
+
+def _pillow_version() -> str:
+    return getattr(Image, "__version__", "") if Image is not None else "none"
+
+
+def _needs_work(source: Path, profile: ImageProfile) -> bool:
+    suffix = source.suffix.lower()
+    if Image is None or suffix in PASSTHROUGH_SUFFIXES:
+        return False
+    return profile.convert or suffix not in PDF_NATIVE_SUFFIXES
+
+
+def cache_key(data: bytes, profile: ImageProfile) -> str:
+    """Key a variant by source bytes, profile parameters and Pillow version."""
+    params = [
+        profile.name,
+        str(profile.max_px),
+        str(profile.convert),
+        str(EPUB_JPEG_QUALITY),
+        str(EPUB_WEBP_QUALITY),
+        _pillow_version(),
+    ]
+    digest = hashlib.sha256(data)
+    digest.update("\0".join(params).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _has_alpha(image) -> bool:
+    return image.mode in ("RGBA", "LA", "PA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+
+
+def render_variant(source: Path, profile: ImageProfile, dest_stem: Path) -> Path:
+    """Write the variant of source next to dest_stem and return its path.
+
+    Runs in a worker process, so it only takes picklable arguments.
+    """
+    with Image.open(source) as image:
+        image.load()
+        if profile.max_px and max(image.size) > profile.max_px:
+            image.thumbnail((profile.max_px, profile.max_px), Image.Resampling.LANCZOS)
+
+        if not profile.convert:
+            dest, options = dest_stem.with_suffix(".png"), {"optimize": True}
+        elif _has_alpha(image):
+            image = image.convert("RGBA")
+            dest, options = dest_stem.with_suffix(".webp"), {"quality": EPUB_WEBP_QUALITY}
+        else:
+            image = image.convert("RGB")
+            dest = dest_stem.with_suffix(".jpg")
+            options = {"quality": EPUB_JPEG_QUALITY, "optimize": True, "progressive": True}
+
+        tmp_path = dest.with_name(f"{dest.name}.{os.getpid()}.tmp")
+        image.save(tmp_path, format=dest.suffix.lstrip(".").replace("jpg", "jpeg"), **options)
+    tmp_path.replace(dest)
+    return dest
+
+
+def prepare_images(
+    manifest: ContentManifest, target: str, refresh: bool = False
+) -> dict[Path, ImageVariant]:
+    """Produce (or reuse) the target's variant of every referenced image."""
+    profile = PROFILES[target]
+    variants: dict[Path, ImageVariant] = {}
+    pending: dict[Path, Path] = {}
+
+    for source in find_images(manifest):
+        if not _needs_work(source, profile):
+            variants[source] = ImageVariant(source, source, cached=True)
+            continue
+        dest_stem = CACHE_DIR / cache_key(source.read_bytes(), profile)
+        cached = None
+        if not refresh:
+            done = (p for p in CACHE_DIR.glob(f"{dest_stem.name}.*") if p.suffix != ".tmp")
+            cached = next(done, None)
+        if cached is not None:
+            variants[source] = ImageVariant(source, cached, cached=True)
+        else:
+            pending[source] = dest_stem
+
+    if pending:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        workers = min(len(pending), os.cpu_count() or 1)
+        with ProcessPoolExecutor(workers) as pool:
+            futures = {
+                source: pool.submit(render_variant, source, profile, dest_stem)
+                for source, dest_stem in pending.items()
+            }
+            for source, future in futures.items():
+                variants[source] = ImageVariant(source, future.result(), cached=False)
+
+    return variants
+
+
+def variant_path(src: str, base: Path, variants: dict[Path, ImageVariant]) -> str | None:
+    """Absolute path of the variant for an image reference, or None to leave it.
+
+    Absolute paths convert the same wherever pandoc runs from.
+    """
+    source = resolve_image(src, base)
+    variant = variants.get(source) if source is not None else None
+    return variant.path.as_posix() if variant is not None else None
+
+
+def prune_cache(keep: set[Path]) -> None:
+    """Remove cached variants that no target uses any more."""
+    if not CACHE_DIR.exists():
+        return
+    for path in CACHE_DIR.iterdir():
+        if path not in keep:
+            path.unlink(missing_ok=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build per-target image variants")
+    parser.add_argument("--target", choices=sorted(PROFILES), action="append")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached variants")
+    args = parser.parse_args()
+
+    if Image is None:
+        print("Warning: Pillow not installed (pip install Pillow); using original images")
+
+    manifest = load_manifest()
+    keep: set[Path] = set()
+    for target in args.target or sorted(PROFILES):
+        variants = prepare_images(manifest, target, refresh=args.refresh)
+        built = sum(1 for v in variants.values() if not v.cached)
+        saved = sum(v.saved_bytes for v in variants.values())
+        print(
+            f"  {target}: {len(variants)} images, {built} built, "
+            f"{len(variants) - built} cached, {saved / 1024:.1f} KB saved"
+        )
+        keep.update(v.path for v in variants.values())
+    if not args.target:
+        prune_cache(keep)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""Back-of-book index from the glossary and the writers-guide terminology.
+
+Terms come from two specs:
+
+  glossary.md       every `### Term (alias)` entry
+  writers-guide.md  the Preferred Term column of the terminology table
+                    (the table the spec server's get_terminology_map
+                    reads); the first preferred spelling is the entry,
+                    the rest are aliases
+
+All terms and aliases are compiled into one case-insensitive pattern,
+longest first, so each text is matched in a single pass and
+"Drift Detection" is never also counted as "Drift". Plurals match too.
+
+The builds use it in two ways:
+
+  pdf   IndexedFiles wraps the parsed ASTs and adds a raw LaTeX
+        \\index{} after every occurrence in running text (not in
+        headings, code or raw blocks); build/pdf/template.tex prints the
+        index with imakeidx
+  epub  html_occurrences() finds the sections of a converted chapter
+        that use each term, for a generated index page
+
+Both results are cached per chapter in output/.cache/index/, keyed by
+the chapter and the term list, so an incremental build only indexes the
+chapters that changed.
+
+Usage:
+  python scripts/book_index.py     # report term usage across content/
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import hashlib
+import html
+import json
+import os
+import re
+from collections import Counter
+from collections.abc import Callable, Iterator, Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from book_ast import Document, Element, ParsedFiles, dumps, elements, parse_lazily
+from book_content import OUTPUT_DIR, REPO_ROOT, load_manifest
+from text_transform import escape_latex
+
+SPECS_DIR = REPO_ROOT / ".specmcp" / "specs" / "editorial"
+GLOSSARY_FILE = SPECS_DIR / "glossary.md"
+WRITERS_GUIDE_FILE = SPECS_DIR / "writers-guide.md"
+TERM_SOURCES = [GLOSSARY_FILE, WRITERS_GUIDE_FILE]
+
+CACHE_DIR = OUTPUT_DIR / ".cache" / "index"
+
+# Bump when matching or injection changes; older cache entries are ignored
+INDEX_VERSION = 1
+
+# Elements whose text is not running prose: never indexed
+UNINDEXED = frozenset({"Header", "Code", "CodeBlock", "RawBlock", "RawInline", "Math", "Image"})
+
+# Elements holding inline lists, and where: c itself or c[1]
+_INLINES_IN_C = frozenset(
+    {"Para", "Plain", "Emph", "Strong", "Underline", "Strikeout", "Superscript", "Subscript"}
+    | {"SmallCaps"}
+)
+_INLINES_IN_C1 = frozenset({"Span", "Link", "Quoted", "Cite"})
+
+_GLOSSARY_TERM_PATTERN = re.compile(r"^###\s+(.+?)(?:\s+\((.+?)\))?\s*$", re.MULTILINE)
+_SECTION_PATTERN = re.compile(r'<h[1-6][^>]*\bid="([^"]+)"[^>]*>.*?</h[1-6]>', re.DOTALL)
+_UNINDEXED_HTML_PATTERN = re.compile(r"<(pre|code)\b.*?</\1>", re.DOTALL)
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+_MAKEINDEX_SPECIAL_PATTERN = re.compile(r'([!@|"])')
+
+
+@dataclass
+class Term:
+    """An index entry and the spellings that refer to it."""
+
+    name: str
+    aliases: list[str] = field(default_factory=list)
+
+
+def glossary_terms(text: str) -> list[Term]:
+    """Terms from the glossary's `### Term (alias)` headings."""
+    return [
+        Term(match.group(1), [match.group(2)] if match.group(2) else [])
+        for match in _GLOSSARY_TERM_PATTERN.finditer(text)
+    ]
+
+
+def terminology_terms(text: str) -> list[Term]:
+    """Terms from the Preferred Term column of the writers-guide table."""
+    terms = []
+    in_table = False
+    for line in text.splitlines():
+        if "| Preferred Term" in line:
+            in_table = True
+            continue
+        if in_table and line.startswith("|---"):
+            continue
+        if in_table and line.startswith("|"):
+            cols = [c.strip() for c in line.split("|")[1:-1]]
+            names = [re.sub(r"\(.*?\)", "", n).strip() for n in cols[0].split(",")] if cols else []
+            names = [n for n in names if n]
+            if names:
+                terms.append(Term(names[0], names[1:]))
+        elif in_table and not line.strip():
+            break
+    return terms
+
+
+def load_terms() -> list[Term]:
+    """Glossary terms merged with the terminology table, sorted by name.
+
+    A table row naming a glossary term or alias (in any case) adds its
+    spellings to that entry instead of making a new one.
+    """
+    glossary = glossary_terms(GLOSSARY_FILE.read_text(encoding="utf-8"))
+    table = terminology_terms(WRITERS_GUIDE_FILE.read_text(encoding="utf-8"))
+    by_spelling: dict[str, Term] = {}
+    terms: list[Term] = []
+    for term in [*glossary, *table]:
+        spellings = [term.name, *term.aliases]
+        existing = next(
+            (by_spelling[s.lower()] for s in spellings if s.lower() in by_spelling), None
+        )
+        if existing is None:
+            existing = Term(term.name)
+            terms.append(existing)
+        for spelling in spellings:
+            if spelling.lower() not in by_spelling:
+                by_spelling[spelling.lower()] = existing
+                if spelling.lower() != existing.name.lower():
+                    existing.aliases.append(spelling)
+    return sorted(terms, key=lambda t: t.name.lower())
+
+
+class TermMatcher:
+    """All terms and aliases as one compiled pattern.
+
+    find() is a single left-to-right pass. Alternatives are ordered
+    longest first, so the longest term at a position wins; matches need
+    a non-word, non-hyphen character (or the text edge) on both sides.
+    """
+
+    def __init__(self, terms: list[Term]):
+        self.terms = terms
+        self._names: dict[str, str] = {}
+        for term in terms:
+            for spelling in [term.name, *term.aliases]:
+                self._names.setdefault(spelling.lower(), term.name)
+        alternatives = sorted(self._names, key=len, reverse=True)
+        body = "|".join(re.escape(a).replace(r"\ ", r"\s+") for a in alternatives)
+        self._pattern = re.compile(
+            rf"(?<![\w-])({body})(?:e?s)?(?![\w-])" if body else r"(?!x)x", re.IGNORECASE
+        )
+        self.key = hashlib.sha256(
+            json.dumps([INDEX_VERSION, [[t.name, *t.aliases] for t in terms]]).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def find(self, text: str) -> Iterator[tuple[int, int, str]]:
+        """(start, end, term name) for every occurrence in text."""
+        for match in self._pattern.finditer(text):
+            spelling = re.sub(r"\s+", " ", match.group(1)).lower()
+            yield match.start(), match.end(), self._names[spelling]
+
+
+def load_matcher() -> TermMatcher | None:
+    """A matcher for the current terms, or None if a term source is missing."""
+    if not all(path.exists() for path in TERM_SOURCES):
+        return None
+    return TermMatcher(load_terms())
+
+
+def index_command(name: str) -> str:
+    """A LaTeX \\index{} entry sorted case-insensitively, with makeindex's
+    special characters quoted."""
+    sort_key = re.sub(r"[^\w\s-]", "", name.lower())
+    display = _MAKEINDEX_SPECIAL_PATTERN.sub(r'"\1', escape_latex(name))
+    return f"\\index{{{sort_key}@{display}}}"
+
+
+def _inline_lists(element: Element) -> list[list]:
+    kind = element["t"]
+    if kind in _INLINES_IN_C:
+        return [element["c"]]
+    if kind in _INLINES_IN_C1:
+        return [element["c"][1]]
+    if kind == "LineBlock":
+        return element["c"]
+    return []
+
+
+def _index_inlines(inlines: list[Element], matcher: TermMatcher) -> list[str]:
+    """Insert \\index{} after each match in the runs of plain text in inlines.
+
+    Returns the names of the terms indexed.
+    """
+    insertions: list[tuple[int, str]] = []
+    run: list[str] = []
+    ends: list[int] = []  # Offset in the run's text where each inline ends
+    positions: list[int] = []  # And that inline's position in inlines
+
+    def _flush() -> None:
+        for _, end, name in matcher.find("".join(run)):
+            insertions.append((positions[bisect.bisect_left(ends, end)] + 1, name))
+        run.clear()
+        ends.clear()
+        positions.clear()
+
+    for position, inline in enumerate(inlines):
+        kind = inline["t"]
+        if kind == "Str":
+            run.append(inline["c"])
+        elif kind in ("Space", "SoftBreak", "LineBreak"):
+            run.append(" ")
+        else:
+            _flush()
+            continue
+        ends.append((ends[-1] if ends else 0) + len(run[-1]))
+        positions.append(position)
+    _flush()
+
+    for position, name in reversed(insertions):
+        inlines.insert(position, {"t": "RawInline", "c": ["latex", index_command(name)]})
+    return [name for _, name in insertions]
+
+
+def index_document(doc: Document, matcher: TermMatcher) -> list[str]:
+    """Add \\index{} entries after term occurrences in doc.
+
+    Returns the names of the terms indexed, once per entry.
+    """
+    names = []
+    for element in elements(doc["blocks"], skip=UNINDEXED):
+        for inlines in _inline_lists(element):
+            names.extend(_index_inlines(inlines, matcher))
+    return names
+
+
+def html_occurrences(body: str, matcher: TermMatcher) -> dict[str, list[str]]:
+    """Term name -> ids of the sections of an XHTML fragment that use it.
+
+    Text before the first heading with an id belongs to section "";
+    headings, code and preformatted blocks are not searched.
+    """
+    found: dict[str, list[str]] = {}
+    headings = list(_SECTION_PATTERN.finditer(body))
+    sections = [("", 0)] + [(m.group(1), m.end()) for m in headings]
+    ends = [m.start() for m in headings] + [len(body)]
+    for (anchor, start), end in zip(sections, ends, strict=True):
+        text = _UNINDEXED_HTML_PATTERN.sub(" ", body[start:end])
+        text = html.unescape(_TAG_PATTERN.sub(" ", text))
+        for _, _, name in matcher.find(text):
+            anchors = found.setdefault(name, [])
+            if anchor not in anchors:
+                anchors.append(anchor)
+    return found
+
+
+# === Per-chapter cache ===
+
+# Cached results this process has read or computed, by cache path
+_cached: dict[Path, str] = {}
+
+
+def cache_path_for(kind: str, source_key: str, matcher: TermMatcher) -> Path:
+    """Cache location of one chapter's result for a build ("pdf" or "epub")."""
+    key = hashlib.sha256(f"{matcher.key}\0{source_key}".encode()).hexdigest()
+    return CACHE_DIR / kind / f"{key}.json"
+
+
+def cached(kind: str, source_key: str, matcher: TermMatcher, compute: Callable[[], str]) -> str:
+    """compute()'s result for one chapter, from memory, disk or a fresh run."""
+    path = cache_path_for(kind, source_key, matcher)
+    if path not in _cached:
+        if path.exists():
+            _cached[path] = path.read_text(encoding="utf-8")
+        else:
+            text = compute()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(text, encoding="utf-8")
+            tmp_path.replace(path)
+            _cached[path] = text
+    return _cached[path]
+
+
+class IndexedFiles(Mapping[Path, Document]):
+    """ParsedFiles with \\index{} entries added, each chapter cached.
+
+    Lookups return fresh copies, like ParsedFiles.
+    """
+
+    def __init__(self, documents: ParsedFiles, matcher: TermMatcher):
+        self.documents = documents
+        self.matcher = matcher
+
+    def _index(self, path: Path) -> str:
+        doc = self.documents[path]
+        index_document(doc, self.matcher)
+        return dumps(doc)
+
+    def cache_path(self, path: Path) -> Path:
+        return cache_path_for("pdf", self.documents.key(path), self.matcher)
+
+    def __getitem__(self, path: Path) -> Document:
+        text = cached("pdf", self.documents.key(path), self.matcher, lambda: self._index(path))
+        return json.loads(text)
+
+    def __iter__(self) -> Iterator[Path]:
+        return iter(self.documents)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @property
+    def api_version(self) -> list[int] | None:
+        return self.documents.api_version
+
+
+def _fragment_key(body: str) -> str:
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def chapter_cache_path(body: str, matcher: TermMatcher) -> Path:
+    return cache_path_for("epub", _fragment_key(body), matcher)
+
+
+def chapter_occurrences(body: str, matcher: TermMatcher) -> dict[str, list[str]]:
+    """html_occurrences, cached by the fragment's text."""
+    text = cached(
+        "epub", _fragment_key(body), matcher, lambda: json.dumps(html_occurrences(body, matcher))
+    )
+    return json.loads(text)
+
+
+def prune_cache(kind: str, keep: set[Path]) -> None:
+    """Remove a build's cached results that are not in keep."""
+    directory = CACHE_DIR / kind
+    if not directory.exists():
+        return
+    for path in directory.glob("*.json"):
+        if path not in keep:
+            path.unlink(missing_ok=True)
+            _cached.pop(path, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report glossary term usage across content/")
+    parser.parse_args()
+
+    matcher = TermMatcher(load_terms())
+    files = [f for f in load_manifest().files if f.kind != "part-intro"]
+    documents = parse_lazily(files)
+
+    usage = Counter({term.name: 0 for term in matcher.terms})
+    chapters = Counter()
+    for f in files:
+        names = index_document(documents[f.path], matcher)
+        usage.update(names)
+        chapters.update(set(names))
+
+    for term in matcher.terms:
+        aliases = f" ({', '.join(term.aliases)})" if term.aliases else ""
+        print(f"  {usage[term.name]:>5} in {chapters[term.name]:>2} files  {term.name}{aliases}")
+    used = sum(1 for count in usage.values() if count)
+    print(f"\n{len(matcher.terms)} terms, {used} used, {sum(usage.values())} index entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""Cross-reference and link integrity check for the manuscript.
+
+Broken internal links otherwise only show up after a full pandoc and
+XeLaTeX run. This reads content/ (through the content manifest) in one
+pass and reports, with file and line:
+
+  - links to an anchor (`[text](#id)`, `<a href="#id">`, reference
+    definitions) that no heading or explicit id in the book defines
+  - explicit ids (`{#id}`, `id="..."`) defined more than once
+  - images (`![alt](src)`, `<img src>`) that do not resolve to a file
+    the way the builds resolve them (scripts/book_images.py)
+  - links to other local files that do not exist, and links to other
+    content files, which the builds do not rewrite (link the anchor)
+
+Anchors are collected the way pandoc assigns them: explicit ids, and
+auto identifiers derived from heading text. The builds treat the book as
+one document, so `#id` resolves book-wide to the first definition, and a
+repeated heading's numbered id (`summary-1`) is only valid in the PDF,
+so it is not indexed. External URLs are never fetched. Fenced code and
+inline code are skipped.
+
+Files are scanned in a process pool once there are enough of them to
+pay for the workers; resolving links against the anchor index is a
+dictionary lookup per link. scripts/build-all.py runs the check before
+the EPUB and PDF builds, and .pre-commit-config.yaml before commits that
+touch content/.
+
+Usage:
+  python scripts/book_links.py [--jobs N]    # exit status 1 if anything is broken
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import html
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import unquote
+
+from book_content import REPO_ROOT, load_manifest
+from book_images import resolve_image
+
+# Fewer files than this are scanned in-process: starting workers costs
+# more than scanning them
+PARALLEL_MIN_FILES = 64
+
+_FENCE_PATTERN = re.compile(r" {0,3}(`{3,}|~{3,})")
+_CODE_SPAN_PATTERN = re.compile(r"(`+)(?!`).+?(?<!`)\1(?!`)", re.DOTALL)
+# Line-start patterns begin with a literal newline (see scan_file)
+_HEADING_PATTERN = re.compile(r"\n {0,3}#{1,6}[ \t]+(.*)")
+_HEADING_ATTRS_PATTERN = re.compile(r"\s*\{([^{}]*)\}\s*$")
+_ATTRS_ID_PATTERN = re.compile(r"\{[^{}\n]*?(?<![^\s{])#([^\s{}]+)[^{}\n]*\}")
+_HTML_ID_PATTERN = re.compile(r"<[a-zA-Z][^>]*?\sid=[\"']([^\"']+)[\"']")
+# Link text may hold one level of brackets and wrap, but not span a blank line
+_LINK_PATTERN = re.compile(
+    r"\[(?:[^\[\]\n]++|\n(?!\n)|\[[^\[\]]*+\])*+\]"
+    r"\(\s*(<[^>\n]*>|[^\s()]+)(?:\s+(?:\"[^\"]*\"|'[^']*'))?\s*\)"
+)
+_REFERENCE_PATTERN = re.compile(r"\n {0,3}\[(?!\^)[^\]\n]+\]:[ \t]*(<[^>\n]*>|\S+)")
+_HTML_LINK_PATTERN = re.compile(r"<(a|img)\b[^>]*?\s(href|src)=[\"']([^\"']+)[\"']", re.IGNORECASE)
+_REMOTE_PATTERN = re.compile(r"^[a-z][a-z0-9+.-]*:", re.IGNORECASE)
+
+# Heading markup, reduced to the text pandoc's identifier algorithm sees
+_HEADING_MARKUP = [
+    (re.compile(r"\[\^([^\]]*)\]"), r"\1"),  # Footnote references keep their label
+    (re.compile(r"!?\[((?:[^\[\]]|\[[^\[\]]*\])*)\](?:\([^)]*\)|\{[^}]*\})"), r"\1"),
+    (re.compile(r"<[^>]+>"), ""),
+    (re.compile(r"`+"), ""),
+    (re.compile(r"(?<!\\)(?:\*+|(?<!\w)_+|_+(?!\w))"), ""),
+    (re.compile(r"\\(.)"), r"\1"),
+]
+
+
+@dataclass
+class Anchor:
+    """An identifier a file defines."""
+
+    name: str
+    line: int
+    explicit: bool
+
+
+@dataclass
+class Reference:
+    """A link or image target a file uses."""
+
+    target: str
+    line: int
+    image: bool
+
+
+@dataclass
+class FileLinks:
+    """What one content file defines and refers to."""
+
+    path: Path
+    anchors: list[Anchor] = field(default_factory=list)
+    references: list[Reference] = field(default_factory=list)
+    missing_images: list[Reference] = field(default_factory=list)
+
+
+@dataclass
+class Problem:
+    """A broken link or reference, located in its file."""
+
+    path: Path
+    line: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"{_display(self.path)}:{self.line}: {self.message}"
+
+
+def _display(path: Path) -> str:
+    return (path.relative_to(REPO_ROOT) if path.is_relative_to(REPO_ROOT) else path).as_posix()
+
+
+def heading_identifier(text: str) -> str:
+    """The identifier pandoc's auto_identifiers gives a heading's text.
+
+    Markup is dropped; then everything but letters, digits, `_`, `-`
+    and `.` is removed, words are joined with `-`, and anything before
+    the first letter is cut ("section" if nothing is left).
+    """
+    for pattern, replacement in _HEADING_MARKUP:
+        text = pattern.sub(replacement, text)
+    text = html.unescape(text).lower()
+    kept = "".join(c for c in text if c.isalnum() or c.isspace() or c in "_-.")
+    identifier = "-".join(kept.split())
+    start = next((i for i, c in enumerate(identifier) if c.isalpha()), len(identifier))
+    return identifier[start:] or "section"
+
+
+def _blank(match: re.Match) -> str:
+    """Replace a match with spaces, keeping its newlines (and so every offset)."""
+    return re.sub(r"[^\n]", " ", match.group(0))
+
+
+def _mask_code(text: str) -> str:
+    """text with fenced and inline code blanked out, keeping every offset.
+
+    Opening fence lines keep their attributes, which may carry an id. An
+    unclosed fence runs to the end of the file, as in pandoc.
+    """
+    lines = text.split("\n")
+    fence = None
+    for i, line in enumerate(lines):
+        match = _FENCE_PATTERN.match(line)
+        if fence is None:
+            if match:
+                fence = match.group(1)
+                lines[i] = " " * match.end() + line[match.end() :]
+            continue
+        if match and match.group(1).startswith(fence) and not line[match.end() :].strip():
+            fence = None
+        lines[i] = " " * len(line)
+    return _CODE_SPAN_PATTERN.sub(_blank, "\n".join(lines))
+
+
+def scan_file(path: Path, text: str) -> FileLinks:
+    """Collect a content file's anchors and references, and check its images."""
+    result = FileLinks(path)
+    # Scanned with a leading newline, so that patterns for the start of a
+    # line can begin with a literal "\n": re searches for a literal
+    # prefix far faster than it tries ^ at every offset
+    text = "\n" + text
+    masked = "\n" + _mask_code(text[1:])
+    line_starts = [m.end() for m in re.finditer(r"\n", masked)]
+
+    def _line(offset: int) -> int:
+        return bisect.bisect_right(line_starts, offset)
+
+    heading_lines: set[int] = set()
+    for match in _HEADING_PATTERN.finditer(masked):
+        line = _line(match.start(1))
+        heading_lines.add(line)
+        # The masked heading has no code; identifiers come from the original
+        heading = text[match.start(1) : match.end(1)].rstrip()
+        attrs = _HEADING_ATTRS_PATTERN.search(heading)
+        explicit = re.search(r"(?<![^\s])#([^\s]+)", attrs.group(1)) if attrs else None
+        if explicit:
+            result.anchors.append(Anchor(explicit.group(1), line, explicit=True))
+        else:
+            heading = heading[: attrs.start()] if attrs else heading
+            heading = re.sub(r"\s+#+$", "", heading)
+            result.anchors.append(Anchor(heading_identifier(heading), line, explicit=False))
+
+    for pattern in (_ATTRS_ID_PATTERN, _HTML_ID_PATTERN):
+        for match in pattern.finditer(masked):
+            line = _line(match.start())
+            if pattern is _ATTRS_ID_PATTERN and line in heading_lines:
+                continue  # The heading's own id, already collected
+            result.anchors.append(Anchor(match.group(1), line, explicit=True))
+
+    for match in _LINK_PATTERN.finditer(masked):
+        image = masked[match.start() - 1] == "!"
+        result.references.append(Reference(match.group(1), _line(match.start()), image))
+    for match in _REFERENCE_PATTERN.finditer(masked):
+        result.references.append(Reference(match.group(1), _line(match.start(1)), image=False))
+    for match in _HTML_LINK_PATTERN.finditer(masked):
+        image = match.group(1).lower() == "img"
+        result.references.append(Reference(match.group(3), _line(match.start()), image=image))
+
+    for reference in result.references:
+        reference.target = html.unescape(reference.target.strip("<>"))
+        if (
+            reference.image
+            and not _REMOTE_PATTERN.match(reference.target)
+            and resolve_image(unquote(reference.target), path.parent) is None
+        ):
+            result.missing_images.append(reference)
+
+    result.references.sort(key=lambda r: r.line)
+    return result
+
+
+def _scan_worker(item: tuple[Path, str]) -> FileLinks:
+    return scan_file(*item)
+
+
+def scan_files(files: list[tuple[Path, str]], jobs: int | None = None) -> list[FileLinks]:
+    """scan_file for each (path, text), in a process pool when worthwhile."""
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(files) < PARALLEL_MIN_FILES:
+        return [scan_file(path, text) for path, text in files]
+    with ProcessPoolExecutor(min(jobs, len(files))) as pool:
+        return list(pool.map(_scan_worker, files, chunksize=max(1, len(files) // (jobs * 4))))
+
+
+def anchor_index(scans: list[FileLinks]) -> tuple[dict[str, Path], list[Problem]]:
+    """Identifier -> the file that defines it first, and duplicate explicit ids.
+
+    Repeated auto identifiers are normal (pandoc numbers them) and are
+    not reported.
+    """
+    owners: dict[str, tuple[Path, Anchor]] = {}
+    problems = []
+    for scan in scans:
+        for anchor in scan.anchors:
+            first = owners.setdefault(anchor.name, (scan.path, anchor))
+            if first[1] is not anchor and anchor.explicit:
+                where = _display(first[0])
+                problems.append(
+                    Problem(
+                        scan.path,
+                        anchor.line,
+                        f"duplicate id #{anchor.name} (first defined at {where}:{first[1].line})",
+                    )
+                )
+    return {name: path for name, (path, _) in owners.items()}, problems
+
+
+def check_references(scans: list[FileLinks], anchors: dict[str, Path]) -> list[Problem]:
+    """Problems with the links and images of each scanned file."""
+    content_files = {scan.path for scan in scans}
+    problems = []
+    for scan in scans:
+        problems.extend(
+            Problem(scan.path, r.line, f"image not found: {r.target}") for r in scan.missing_images
+        )
+        for reference in scan.references:
+            target = reference.target
+            if reference.image or _REMOTE_PATTERN.match(target):
+                continue
+            if target.startswith("#"):
+                if unquote(target[1:]) not in anchors:
+                    problems.append(
+                        Problem(scan.path, reference.line, f"no heading or id for link {target}")
+                    )
+                continue
+            file_part = unquote(target.partition("#")[0])
+            linked = (scan.path.parent / file_part).resolve()
+            if linked in content_files:
+                problems.append(
+                    Problem(
+                        scan.path,
+                        reference.line,
+                        f"link to content file {target}: the book is one document, "
+                        "link the heading's #id instead",
+                    )
+                )
+            elif not linked.exists():
+                problems.append(
+                    Problem(scan.path, reference.line, f"link target not found: {target}")
+                )
+    return sorted(problems, key=lambda p: (str(p.path), p.line))
+
+
+def check_links(jobs: int | None = None) -> tuple[list[FileLinks], list[Problem]]:
+    """Scan the manuscript and return its scans and every problem found."""
+    manifest = load_manifest()
+    scans = scan_files([(f.path, f.text) for f in manifest.files], jobs)
+    anchors, problems = anchor_index(scans)
+    return scans, sorted(
+        problems + check_references(scans, anchors), key=lambda p: (str(p.path), p.line)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check internal links, anchors and images")
+    parser.add_argument("--jobs", type=int, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    scans, problems = check_links(args.jobs)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    for problem in problems:
+        print(problem)
+    anchors = sum(len(scan.anchors) for scan in scans)
+    references = sum(len(scan.references) for scan in scans)
+    status = f"{len(problems)} problem(s)" if problems else "no problems"
+    print(
+        f"{len(scans)} files, {anchors} anchors, {references} links and images: "
+        f"{status} ({elapsed:.0f} ms)"
+    )
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
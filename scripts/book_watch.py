@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""File watching for the builds' --watch mode.
+
+Watches directory trees and reports changes in debounced batches, so an
+editor saving several files (or one file several times) triggers a
+single rebuild. On Linux the kernel's inotify is used through ctypes;
+elsewhere, or when inotify is unavailable or out of watches, the trees
+are polled for size and mtime changes.
+
+Editor droppings (dotfiles, backups, swap and temporary files) are
+ignored.
+
+    from book_watch import watch
+
+    watch([CONTENT_DIR], rebuild)   # build, then rebuild(changed) per batch
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+DEBOUNCE_SECONDS = 0.3
+POLL_INTERVAL_SECONDS = 0.5
+
+IGNORED_SUFFIXES = (".swp", ".swx", ".tmp", "~")
+
+# inotify(7) constants
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_MODIFY
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def is_ignored(path: Path) -> bool:
+    """Editor and build droppings that should never trigger a rebuild."""
+    name = path.name
+    return name.startswith((".", "#")) or name.endswith(IGNORED_SUFFIXES) or name == "4913"
+
+
+class PollingWatcher:
+    """Detects changes by comparing size and mtime snapshots."""
+
+    name = "polling"
+
+    def __init__(self, roots: Iterable[Path], interval: float = POLL_INTERVAL_SECONDS):
+        self.roots = [Path(r) for r in roots]
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        snapshot = {}
+        for root in self.roots:
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+                for filename in filenames:
+                    path = Path(dirpath) / filename
+                    try:
+                        stat = path.stat()
+                    except FileNotFoundError:
+                        continue
+                    snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def poll(self, timeout: float) -> set[Path]:
+        """Changed paths since the last call, waiting up to timeout for any."""
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self._scan()
+            changed = {
+                path
+                for path in current.keys() | self._snapshot.keys()
+                if current.get(path) != self._snapshot.get(path)
+            }
+            self._snapshot = current
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify over every directory under the roots."""
+
+    name = "inotify"
+
+    def __init__(self, roots: Iterable[Path]):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._fd = libc.inotify_init1(IN_CLOEXEC | IN_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: dict[int, Path] = {}
+        try:
+            for root in roots:
+                for dirpath, dirnames, _ in os.walk(root):
+                    dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+                    self._watch(Path(dirpath))
+        except OSError:
+            self.close()
+            raise
+
+    def _watch(self, directory: Path) -> None:
+        wd = self._add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self._dirs[wd] = directory
+
+    def poll(self, timeout: float) -> set[Path]:
+        """Paths named by events within timeout seconds."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not is_ignored(path):
+                    self._watch(path)
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def open_watcher(roots: Iterable[Path], polling: bool = False):
+    """An inotify watcher where possible, otherwise a polling one."""
+    roots = [Path(r) for r in roots]
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError) as exc:
+            print(f"  inotify unavailable ({exc}); polling instead")
+    return PollingWatcher(roots)
+
+
+def next_batch(watcher, debounce: float = DEBOUNCE_SECONDS) -> set[Path]:
+    """Block until files change, then gather changes until debounce seconds pass quietly."""
+    changed: set[Path] = set()
+    while not changed:
+        changed = {p for p in watcher.poll(3600) if not is_ignored(p)}
+    while True:
+        more = watcher.poll(debounce)
+        if not more:
+            return changed
+        changed.update(p for p in more if not is_ignored(p))
+
+
+def _rebuild(rebuild: Callable[[set[Path]], object], changed: set[Path]) -> None:
+    start = time.monotonic()
+    try:
+        rebuild(changed)
+    except SystemExit as exc:
+        if exc.code not in (None, 0):
+            print(f"--- Build failed (exit {exc.code}); waiting for changes")
+            return
+    except Exception as exc:  # Keep watching whatever the build raised
+        print(f"--- Build failed: {exc!r}; waiting for changes")
+        return
+    print(f"--- Built in {time.monotonic() - start:.1f}s; waiting for changes")
+
+
+def watch(
+    roots: Iterable[Path],
+    rebuild: Callable[[set[Path]], object],
+    relevant: Callable[[Path], bool] = lambda path: True,
+    polling: bool = False,
+    debounce: float = DEBOUNCE_SECONDS,
+) -> None:
+    """Build once, then call rebuild(changed) for every batch of relevant changes.
+
+    The first call gets an empty set. A build that fails (including by
+    sys.exit) is reported and the watch continues. Returns on Ctrl-C.
+    """
+    roots = [Path(r) for r in roots if Path(r).exists()]
+    watcher = open_watcher(roots, polling=polling)
+    try:
+        _rebuild(rebuild, set())
+        shown = ", ".join(os.path.relpath(root) for root in roots)
+        print(f"\nWatching {shown} ({watcher.name}); Ctrl-C to stop")
+        while True:
+            changed = {path for path in next_batch(watcher, debounce) if relevant(path)}
+            if changed:
+                names = ", ".join(sorted(path.name for path in changed))
+                print(f"\n--- {time.strftime('%H:%M:%S')} changed: {names}")
+                _rebuild(rebuild, changed)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    finally:
+        watcher.close()
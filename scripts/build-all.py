@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""Build every book artifact with one command.
+
+Runs the cover, EPUB and PDF builds as a dependency graph instead of a
+fixed sequence. Targets whose dependencies are done run concurrently:
+the content is parsed into the shared AST cache once, up front, while
+its internal links are checked (a broken link stops the book builds
+before pandoc runs); the print PDF needs neither the cover nor the
+EPUB, so it starts as soon as those are done; the EPUB and screen PDF
+wait for output/front-cover.png, and the full-wrap print cover waits
+for the print PDF's page count.
+
+Each target's output is streamed with a [target] prefix. A timing
+summary, including the critical path through the graph, is printed at
+the end, and every target's phase trace is merged into one Chrome
+trace-event timeline at output/build-trace.json.
+
+Usage:
+  python scripts/build-all.py [--git-hash HASH] [--build-date DATE]
+                              [--jobs N] [TARGET ...]
+
+Targets: content, links, ast, cover, epub, pdf-screen, pdf-print, cover-wrap
+(default: all)
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from build_trace import TRACE_DIR, Tracer, merge_traces
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = REPO_ROOT / "scripts"
+BUILD_TRACE = REPO_ROOT / "output" / "build-trace.json"
+
+TRACE = Tracer("build-all")
+
+
+@dataclass
+class Target:
+    """A build step: the script it runs and the targets it waits for."""
+
+    name: str
+    script: str
+    args: list[str] = field(default_factory=list)
+    deps: list[str] = field(default_factory=list)
+    build_info: bool = True
+
+
+@dataclass
+class Result:
+    """Outcome and timing of a finished target (seconds since build start)."""
+
+    name: str
+    returncode: int
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+TARGETS = [
+    Target("content", "book_content.py", build_info=False),
+    Target("links", "book_links.py", deps=["content"], build_info=False),
+    Target("ast", "book_ast.py", deps=["content"], build_info=False),
+    Target("cover", "build-cover.py"),
+    Target("epub", "build-epub.py", deps=["links", "ast", "cover"]),
+    Target("pdf-screen", "build-pdf.py", ["--variant", "screen"], deps=["links", "ast", "cover"]),
+    Target("pdf-print", "build-pdf.py", ["--variant", "print"], deps=["links", "ast"]),
+    Target("cover-wrap", "build-cover.py", ["--wrap"], deps=["cover", "pdf-print"]),
+]
+
+_print_lock = threading.Lock()
+
+
+def log(prefix: str, line: str) -> None:
+    """Print a line of target output without interleaving other targets."""
+    with _print_lock:
+        print(f"[{prefix}] {line}", flush=True)
+
+
+def select_targets(names: list[str]) -> dict[str, Target]:
+    """Return the requested targets plus everything they depend on."""
+    by_name = {t.name: t for t in TARGETS}
+    selected: dict[str, Target] = {}
+
+    def _add(name: str) -> None:
+        if name in selected:
+            return
+        for dep in by_name[name].deps:
+            _add(dep)
+        selected[name] = by_name[name]
+
+    for name in names or by_name:
+        _add(name)
+    return selected
+
+
+def trace_path_for(target: Target) -> Path:
+    """Where a target's script writes its phase trace."""
+    return TRACE_DIR / f"{target.name}.json"
+
+
+def run_target(
+    target: Target, git_hash: str | None, build_date: str | None, origin: float
+) -> Result:
+    """Run one target's script, streaming its output with a prefix."""
+    cmd = [sys.executable, str(SCRIPTS_DIR / target.script), *target.args]
+    if target.build_info and git_hash:
+        cmd.extend(["--git-hash", git_hash])
+    if target.build_info and build_date:
+        cmd.extend(["--build-date", build_date])
+
+    trace_path = trace_path_for(target)
+    trace_path.unlink(missing_ok=True)
+
+    start = time.monotonic() - origin
+    log(target.name, f"$ {' '.join(cmd[1:])}")
+    with TRACE.phase(target.name) as trace_args:
+        proc = subprocess.Popen(
+            cmd,
+            cwd=REPO_ROOT,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            env={**os.environ, "PYTHONUNBUFFERED": "1", "BUILD_TRACE": str(trace_path)},
+        )
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            log(target.name, line.rstrip("\n"))
+        returncode = trace_args["returncode"] = proc.wait()
+    end = time.monotonic() - origin
+
+    status = "ok" if returncode == 0 else f"FAILED (exit {returncode})"
+    log(target.name, f"{status} in {end - start:.1f}s")
+    return Result(target.name, returncode, start, end)
+
+
+def run_graph(
+    targets: dict[str, Target], jobs: int, git_hash: str | None, build_date: str | None
+) -> dict[str, Result]:
+    """Run targets as their dependencies complete, up to `jobs` at a time.
+
+    After a failure no new targets are started; running ones finish.
+    """
+    origin = time.monotonic()
+    results: dict[str, Result] = {}
+    pending = dict(targets)
+    running: dict[Future, str] = {}
+    failed = False
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            if not failed:
+                ready = [
+                    t
+                    for t in pending.values()
+                    if all(d in results and results[d].returncode == 0 for d in t.deps)
+                ]
+                for t in ready[: jobs - len(running)]:
+                    del pending[t.name]
+                    running[pool.submit(run_target, t, git_hash, build_date, origin)] = t.name
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                results[running.pop(future)] = result
+                failed = failed or result.returncode != 0
+
+    return results
+
+
+def critical_path(targets: dict[str, Target], results: dict[str, Result]) -> list[str]:
+    """The dependency chain with the longest total duration."""
+    best: dict[str, tuple[float, list[str]]] = {}
+    for name in targets:  # select_targets() orders dependencies first
+        if name not in results:
+            continue
+        longest = max(
+            (best[d] for d in targets[name].deps if d in best),
+            key=lambda entry: entry[0],
+            default=(0.0, []),
+        )
+        best[name] = (longest[0] + results[name].duration, [*longest[1], name])
+    if not best:
+        return []
+    return max(best.values(), key=lambda entry: entry[0])[1]
+
+
+def print_summary(targets: dict[str, Target], results: dict[str, Result]) -> None:
+    """Print per-target timings and the critical path."""
+    total = max((r.end for r in results.values()), default=0.0)
+
+    print(f"\n{'=' * 60}")
+    print("  Build summary")
+    print(f"{'=' * 60}\n")
+    print(f"  {'target':<12} {'status':<8} {'start':>7} {'end':>7} {'time':>7}")
+    for name in targets:
+        r = results.get(name)
+        if r is None:
+            print(f"  {name:<12} skipped")
+            continue
+        status = "ok" if r.returncode == 0 else "FAILED"
+        print(f"  {name:<12} {status:<8} {r.start:>6.1f}s {r.end:>6.1f}s {r.duration:>6.1f}s")
+
+    path = critical_path(targets, results)
+    serial = sum(r.duration for r in results.values())
+    print(f"\n  Critical path: {' -> '.join(path)}")
+    print(f"    ({sum(results[n].duration for n in path):.1f}s of {total:.1f}s wall clock)")
+    print(f"  Sequential time: {serial:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build all SDD Book artifacts")
+    parser.add_argument("targets", nargs="*", help="Targets to build (default: all)")
+    parser.add_argument("--git-hash", help="Short git hash or version tag")
+    parser.add_argument("--build-date", help="Build date (YYYY.MM.DD)")
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=min(4, os.cpu_count() or 1),
+        help="Maximum targets to run at once (default: min(4, CPU count))",
+    )
+    args = parser.parse_args()
+
+    known = [t.name for t in TARGETS]
+    unknown = [name for name in args.targets if name not in known]
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(unknown)} (choose from {', '.join(known)})")
+
+    targets = select_targets(args.targets)
+    print(f"Building {', '.join(targets)} with {args.jobs} worker(s)...\n")
+
+    results = run_graph(targets, max(1, args.jobs), args.git_hash, args.build_date)
+    print_summary(targets, results)
+
+    merge_traces(
+        [trace_path_for(targets[name]) for name in results], BUILD_TRACE, TRACE.trace_events()
+    )
+    print(f"  Trace: {BUILD_TRACE.relative_to(REPO_ROOT)}")
+
+    if len(results) < len(targets) or any(r.returncode != 0 for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
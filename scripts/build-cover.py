@@ -2,20 +2,48 @@
 """Build cover PNGs from SVG sources.
 
 Injects build metadata (git hash/tag + date) into the front cover SVG
-before rendering to PNG.
+before rendering to PNG. The SVG is piped to rsvg-convert on stdin, and
+the covers render concurrently.
+
+Each render is keyed by a hash of the SVG (after injection) and the
+output size. A PNG whose key matches the previous render is left alone;
+keys are kept in output/.cache/cover-renders.json.
+
+With --wrap, the back cover, spine and front cover are also composited
+into one print-ready full-wrap cover (output/cover-wrap.pdf and .png).
+The wrap is assembled from the injected SVG sources held in memory, not
+from the PNGs. Spine width comes from the print PDF's page count and the
+paper caliper in tokens.json; trim and bleed come from the same page
+tokens. Ghostscript converts the wrap PDF to CMYK for the printer, so
+--wrap fails without it. scripts/benchmark-cover.py times the wrap.
 
 Usage:
-  python scripts/build-cover.py [--git-hash HASH] [--build-date DATE]
+  python scripts/build-cover.py [--git-hash HASH] [--build-date DATE] [--force]
+  python scripts/build-cover.py --wrap [--pages N] [--dpi DPI]
 """
 
 import argparse
+import hashlib
+import json
+import re
+import shutil
 import subprocess
 import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 
+from build_trace import Tracer
+
 REPO_ROOT = Path(__file__).resolve().parent.parent
 COVER_DIR = REPO_ROOT / "assets" / "cover"
 OUTPUT_DIR = REPO_ROOT / "output"
+RENDER_CACHE = OUTPUT_DIR / ".cache" / "cover-renders.json"
+TOKENS_FILE = REPO_ROOT / ".brandmcp" / "brand" / "tokens.json"
+PRINT_PDF = OUTPUT_DIR / "spec-driven-development-print.pdf"
+WRAP_NAME = "cover-wrap"
+WRAP_DPI = 300
 
 # Cover definitions: (svg_name, output_name, width, height)
 COVERS = [
@@ -24,9 +52,20 @@ COVERS = [
     ("back-cover.svg", "back-cover.png", 1600, 2286),
 ]
 
+# Full-wrap panel order, left to right as the printer lays the cover flat
+WRAP_ORDER = ["back-cover.png", "spine.png", "front-cover.png"]
+
+_SVG_ROOT_PATTERN = re.compile(r"<svg\b([^>]*)>", re.DOTALL)
+_VIEWBOX_PATTERN = re.compile(r'viewBox="([^"]+)"')
+_PAGES_DICT_PATTERN = re.compile(rb"<<[^<>]*?/Type\s*/Pages\b[^<>]*?>>", re.DOTALL)
+_COUNT_PATTERN = re.compile(rb"/Count\s+(\d+)")
+_STREAM_PATTERN = re.compile(rb"/Type\s*/ObjStm\b.*?stream\r?\n(.*?)endstream", re.DOTALL)
+
+TRACE = Tracer("build-cover")
 
-def check_deps():
-    """Verify rsvg-convert is available."""
+
+def check_deps(wrap: bool = False):
+    """Verify rsvg-convert (and, for the wrap, Ghostscript) is available."""
     try:
         subprocess.run(
             ["rsvg-convert", "--version"],
@@ -36,6 +75,9 @@ def check_deps():
     except FileNotFoundError:
         print("Error: rsvg-convert not found. Run scripts/setup-deps.sh first.")
         sys.exit(1)
+    if wrap and not shutil.which("gs"):
+        print("Error: gs not found; the print wrap must be CMYK. Run scripts/setup-deps.sh first.")
+        sys.exit(1)
 
 
 def build_ref(git_hash: str | None, build_date: str | None) -> str:
@@ -53,24 +95,56 @@ def build_ref(git_hash: str | None, build_date: str | None) -> str:
     return " · ".join(parts)
 
 
-def inject_metadata(svg_path: Path, ref: str) -> Path:
-    """Replace {{BUILD_REF}} token in SVG, return path to processed file.
+def inject_metadata(content: str, ref: str) -> str:
+    """Replace the {{BUILD_REF}} token in SVG source.
 
-    If no token is found, returns the original path unchanged.
+    If no token is found, returns the content unchanged.
     """
-    content = svg_path.read_text(encoding="utf-8")
-
     if "{{BUILD_REF}}" not in content:
-        return svg_path
+        return content
 
-    content = content.replace("{{BUILD_REF}}", ref)
-
-    # Write to a temp file alongside the original so rsvg-convert
-    # can resolve any relative references
-    tmp_path = svg_path.parent / f".{svg_path.stem}-build{svg_path.suffix}"
-    tmp_path.write_text(content, encoding="utf-8")
     print(f"  Injected build ref: {ref}")
-    return tmp_path
+    return content.replace("{{BUILD_REF}}", ref)
+
+
+def render_key(svg: bytes, width: int, height: int, color: str = "") -> str:
+    """Cache key for a render: the SVG as rendered plus the output size
+    and, for the wrap PDF, its colour mode ("cmyk" or "rgb")."""
+    return hashlib.sha256(svg + f"\0{width}x{height}{color}".encode()).hexdigest()
+
+
+def load_render_cache() -> dict[str, str]:
+    """Return {png_name: render_key} from the previous build."""
+    try:
+        return json.loads(RENDER_CACHE.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_render_cache(keys: dict[str, str]) -> None:
+    RENDER_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    RENDER_CACHE.write_text(json.dumps(keys, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def render_svg(svg: bytes, width: int, height: int, png_path: Path) -> None:
+    """Render SVG source to PNG, passing the SVG to rsvg-convert on stdin.
+
+    The cover SVGs reference no external files, so no base URI is needed.
+    """
+    TRACE.run(
+        f"rasterize {png_path.name}",
+        [
+            "rsvg-convert",
+            "-w",
+            str(width),
+            "-h",
+            str(height),
+            "-o",
+            str(png_path),
+        ],
+        input=svg,
+        check=True,
+    )
 
 
 def build_cover(
@@ -80,55 +154,261 @@ def build_cover(
     height: int,
     git_hash: str | None = None,
     build_date: str | None = None,
-):
-    """Convert a single SVG to PNG, injecting metadata if applicable."""
+    previous_key: str | None = None,
+) -> tuple[str, bytes] | None:
+    """Convert a single SVG to PNG, injecting metadata if applicable.
+
+    Skips the render when previous_key matches and the PNG exists.
+    Returns (render_key, svg_as_rendered), or None if the SVG is missing.
+    """
     svg_path = COVER_DIR / svg_name
     png_path = OUTPUT_DIR / png_name
 
     if not svg_path.exists():
         print(f"  Skipping {svg_name} (not found)")
-        return
+        return None
+
+    content = svg_path.read_text(encoding="utf-8")
 
     # Inject build metadata into front cover
-    tmp_path = None
     if svg_name == "front-cover.svg" and (git_hash or build_date):
-        ref = build_ref(git_hash, build_date)
-        render_path = inject_metadata(svg_path, ref)
-        if render_path != svg_path:
-            tmp_path = render_path
-    else:
-        render_path = svg_path
+        content = inject_metadata(content, build_ref(git_hash, build_date))
 
-    try:
-        subprocess.run(
-            [
-                "rsvg-convert",
-                "-w",
-                str(width),
-                "-h",
-                str(height),
-                str(render_path),
-                "-o",
-                str(png_path),
-            ],
+    svg = content.encode("utf-8")
+    key = render_key(svg, width, height)
+    if key == previous_key and png_path.exists():
+        print(f"  {svg_name} -> {png_name} (unchanged, skipped)")
+        return key, svg
+
+    render_svg(svg, width, height, png_path)
+    size_kb = png_path.stat().st_size / 1024
+    print(f"  {svg_name} -> {png_name} ({size_kb:.0f} KB)")
+    return key, svg
+
+
+# === FULL-WRAP COVER ===
+
+
+@dataclass
+class PageSpec:
+    """Print page geometry from tokens.json, in inches."""
+
+    trim_width: float
+    trim_height: float
+    bleed: float
+    caliper: float
+    background: str
+
+
+def _inches(value: str) -> float:
+    """Parse a tokens.json length such as "0.125in"."""
+    return float(value.removesuffix("in"))
+
+
+def load_page_tokens() -> PageSpec:
+    """Read trim size, bleed, paper caliper and background from tokens.json."""
+    tokens = json.loads(TOKENS_FILE.read_text(encoding="utf-8"))
+    page = tokens["page"]
+    trim_width, trim_height = (float(v) for v in page["trim"].removesuffix("in").split("x"))
+    return PageSpec(
+        trim_width=trim_width,
+        trim_height=trim_height,
+        bleed=_inches(page["bleed"]),
+        caliper=_inches(page["paper-caliper"]),
+        background=tokens["colours"]["background"],
+    )
+
+
+def count_pdf_pages(pdf_path: Path) -> int:
+    """Return the page count from a PDF's page tree root.
+
+    Looks in the raw file and in compressed object streams (xdvipdfmx
+    writes the page tree into those), taking the largest /Count of any
+    /Type /Pages dictionary.
+    """
+    data = pdf_path.read_bytes()
+    chunks = [data]
+    for match in _STREAM_PATTERN.finditer(data):
+        try:
+            chunks.append(zlib.decompress(match.group(1)))
+        except zlib.error:
+            continue
+
+    counts = [
+        int(count)
+        for chunk in chunks
+        for pages in _PAGES_DICT_PATTERN.findall(chunk)
+        for count in _COUNT_PATTERN.findall(pages)
+    ]
+    if not counts:
+        raise ValueError(f"Could not find a page count in {pdf_path}")
+    return max(counts)
+
+
+def _place(svg: bytes, x: float, y: float, width: float, height: float) -> str:
+    """Re-root a cover SVG as a nested panel at the given position (inches).
+
+    Panels are scaled to the full height and centred, cropping any
+    horizontal overflow, so the artwork keeps its proportions.
+    """
+    content = svg.decode("utf-8")
+    root = _SVG_ROOT_PATTERN.search(content)
+    if not root:
+        raise ValueError("Cover SVG has no <svg> root element")
+    viewbox = _VIEWBOX_PATTERN.search(root.group(1))
+    if not viewbox:
+        raise ValueError("Cover SVG has no viewBox")
+    inner = content[root.end() : content.rindex("</svg>")]
+    return (
+        f'<svg x="{x:.4f}" y="{y:.4f}" width="{width:.4f}" height="{height:.4f}" '
+        f'viewBox="{viewbox.group(1)}" preserveAspectRatio="xMidYMid slice">'
+        f"{inner}</svg>"
+    )
+
+
+def compose_wrap(pieces: dict[str, bytes], spine_width: float, page: PageSpec) -> bytes:
+    """Lay out back cover, spine and front cover as one SVG in inches.
+
+    The bleed margin around the wrap is filled with the cover background.
+    """
+    trim_w, trim_h, bleed = page.trim_width, page.trim_height, page.bleed
+    widths = {"back-cover.png": trim_w, "spine.png": spine_width, "front-cover.png": trim_w}
+    total_w = 2 * trim_w + spine_width + 2 * bleed
+    total_h = trim_h + 2 * bleed
+
+    panels = []
+    x = bleed
+    for name in WRAP_ORDER:
+        panels.append(_place(pieces[name], x, bleed, widths[name], trim_h))
+        x += widths[name]
+
+    return (
+        '<svg xmlns="http://www.w3.org/2000/svg" '
+        f'width="{total_w:.4f}in" height="{total_h:.4f}in" '
+        f'viewBox="0 0 {total_w:.4f} {total_h:.4f}">'
+        f'<rect width="{total_w:.4f}" height="{total_h:.4f}" fill="{page.background}"/>'
+        + "".join(panels)
+        + "</svg>"
+    ).encode("utf-8")
+
+
+def convert_to_cmyk(pdf_path: Path) -> None:
+    """Convert a PDF to DeviceCMYK in place with Ghostscript."""
+    tmp_path = pdf_path.with_suffix(".cmyk.pdf")
+    TRACE.run(
+        "cmyk",
+        [
+            "gs",
+            "-q",
+            "-dBATCH",
+            "-dNOPAUSE",
+            "-dSAFER",
+            "-sDEVICE=pdfwrite",
+            "-sColorConversionStrategy=CMYK",
+            "-dProcessColorModel=/DeviceCMYK",
+            f"-sOutputFile={tmp_path}",
+            str(pdf_path),
+        ],
+        check=True,
+    )
+    tmp_path.replace(pdf_path)
+
+
+def build_wrap(
+    pieces: dict[str, bytes],
+    pages: int,
+    dpi: int,
+    previous: dict[str, str],
+) -> dict[str, str]:
+    """Render the full-wrap cover to PDF and PNG.
+
+    Returns render keys for the cache; outputs whose key is unchanged
+    are skipped.
+    """
+    page = load_page_tokens()
+    spine_width = pages * page.caliper
+    svg = compose_wrap(pieces, spine_width, page)
+    total_w = 2 * page.trim_width + spine_width + 2 * page.bleed
+    total_h = page.trim_height + 2 * page.bleed
+    width_px, height_px = round(total_w * dpi), round(total_h * dpi)
+
+    print(f"\nBuilding full-wrap cover ({pages} pages, spine {spine_width:.3f}in)...")
+    keys = {}
+
+    pdf_path = OUTPUT_DIR / f"{WRAP_NAME}.pdf"
+    # Keyed as CMYK, so a wrap an older build left in RGB is re-rendered
+    pdf_key = render_key(svg, round(total_w * 72), round(total_h * 72), "cmyk")
+    if pdf_key == previous.get(pdf_path.name) and pdf_path.exists():
+        print(f"  {pdf_path.name} (unchanged, skipped)")
+    else:
+        TRACE.run(
+            f"rasterize {pdf_path.name}",
+            ["rsvg-convert", "-f", "pdf", "-o", str(pdf_path)],
+            input=svg,
             check=True,
         )
+        convert_to_cmyk(pdf_path)
+        size_kb = pdf_path.stat().st_size / 1024
+        print(f"  {pdf_path.name} ({total_w:.3f} x {total_h:.3f}in, CMYK, {size_kb:.0f} KB)")
+    keys[pdf_path.name] = pdf_key
+
+    png_path = OUTPUT_DIR / f"{WRAP_NAME}.png"
+    png_key = render_key(svg, width_px, height_px)
+    if png_key == previous.get(png_path.name) and png_path.exists():
+        print(f"  {png_path.name} (unchanged, skipped)")
+    else:
+        render_svg(svg, width_px, height_px, png_path)
         size_kb = png_path.stat().st_size / 1024
-        print(f"  {svg_name} -> {png_name} ({size_kb:.0f} KB)")
-    finally:
-        # Clean up temp file
-        if tmp_path and tmp_path.exists():
-            tmp_path.unlink()
+        print(f"  {png_path.name} ({width_px} x {height_px}px at {dpi} dpi, {size_kb:.0f} KB)")
+    keys[png_path.name] = png_key
+
+    return keys
 
 
-def main():
+def main(args: argparse.Namespace):
     """Build all cover images."""
     print("Building cover images...\n")
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    previous = {} if args.force else load_render_cache()
+
+    with TRACE.phase("covers"), ThreadPoolExecutor(max_workers=len(COVERS)) as pool:
+        futures = {
+            png_name: pool.submit(
+                build_cover,
+                svg_name,
+                png_name,
+                width,
+                height,
+                args.git_hash,
+                args.build_date,
+                previous.get(png_name),
+            )
+            for svg_name, png_name, width, height in COVERS
+        }
+
+    keys = {}
+    pieces = {}
+    for png_name, future in futures.items():
+        rendered = future.result()  # Re-raises a failed render
+        if rendered:
+            keys[png_name], pieces[png_name] = rendered
+
+    if args.wrap:
+        missing = [name for name in WRAP_ORDER if name not in pieces]
+        if missing:
+            print(f"Error: cannot build wrap without {', '.join(missing)}")
+            sys.exit(1)
+        if not args.pages and not PRINT_PDF.exists():
+            print(f"Error: {PRINT_PDF.name} not found. Build it first or pass --pages.")
+            sys.exit(1)
+        with TRACE.phase("count pages"):
+            pages = args.pages or count_pdf_pages(PRINT_PDF)
+
+        with TRACE.phase("wrap", pages=pages, dpi=args.dpi):
+            keys.update(build_wrap(pieces, pages, args.dpi, previous))
 
-    for svg_name, png_name, width, height in COVERS:
-        build_cover(svg_name, png_name, width, height, args.git_hash, args.build_date)
+    save_render_cache({**previous, **keys})
 
     print("\nDone.")
 
@@ -137,7 +417,18 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Build cover PNGs from SVG sources")
     parser.add_argument("--git-hash", help="Short git hash or version tag")
     parser.add_argument("--build-date", help="Build date (YYYY.MM.DD)")
+    parser.add_argument("--force", action="store_true", help="Re-render even if unchanged")
+    parser.add_argument("--wrap", action="store_true", help="Also build the print full-wrap cover")
+    parser.add_argument(
+        "--pages",
+        type=int,
+        help=f"Interior page count for the spine (default: read from {PRINT_PDF.name})",
+    )
+    parser.add_argument(
+        "--dpi", type=int, default=WRAP_DPI, help=f"Wrap PNG resolution (default: {WRAP_DPI})"
+    )
     args = parser.parse_args()
 
-    check_deps()
-    main()
+    check_deps(args.wrap)
+    with TRACE:
+        main(args)
@@ -2,10 +2,32 @@
 """
 SDD Book EPUB Build Script
 
-Usage: python scripts/build-epub.py [--git-hash HASH] [--build-date DATE]
-
-Assembles front matter, parts, chapters, and back matter into EPUB
-using pandoc. Scans content/ directory and includes files in order.
+Usage: python scripts/build-epub.py [--git-hash HASH] [--build-date DATE] [--watch [--poll]]
+                                   [--pandoc auto|server|subprocess]
+
+Converts each content file's cached pandoc AST (scripts/book_ast.py,
+shared with the PDF build) to an XHTML fragment with pandoc, then
+packages the fragments, navigation, metadata and cover into the EPUB
+container directly. Converted fragments are cached in output/.cache/epub/
+by a hash of the markdown text, the image variants and the build info,
+so a rebuild after editing one chapter only loads and converts that
+chapter's AST.
+
+Chapters that are not cached are converted together: in one batch
+request when a pandoc server is running ($PANDOC_SERVER, default
+http://127.0.0.1:3030; see scripts/pandoc_backend.py), otherwise by
+one pandoc process each. --pandoc forces either backend.
+
+An index page links each glossary and writers-guide term
+(scripts/book_index.py) to the sections that use it.
+
+With --watch, builds once and then rebuilds whenever content/,
+build/epub/, assets/fonts/ or the index's term sources change.
+Converted and assembled chapters are kept in memory: a content edit
+only converts and assembles the chapters that changed, and other edits
+(stylesheet, metadata, fonts, terms) just repackage the last build's
+chapters. The cover is not watched; after editing assets/cover/, run
+scripts/build-cover.py and save any watched file to pick it up.
 
 Dependencies:
   - pandoc
@@ -13,30 +35,135 @@ Dependencies:
 """
 
 import argparse
+import functools
+import hashlib
+import html
+import json
+import mimetypes
+import os
 import re
 import subprocess
 import sys
-import tempfile
+import time
+import uuid
+import zipfile
+from dataclasses import dataclass, field
 from pathlib import Path
 
+from book_ast import (
+    Document,
+    append_build_info,
+    dedupe_identifiers,
+    dumps,
+    header_identifiers,
+    parse_files,
+    rewrite_images,
+    unique_identifier,
+)
+from book_ast import cache_path_for as ast_cache_path
+from book_ast import prune_cache as prune_ast_cache
+from book_content import CONTENT_DIR, SECTION_ORDER, ContentFile, ContentManifest, load_manifest
+from book_fonts import FONT_DIR, faces_for_html, font_face_css, subset_fonts
+from book_images import ImageVariant, prepare_images, variant_path
+from book_index import (
+    TERM_SOURCES,
+    TermMatcher,
+    chapter_cache_path,
+    chapter_occurrences,
+    load_matcher,
+)
+from book_index import prune_cache as prune_index_cache
+from book_watch import watch
+from build_trace import Tracer
+from pandoc_backend import BACKENDS, Conversion, get_backend
+
 REPO_ROOT = Path(__file__).resolve().parent.parent
-CONTENT_DIR = REPO_ROOT / "content"
 COVER_IMAGE = REPO_ROOT / "output" / "front-cover.png"
 METADATA_FILE = REPO_ROOT / "build" / "epub" / "metadata.yaml"
 CSS_FILE = REPO_ROOT / "build" / "epub" / "styles.css"
 OUTPUT_DIR = REPO_ROOT / "output"
+CACHE_DIR = OUTPUT_DIR / ".cache" / "epub"
+# Each file's header identifiers as parsed, by AST cache key
+IDENTIFIERS_CACHE = CACHE_DIR / "identifiers.json"
 BOOK_TITLE = "spec-driven-development"
 
-SECTION_ORDER = [
-    "00-front-matter",
-    "01-part-1-foundation",
-    "02-part-2-writing-specifications",
-    "03-part-3-the-workflow",
-    "04-part-4-practice",
-    "05-part-5-governance-and-evolution",
-    "06-closing",
-    "07-back-matter",
-]
+# Per-chapter conversion: cached pandoc AST (scripts/book_ast.py) in,
+# XHTML body fragment out
+PANDOC_OPTIONS = {"from": "json", "to": "html5", "wrap": "none"}
+PANDOC_ARGS = Conversion("", PANDOC_OPTIONS).to_args()
+
+# auto, server or subprocess (--pandoc)
+PANDOC_BACKEND = "auto"
+
+TOC_DEPTH = 2
+
+# Gets the build info line
+COPYRIGHT_FILE = "02-copyright.md"
+
+# Generated from the glossary terms (scripts/book_index.py)
+INDEX_HREF = "text/index.xhtml"
+
+# What --watch rebuilds on
+WATCH_PATHS = [CONTENT_DIR, REPO_ROOT / "build" / "epub", FONT_DIR, TERM_SOURCES[0].parent]
+
+TRACE = Tracer("build-epub")
+
+# Fixed zip entry timestamp so unchanged content produces identical archives
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+CONTAINER_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="EPUB/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+
+XHTML_PAGE = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" xml:lang="{lang}" lang="{lang}">
+<head>
+<meta charset="utf-8" />
+<title>{title}</title>
+{stylesheet}</head>
+<body{body_attrs}>
+{body}
+</body>
+</html>
+"""
+
+NON_LINEAR = ' linear="no"'
+
+_HEADING_PATTERN = re.compile(r"<h([1-6])([^>]*)>(.*?)</h\1>", re.DOTALL)
+_ID_PATTERN = re.compile(r'\bid="([^"]+)"')
+_CLASS_PATTERN = re.compile(r'\bclass="([^"]+)"')
+_HREF_PATTERN = re.compile(r'href="#([^"]+)"')
+_IMG_SRC_PATTERN = re.compile(r'(<img\b[^>]*\bsrc=")([^"]+)(")')
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+
+
+@dataclass
+class Heading:
+    """A heading found in a converted chapter, used for navigation."""
+
+    level: int
+    anchor: str
+    text: str
+    listed: bool
+
+
+@dataclass
+class Chapter:
+    """A converted content file, ready to be packaged."""
+
+    source: Path
+    href: str
+    body: str
+    headings: list[Heading] = field(default_factory=list)
+
+    @property
+    def title(self) -> str:
+        return self.headings[0].text if self.headings else self.source.stem
 
 
 def check_deps():
@@ -48,43 +175,532 @@ def check_deps():
         sys.exit(1)
 
 
-def get_sort_key(path: Path) -> tuple[int, str]:
-    """Sort files by numeric prefix, then alphabetically."""
-    match = re.match(r"^(\d+)", path.stem)
-    return (int(match.group(1)) if match else 999, path.stem)
+@functools.cache
+def pandoc_backend():
+    """The conversion backend, probed for a pandoc server once per process."""
+    return get_backend(PANDOC_BACKEND, run=TRACE.run)
 
 
-def scan_content() -> list[Path]:
-    """Scan content directories and return files in book order."""
+@functools.cache
+def pandoc_version() -> str:
+    """Return the first line of `pandoc --version` (part of every cache key)."""
+    return pandoc_backend().version()
+
+
+def scan_content(manifest: ContentManifest) -> list[ContentFile]:
+    """List content files in book order, as recorded in the manifest."""
     all_files = []
+    by_section = manifest.by_section()
 
     for dirname in SECTION_ORDER:
-        dirpath = CONTENT_DIR / dirname
-        if not dirpath.exists():
-            print(f"  {dirname}/ (empty or missing)")
-            continue
-
-        files = sorted(dirpath.glob("*.md"), key=get_sort_key)
+        files = by_section.get(dirname)
         if files:
             print(f"  {dirname}/")
             for f in files:
                 print(f"    [ok] {f.name}")
                 all_files.append(f)
         else:
-            print(f"  {dirname}/ (empty)")
+            print(f"  {dirname}/ (empty or missing)")
 
     return all_files
 
 
-def build_epub(git_hash: str | None = None, build_date: str | None = None):
-    """Build the EPUB."""
-    output_file = OUTPUT_DIR / f"{BOOK_TITLE}.epub"
+def read_metadata(path: Path) -> dict[str, str | list[str]]:
+    """Read the flat YAML subset used by build/epub/metadata.yaml.
 
-    print(f"Building: {output_file.name}\n")
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    Supports `key: value` scalars, `- item` lists and `|` block scalars,
+    which is all the metadata file uses.
+    """
+    metadata: dict[str, str | list[str]] = {}
+    if not path.exists():
+        return metadata
 
+    key = None
+    block: list[str] | None = None
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.strip() in ("---", "..."):
+            continue
+        if block is not None and (line.startswith("  ") or not line.strip()):
+            block.append(line.strip())
+            continue
+        if block is not None and key:
+            metadata[key] = " ".join(part for part in block if part)
+            block = None
+        if line.startswith("  - ") and key:
+            items = metadata.setdefault(key, [])
+            if isinstance(items, list):
+                items.append(line.removeprefix("  - ").strip())
+            continue
+        match = re.match(r"^([\w-]+):\s*(.*)$", line)
+        if not match:
+            continue
+        key, value = match.group(1), match.group(2).strip()
+        if value == "|":
+            block = []
+        elif value:
+            metadata[key] = value.strip("\"'")
+        else:
+            metadata[key] = []
+    if block is not None and key:
+        metadata[key] = " ".join(part for part in block if part)
+    return metadata
+
+
+def cache_path_for(text: str) -> Path:
+    """Cache location for a source key's converted fragment (source_key).
+
+    The key covers the pandoc version, conversion arguments and the
+    exact source key.
+    """
+    key = hashlib.sha256("\0".join([pandoc_version(), *PANDOC_ARGS, text]).encode("utf-8"))
+    return CACHE_DIR / f"{key.hexdigest()}.xhtml"
+
+
+# Fragments this process has converted or read, keyed by cache file name;
+# lets --watch rebuilds skip the disk cache too
+_converted: dict[str, str] = {}
+
+# Chapters this process has assembled from those fragments (images
+# collected, headings found), keyed the same way; a --watch rebuild only
+# assembles the chapters whose fragment changed
+_assembled: dict[str, tuple[str, list[Heading], dict[str, bytes]]] = {}
+
+# The last build's (source keys, chapters, media), reused by --watch
+# rebuilds when nothing under content/ changed
+_last_content: tuple[list[str], list[Chapter], dict[str, bytes]] | None = None
+
+
+def cached_fragment(text: str) -> str | None:
+    """A previously converted fragment for text, from memory or the disk cache."""
+    cache_path = cache_path_for(text)
+    if cache_path.name not in _converted and cache_path.exists():
+        _converted[cache_path.name] = cache_path.read_text(encoding="utf-8")
+    return _converted.get(cache_path.name)
+
+
+def store_fragment(text: str, fragment: str) -> None:
+    """Cache a converted fragment in memory and on disk."""
+    cache_path = cache_path_for(text)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(fragment, encoding="utf-8")
+    tmp_path.replace(cache_path)
+    _converted[cache_path.name] = fragment
+
+
+def images_key(images: dict[Path, ImageVariant]) -> str:
+    """Identify a set of image variants, for source keys."""
+    pairs = sorted(f"{source}={variant.path.name}" for source, variant in images.items())
+    return hashlib.sha256("\0".join(pairs).encode("utf-8")).hexdigest()
+
+
+def header_identifiers_of(files: list[ContentFile]) -> list[list[str]]:
+    """Each file's header identifiers as pandoc's reader assigns them.
+
+    Kept in IDENTIFIERS_CACHE, so a warm build loads no ASTs; only files
+    missing from it are parsed.
+    """
+    version = pandoc_version()
+    names = [ast_cache_path(f.text, version).stem for f in files]
+    try:
+        cached = json.loads(IDENTIFIERS_CACHE.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        cached = {}
+    missing = [(f, name) for f, name in zip(files, names, strict=True) if name not in cached]
+    if missing:
+        documents = parse_files([f for f, _ in missing], pandoc_backend())
+        for (_, name), doc in zip(missing, documents, strict=True):
+            cached[name] = header_identifiers(doc)
+    identifiers = {name: cached[name] for name in names}
+    if missing or len(identifiers) != len(cached):
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = IDENTIFIERS_CACHE.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(identifiers), encoding="utf-8")
+        tmp_path.replace(IDENTIFIERS_CACHE)
+    return [identifiers[name] for name in names]
+
+
+def book_identifiers(files: list[ContentFile]) -> list[list[str]]:
+    """Each file's header identifiers once repeats across the book are
+    numbered, as dedupe_identifiers numbers them in file order."""
+    seen: set[str] = set()
+    return [
+        [unique_identifier(identifier, seen) for identifier in identifiers]
+        for identifiers in header_identifiers_of(files)
+    ]
+
+
+def source_key(f: ContentFile, images: str, build_info: str, identifiers: list[str]) -> str:
+    """Everything a file's fragment depends on besides pandoc itself.
+
+    Known without parsing, so a warm build never loads an AST. The
+    images key covers every variant rather than just the file's own, so
+    changing an image reconverts every chapter. identifiers are the
+    file's header identifiers after book-wide numbering (book_identifiers).
+    """
+    return "\0".join(
+        [f.text, images, build_info if f.name == COPYRIGHT_FILE else "", " ".join(identifiers)]
+    )
+
+
+def prepare_source(
+    f: ContentFile,
+    doc: Document,
+    images: dict[Path, ImageVariant],
+    git_hash: str | None,
+    build_date: str | None,
+    seen: set[str],
+) -> str:
+    """A file's parsed AST as pandoc input: header identifiers already
+    used by earlier files (seen) are numbered, images point at their
+    EPUB variants, and the copyright page gets the build info."""
+    dedupe_identifiers(doc, seen)
+    if images:
+        rewrite_images(doc, lambda src: variant_path(src, f.path.parent, images))
+    if f.name == COPYRIGHT_FILE and (git_hash or build_date):
+        append_build_info(doc, git_hash, build_date)
+    return dumps(doc)
+
+
+def convert_chapters(
+    files: list[ContentFile],
+    keys: list[str],
+    identifiers: list[list[str]],
+    images: dict[Path, ImageVariant],
+    git_hash: str | None = None,
+    build_date: str | None = None,
+) -> list[tuple[str, bool]]:
+    """Convert content files to XHTML body fragments, reusing cached output.
+
+    identifiers are each file's numbered header identifiers
+    (book_identifiers). Only uncached files are parsed (through the
+    shared AST cache), and they go to the pandoc backend together, so a
+    server gets them as one batch. Returns (fragment, cache_hit) per file.
+    """
+    results: list[tuple[str, bool] | None] = []
+    misses: list[int] = []
+    for i, key in enumerate(keys):
+        fragment = cached_fragment(key)
+        results.append(None if fragment is None else (fragment, True))
+        if fragment is None:
+            misses.append(i)
+
+    if misses:
+        backend = pandoc_backend()
+        with TRACE.phase("parse") as stats:
+            documents = parse_files([files[i] for i in misses], backend)
+            stats["files"] = len(misses)
+        conversions = [
+            Conversion(
+                prepare_source(
+                    files[i], doc, images, git_hash, build_date, set().union(*identifiers[:i])
+                ),
+                PANDOC_OPTIONS,
+            )
+            for i, doc in zip(misses, documents, strict=True)
+        ]
+        for i, fragment in zip(misses, backend.convert_many(conversions), strict=True):
+            store_fragment(keys[i], fragment)
+            results[i] = (fragment, False)
+    return results
+
+
+def extract_headings(body: str) -> list[Heading]:
+    """Find headings with pandoc-assigned IDs in an XHTML fragment."""
+    headings = []
+    for match in _HEADING_PATTERN.finditer(body):
+        attrs = match.group(2)
+        id_match = _ID_PATTERN.search(attrs)
+        if not id_match:
+            continue
+        class_match = _CLASS_PATTERN.search(attrs)
+        classes = class_match.group(1).split() if class_match else []
+        headings.append(
+            Heading(
+                level=int(match.group(1)),
+                anchor=id_match.group(1),
+                text=_TAG_PATTERN.sub("", match.group(3)).strip(),
+                listed="unlisted" not in classes,
+            )
+        )
+    return headings
+
+
+def assemble_chapter(
+    f: ContentFile, href: str, key: str, fragment: str
+) -> tuple[Chapter, dict[str, bytes]]:
+    """A converted fragment as a Chapter, with the media its images moved to."""
+    name = cache_path_for(key).name
+    if name not in _assembled:
+        chapter = Chapter(
+            source=f.path, href=href, body=fragment, headings=extract_headings(fragment)
+        )
+        media: dict[str, bytes] = {}
+        collect_media(chapter, media)
+        _assembled[name] = (chapter.body, chapter.headings, media)
+    body, headings, media = _assembled[name]
+    return Chapter(source=f.path, href=href, body=body, headings=list(headings)), media
+
+
+def resolve_cross_references(chapters: list[Chapter]) -> None:
+    """Point same-document anchors at the chapter that now owns them.
+
+    Pandoc resolves `#anchor` links across the whole book; once chapters
+    are converted separately, links to another chapter's headings need
+    the target file name. Header identifiers are unique across the book
+    (book_identifiers); other repeated ids, such as footnotes, are only
+    linked from their own chapter.
+    """
+    owners = {
+        anchor: chapter.href for chapter in chapters for anchor in _ID_PATTERN.findall(chapter.body)
+    }
+
+    for chapter in chapters:
+        local = set(_ID_PATTERN.findall(chapter.body))
+
+        def _rewrite(match: re.Match, local: set[str] = local) -> str:
+            anchor = match.group(1)
+            if anchor in local or anchor not in owners:
+                return match.group(0)
+            return f'href="{Path(owners[anchor]).name}#{anchor}"'
+
+        chapter.body = _HREF_PATTERN.sub(_rewrite, chapter.body)
+
+
+def collect_media(chapter: Chapter, media: dict[str, bytes]) -> None:
+    """Move local images referenced by a chapter into the EPUB media folder."""
+
+    def _rewrite(match: re.Match) -> str:
+        src = html.unescape(match.group(2))
+        if re.match(r"^[a-z]+:", src):
+            return match.group(0)
+        for base in (chapter.source.parent, REPO_ROOT):
+            candidate = (base / src).resolve()
+            if candidate.is_file():
+                data = candidate.read_bytes()
+                name = f"{hashlib.sha256(data).hexdigest()[:16]}{candidate.suffix.lower()}"
+                media[name] = data
+                return f"{match.group(1)}../media/{name}{match.group(3)}"
+        print(f"  Warning: image not found: {src} ({chapter.source.name})")
+        return match.group(0)
+
+    chapter.body = _IMG_SRC_PATTERN.sub(_rewrite, chapter.body)
+
+
+def render_page(title: str, body: str, lang: str, stylesheet: str | None, body_attrs=""):
+    """Wrap an XHTML body fragment in a complete EPUB content document.
+
+    title may be plain text or, like heading text, already escaped XHTML.
+    """
+    link = ""
+    if stylesheet:
+        link = f'<link rel="stylesheet" type="text/css" href="{stylesheet}" />\n'
+    return XHTML_PAGE.format(
+        lang=lang,
+        title=html.escape(html.unescape(title), quote=False),
+        stylesheet=link,
+        body_attrs=body_attrs,
+        body=body,
+    )
+
+
+def nav_entries(chapters: list[Chapter]) -> list[tuple[str, str, list[tuple[str, str]]]]:
+    """Build (text, href, children) navigation entries to TOC_DEPTH."""
+    entries: list[tuple[str, str, list[tuple[str, str]]]] = []
+    for chapter in chapters:
+        for heading in chapter.headings:
+            if not heading.listed or heading.level > TOC_DEPTH:
+                continue
+            href = f"{chapter.href}#{heading.anchor}"
+            if heading.level == 1 or not entries:
+                entries.append((heading.text, href, []))
+            else:
+                entries[-1][2].append((heading.text, href))
+    return entries
+
+
+def render_nav(entries, lang: str) -> str:
+    """Render the EPUB 3 navigation document."""
+    items = []
+    for text, href, children in entries:
+        item = f'<li><a href="{href}">{text}</a>'
+        if children:
+            sub = "".join(f'<li><a href="{h}">{t}</a></li>' for t, h in children)
+            item += f"<ol>{sub}</ol>"
+        items.append(item + "</li>")
+    body = (
+        '<nav epub:type="toc" id="toc">\n<h1 id="toc-title">Contents</h1>\n'
+        f"<ol>\n{chr(10).join(items)}\n</ol>\n</nav>"
+    )
+    return render_page(
+        "Contents", body, lang, "styles/stylesheet.css" if CSS_FILE.exists() else None
+    )
+
+
+def index_entries(chapters: list[Chapter], matcher: TermMatcher) -> list[tuple[str, list]]:
+    """(term, [(section text, href)]) for each term the chapters use.
+
+    An EPUB has no page numbers, so entries point at the sections (the
+    nearest heading with an id) that mention the term.
+    """
+    found: dict[str, list[tuple[str, str]]] = {}
+    for chapter in chapters:
+        href = Path(chapter.href).name
+        sections = {heading.anchor: heading.text for heading in chapter.headings}
+        for name, anchors in chapter_occurrences(chapter.body, matcher).items():
+            for anchor in anchors:
+                text = sections.get(anchor) or chapter.title
+                found.setdefault(name, []).append((text, f"{href}#{anchor}" if anchor else href))
+    return [(term.name, found[term.name]) for term in matcher.terms if term.name in found]
+
+
+def render_index(entries: list[tuple[str, list]]) -> str:
+    """Render the index page body, terms grouped by initial letter."""
+    groups: dict[str, list[str]] = {}
+    for name, sections in entries:
+        links = ", ".join(f'<a href="{href}">{text}</a>' for text, href in sections)
+        item = f"<li>{html.escape(name, quote=False)}: {links}</li>"
+        groups.setdefault(name[0].upper(), []).append(item)
+    parts = ['<section epub:type="index" id="index">\n<h1 id="index-title">Index</h1>']
+    for letter, items in groups.items():
+        parts.append(f'<h2 id="index-{letter.lower()}">{html.escape(letter)}</h2>')
+        parts.append(f'<ul class="index">\n{chr(10).join(items)}\n</ul>')
+    parts.append("</section>")
+    return "\n".join(parts)
+
+
+def render_ncx(entries, identifier: str, title: str) -> str:
+    """Render the EPUB 2 NCX table of contents for older readers."""
+    points = []
+    order = 0
+    for text, href, children in entries:
+        order += 1
+        point = (
+            f'<navPoint id="navPoint-{order}" playOrder="{order}">'
+            f'<navLabel><text>{text}</text></navLabel><content src="{href}"/>'
+        )
+        for child_text, child_href in children:
+            order += 1
+            point += (
+                f'<navPoint id="navPoint-{order}" playOrder="{order}">'
+                f"<navLabel><text>{child_text}</text></navLabel>"
+                f'<content src="{child_href}"/></navPoint>'
+            )
+        points.append(point + "</navPoint>")
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">\n'
+        f'<head><meta name="dtb:uid" content="{identifier}"/>'
+        f'<meta name="dtb:depth" content="{TOC_DEPTH}"/></head>\n'
+        f"<docTitle><text>{html.escape(title, quote=False)}</text></docTitle>\n"
+        f"<navMap>\n{chr(10).join(points)}\n</navMap>\n</ncx>\n"
+    )
+
+
+def render_opf(
+    metadata: dict[str, str | list[str]],
+    identifier: str,
+    manifest: list[tuple[str, str, str, str]],
+    spine: list[tuple[str, bool]],
+) -> str:
+    """Render the OPF package document.
+
+    manifest holds (id, href, media_type, properties); spine holds
+    (idref, linear).
+    """
+
+    def _text(key: str) -> str:
+        value = metadata.get(key, "")
+        return html.escape(value if isinstance(value, str) else ", ".join(value), quote=False)
+
+    modified = time.strftime(
+        "%Y-%m-%dT%H:%M:%SZ",
+        time.gmtime(int(os.environ.get("SOURCE_DATE_EPOCH", time.time()))),
+    )
+    lines = [
+        f'<dc:identifier id="book-id">{identifier}</dc:identifier>',
+        f'<dc:title id="title">{_text("title")}</dc:title>',
+        '<meta refines="#title" property="title-type">main</meta>',
+    ]
+    if metadata.get("subtitle"):
+        lines.append(f'<dc:title id="subtitle">{_text("subtitle")}</dc:title>')
+        lines.append('<meta refines="#subtitle" property="title-type">subtitle</meta>')
+    for key in ("language", "date", "rights", "publisher", "description"):
+        if metadata.get(key):
+            lines.append(f"<dc:{key}>{_text(key)}</dc:{key}>")
+    if metadata.get("author"):
+        lines.append(f"<dc:creator>{_text('author')}</dc:creator>")
+    subjects = metadata.get("subject", [])
+    for subject in [subjects] if isinstance(subjects, str) else subjects:
+        lines.append(f"<dc:subject>{html.escape(subject, quote=False)}</dc:subject>")
+    lines.append(f'<meta property="dcterms:modified">{modified}</meta>')
+    if any(item_id == "cover-image" for item_id, *_ in manifest):
+        lines.append('<meta name="cover" content="cover-image"/>')
+
+    items = []
+    for item_id, href, media_type, properties in manifest:
+        props = f' properties="{properties}"' if properties else ""
+        items.append(f'<item id="{item_id}" href="{href}" media-type="{media_type}"{props}/>')
+    itemrefs = [
+        f'<itemref idref="{idref}"{"" if linear else NON_LINEAR}/>' for idref, linear in spine
+    ]
+
+    lang = _text("language") or "en"
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<package xmlns="http://www.idpf.org/2007/opf" version="3.0" '
+        f'unique-identifier="book-id" xml:lang="{lang}">\n'
+        '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">\n'
+        + "\n".join(lines)
+        + "\n</metadata>\n<manifest>\n"
+        + "\n".join(items)
+        + '\n</manifest>\n<spine toc="ncx">\n'
+        + "\n".join(itemrefs)
+        + "\n</spine>\n</package>\n"
+    )
+
+
+def write_container(output_file: Path, files: list[tuple[str, bytes]]) -> None:
+    """Write the EPUB zip: stored mimetype first, everything else deflated."""
+    tmp_path = output_file.with_suffix(".epub.tmp")
+    with zipfile.ZipFile(tmp_path, "w") as zf:
+        info = zipfile.ZipInfo("mimetype", date_time=ZIP_DATE_TIME)
+        info.compress_type = zipfile.ZIP_STORED
+        zf.writestr(info, b"application/epub+zip")
+        for name, data in files:
+            info = zipfile.ZipInfo(name, date_time=ZIP_DATE_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            zf.writestr(info, data, compresslevel=9)
+    tmp_path.replace(output_file)
+
+
+def prune_cache(keep: set[str]) -> None:
+    """Remove cached fragments that the current manuscript no longer uses."""
+    if not CACHE_DIR.exists():
+        return
+    for path in CACHE_DIR.glob("*.xhtml"):
+        if path.name not in keep:
+            path.unlink(missing_ok=True)
+
+
+def affects_epub(path: Path) -> bool:
+    """Whether a changed file feeds the EPUB (of the specs, only the index's
+    term sources do)."""
+    return path in TERM_SOURCES or not path.is_relative_to(TERM_SOURCES[0].parent)
+
+
+def build_chapters(
+    git_hash: str | None, build_date: str | None
+) -> tuple[list[str], list[Chapter], dict[str, bytes]]:
+    """Scan, convert and assemble the content files.
+
+    Returns each file's source key, the chapters with cross-references
+    resolved, and the media their images moved to.
+    """
     print("Scanning content...")
-    all_files = scan_content()
+    with TRACE.phase("scan"):
+        content_manifest = load_manifest()
+        all_files = scan_content(content_manifest)
 
     if not all_files:
         print("\nERROR: No content files found.")
@@ -92,54 +708,176 @@ def build_epub(git_hash: str | None = None, build_date: str | None = None):
 
     print(f"\nTotal: {len(all_files)} files")
 
-    # Inject build info into copyright page
-    with tempfile.TemporaryDirectory(prefix="sdd-epub-") as tmp_dir:
-        prepared_files = []
-        for f in all_files:
-            if f.name == "02-copyright.md" and (git_hash or build_date):
-                content = f.read_text(encoding="utf-8").rstrip()
-                build_line = "\n\n---\n\n"
-                parts = []
-                if git_hash:
-                    parts.append(f"Build `{git_hash}`")
-                if build_date:
-                    parts.append(build_date)
-                build_line += " · ".join(parts)
-                content += build_line + "\n"
-
-                tmp_path = Path(tmp_dir) / f.name
-                tmp_path.write_text(content, encoding="utf-8")
-                prepared_files.append(tmp_path)
-                print(f"\n  Build info: {' · '.join(parts)}")
-            else:
-                prepared_files.append(f)
-
-        # Build pandoc command
-        cmd = [
-            "pandoc",
-            "--toc",
-            "--toc-depth=2",
-            "--epub-chapter-level=1",
-            "--epub-title-page=false",
-            "-o",
-            str(output_file),
-        ]
-
-        if METADATA_FILE.exists():
-            cmd.append(f"--metadata-file={METADATA_FILE}")
-        if COVER_IMAGE.exists():
-            cmd.append(f"--epub-cover-image={COVER_IMAGE}")
-        if CSS_FILE.exists():
-            cmd.append(f"--css={CSS_FILE}")
+    with TRACE.phase("images") as stats:
+        images = prepare_images(content_manifest, "epub")
+        stats["built"] = sum(1 for v in images.values() if not v.cached)
+    if images:
+        saved = sum(v.saved_bytes for v in images.values())
+        print(f"\nImages: {len(images)} ({stats['built']} built, {saved / 1024:.1f} KB saved)")
+
+    build_info = " · ".join(
+        part for part in [f"Build `{git_hash}`" if git_hash else "", build_date or ""] if part
+    )
+    if build_info:
+        print(f"\n  Build info: {build_info}")
+    images_id = images_key(images)
+    identifiers = book_identifiers(all_files)
+    keys = [
+        source_key(f, images_id, build_info, ids)
+        for f, ids in zip(all_files, identifiers, strict=True)
+    ]
+
+    backend = pandoc_backend()
+    where = f" (pandoc server at {backend.url})" if backend.name == "server" else ""
+    print(f"\nConverting chapters{where}...")
+    try:
+        with TRACE.phase("convert", backend=backend.name) as stats:
+            converted = convert_chapters(all_files, keys, identifiers, images, git_hash, build_date)
+            hits = stats["cache_hits"] = sum(1 for _, hit in converted if hit)
+    except RuntimeError as exc:
+        print(f"ERROR:\n{exc}")
+        sys.exit(1)
 
-        cmd.extend(str(f) for f in prepared_files)
+    print(f"  {len(converted) - hits} converted, {hits} cached")
+    prune_ast_cache(content_manifest.files, pandoc_version())
+
+    chapters = []
+    media: dict[str, bytes] = {}
+    for i, (f, key, (body, _)) in enumerate(zip(all_files, keys, converted, strict=True), 1):
+        chapter, chapter_media = assemble_chapter(f, f"text/ch{i:03d}.xhtml", key, body)
+        chapters.append(chapter)
+        media.update(chapter_media)
+    resolve_cross_references(chapters)
+    return keys, chapters, media
+
+
+def build_epub(
+    git_hash: str | None = None,
+    build_date: str | None = None,
+    changed: set[Path] | None = None,
+):
+    """Build the EPUB.
+
+    changed (from --watch) lists the files changed since the last build;
+    if none of them is under content/, that build's chapters are reused.
+    """
+    global _last_content
+    output_file = OUTPUT_DIR / f"{BOOK_TITLE}.epub"
 
-        print("Running pandoc...")
-        result = subprocess.run(cmd, capture_output=True, text=True)
+    print(f"Building: {output_file.name}\n")
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-        if result.returncode != 0:
-            print(f"ERROR:\n{result.stderr}")
-            sys.exit(1)
+    if (
+        changed
+        and _last_content is not None
+        and not any(path.is_relative_to(CONTENT_DIR) for path in changed)
+    ):
+        print("Content unchanged; reusing the assembled chapters")
+        keys, chapters, media = _last_content
+    else:
+        keys, chapters, media = _last_content = build_chapters(git_hash, build_date)
+
+    matcher = load_matcher()
+    index_body = ""
+    if matcher:
+        with TRACE.phase("index") as stats:
+            index = index_entries(chapters, matcher)
+            stats["terms"] = len(index)
+        if index:
+            index_body = render_index(index)
+            print(f"Index: {len(index)} of {len(matcher.terms)} glossary terms used")
+
+    metadata = read_metadata(METADATA_FILE)
+    title = str(metadata.get("title", BOOK_TITLE))
+    lang = str(metadata.get("language", "en"))
+    identifier = f"urn:uuid:{uuid.uuid5(uuid.NAMESPACE_URL, f'{BOOK_TITLE}:{title}')}"
+    stylesheet = "../styles/stylesheet.css" if CSS_FILE.exists() else None
+
+    files: list[tuple[str, bytes]] = [("META-INF/container.xml", CONTAINER_XML.encode())]
+    manifest: list[tuple[str, str, str, str]] = [
+        ("ncx", "toc.ncx", "application/x-dtbncx+xml", ""),
+        ("nav", "nav.xhtml", "application/xhtml+xml", "nav"),
+    ]
+    spine: list[tuple[str, bool]] = []
+
+    if CSS_FILE.exists():
+        # Fonts are only embedded when the stylesheet can declare them
+        css = CSS_FILE.read_text(encoding="utf-8")
+        with TRACE.phase("fonts") as stats:
+            bodies = [chapter.body for chapter in chapters] + [index_body]
+            fonts = subset_fonts("".join([title, *bodies]), faces_for_html(bodies), "epub")
+            stats["built"] = fonts.built if fonts else 0
+        if fonts:
+            css = font_face_css(fonts, "../fonts/") + "\n" + css
+            for face in fonts.faces:
+                files.append((f"EPUB/fonts/{face.file}", fonts.path(face).read_bytes()))
+                manifest.append(
+                    (f"font-{Path(face.file).stem}", f"fonts/{face.file}", "font/ttf", "")
+                )
+            print(
+                f"Fonts: {len(fonts.faces)} faces subset, "
+                f"{fonts.source_size / 1024:.0f} KB -> {fonts.size / 1024:.0f} KB"
+            )
+        files.append(("EPUB/styles/stylesheet.css", css.encode()))
+        manifest.append(("stylesheet", "styles/stylesheet.css", "text/css", ""))
+
+    if COVER_IMAGE.exists():
+        cover_name = f"cover{COVER_IMAGE.suffix.lower()}"
+        cover_type = mimetypes.guess_type(cover_name)[0] or "image/png"
+        cover_body = f'<div id="cover-image"><img src="../media/{cover_name}" alt="Cover" /></div>'
+        files.append((f"EPUB/media/{cover_name}", COVER_IMAGE.read_bytes()))
+        files.append(
+            (
+                "EPUB/text/cover.xhtml",
+                render_page(title, cover_body, lang, stylesheet, ' epub:type="cover"').encode(),
+            )
+        )
+        manifest.append(("cover-image", f"media/{cover_name}", cover_type, "cover-image"))
+        manifest.append(("cover", "text/cover.xhtml", "application/xhtml+xml", ""))
+        spine.append(("cover", False))
+
+    spine.append(("nav", True))
+
+    entries = nav_entries(chapters)
+    if index_body:
+        entries.append(("Index", INDEX_HREF, []))
+    files.append(("EPUB/nav.xhtml", render_nav(entries, lang).encode()))
+    files.append(("EPUB/toc.ncx", render_ncx(entries, identifier, title).encode()))
+
+    for i, chapter in enumerate(chapters, 1):
+        item_id = f"ch{i:03d}"
+        page = render_page(chapter.title, chapter.body, lang, stylesheet)
+        files.append((f"EPUB/{chapter.href}", page.encode()))
+        manifest.append((item_id, chapter.href, "application/xhtml+xml", ""))
+        spine.append((item_id, True))
+
+    if index_body:
+        page = render_page("Index", index_body, lang, stylesheet, ' epub:type="backmatter"')
+        files.append((f"EPUB/{INDEX_HREF}", page.encode()))
+        manifest.append(("index", INDEX_HREF, "application/xhtml+xml", ""))
+        spine.append(("index", True))
+
+    for name, data in sorted(media.items()):
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        files.append((f"EPUB/media/{name}", data))
+        manifest.append((f"media-{Path(name).stem}", f"media/{name}", media_type, ""))
+
+    files.insert(
+        1, ("EPUB/content.opf", render_opf(metadata, identifier, manifest, spine).encode())
+    )
+
+    print("Packaging EPUB...")
+    with TRACE.phase("package", files=len(files)):
+        write_container(output_file, files)
+
+    keep = {cache_path_for(key).name for key in keys}
+    prune_cache(keep)
+    for name in _converted.keys() - keep:
+        del _converted[name]
+    for name in _assembled.keys() - keep:
+        del _assembled[name]
+    if matcher:
+        prune_index_cache("epub", {chapter_cache_path(c.body, matcher) for c in chapters})
 
     size_kb = output_file.stat().st_size / 1024
     print(f"Done: {output_file} ({size_kb:.1f} KB)")
@@ -149,7 +887,30 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Build SDD Book EPUB")
     parser.add_argument("--git-hash", help="Short git commit hash")
     parser.add_argument("--build-date", help="Build date (YYYY-MM-DD)")
+    parser.add_argument("--watch", action="store_true", help="Rebuild when sources change")
+    parser.add_argument("--poll", action="store_true", help="Watch by polling, not inotify")
+    parser.add_argument(
+        "--pandoc",
+        choices=BACKENDS,
+        default="auto",
+        help="Convert through a pandoc server or subprocesses (default: server if running)",
+    )
     args = parser.parse_args()
 
     check_deps()
-    build_epub(git_hash=args.git_hash, build_date=args.build_date)
+    PANDOC_BACKEND = args.pandoc
+    try:
+        pandoc_backend()
+    except RuntimeError as exc:
+        print(f"Error: {exc}")
+        sys.exit(1)
+    with TRACE:
+        if args.watch:
+            watch(
+                WATCH_PATHS,
+                lambda changed: build_epub(args.git_hash, args.build_date, changed),
+                relevant=affects_epub,
+                polling=args.poll,
+            )
+        else:
+            build_epub(git_hash=args.git_hash, build_date=args.build_date)
@@ -2,12 +2,31 @@
 """
 SDD Book PDF Build Script
 
-Assembles all content into a single markdown file with raw LaTeX
+Assembles all content into a single pandoc AST with raw LaTeX
 injections for structural control (frontmatter/mainmatter/parts),
-then passes it to pandoc + XeLaTeX.
+streamed to pandoc + XeLaTeX on stdin one file at a time. Content files
+come from the parse-once AST cache shared with the EPUB build
+(scripts/book_ast.py).
 
 Usage:
   python scripts/build-pdf.py [--git-hash HASH] [--build-date DATE] [--variant screen|print|both]
+  python scripts/build-pdf.py --watch [--poll] [--variant ...]
+  python scripts/build-pdf.py --dump-assembled [...]
+
+--dump-assembled also writes what pandoc reads to
+output/assembled[-print].json, for debugging.
+
+Glossary and writers-guide terms (scripts/book_index.py) are indexed
+in running text and printed as a back-of-book index.
+
+With --watch, builds once and then rebuilds whenever content/, build/,
+assets/fonts/ or the index's term sources change (of build/epub/, only
+the shared metadata file). Only the variants a change feeds are rebuilt:
+the print variant ignores assets/fonts/. Parsed and indexed chapters
+come from their caches, so only edited chapters are parsed again.
+Watch mode builds the screen variant unless --variant says otherwise.
+The cover is not watched; after editing assets/cover/, run
+scripts/build-cover.py and save any watched file to pick it up.
 
 Output:
   output/spec-driven-development.pdf       (screen: RGB, clickable links)
@@ -15,15 +34,33 @@ Output:
 """
 
 import argparse
-import re
 import subprocess
 import sys
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
+from book_ast import (
+    Element,
+    ParsedFiles,
+    dedupe_identifiers,
+    iter_dumps,
+    parse_lazily,
+    raw_block,
+    rewrite_images,
+)
+from book_ast import prune_cache as prune_ast_cache
+from book_content import CONTENT_DIR, SECTION_ORDER, ContentManifest, load_manifest
+from book_fonts import FACES, FONT_DIR, subset_fonts
+from book_images import ImageVariant, prepare_images, variant_path
+from book_index import TERM_SOURCES, IndexedFiles, load_matcher, prune_cache
+from book_watch import watch
+from build_trace import Tracer
+from pandoc_backend import get_backend
+from text_transform import escape_latex
+
 # === CONFIGURATION ===
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
-CONTENT_DIR = REPO_ROOT / "content"
 METADATA_FILE = REPO_ROOT / "build" / "epub" / "metadata.yaml"
 TEMPLATE_FILE = REPO_ROOT / "build" / "pdf" / "template.tex"
 COVER_IMAGE = REPO_ROOT / "output" / "front-cover.png"
@@ -37,17 +74,10 @@ MONO_FONT = "JetBrains Mono"
 SLAB_FONT = "Alfa Slab One"
 FONT_SIZE = "11pt"
 
-# Content directories in book order
-SECTION_ORDER = [
-    "00-front-matter",
-    "01-part-1-foundation",
-    "02-part-2-writing-specifications",
-    "03-part-3-the-workflow",
-    "04-part-4-practice",
-    "05-part-5-governance-and-evolution",
-    "06-closing",
-    "07-back-matter",
-]
+TRACE = Tracer("build-pdf")
+
+# What --watch rebuilds on
+WATCH_PATHS = [CONTENT_DIR, REPO_ROOT / "build", FONT_DIR, TERM_SOURCES[0].parent]
 
 # These are handled by the LaTeX template, not content
 TEMPLATE_HANDLED = {"01-title-page.md", "02-copyright.md"}
@@ -63,94 +93,42 @@ def check_deps():
             sys.exit(1)
 
 
-def get_sort_key(path: Path) -> tuple[int, str]:
-    """Sort files by numeric prefix, then alphabetically."""
-    match = re.match(r"^(\d+)", path.stem)
-    return (int(match.group(1)) if match else 999, path.stem)
-
-
-def get_markdown_files(directory: Path) -> list[Path]:
-    """Get sorted markdown files from a directory."""
-    if not directory.exists():
-        return []
-    return sorted(directory.glob("*.md"), key=get_sort_key)
-
-
-def is_part_directory(dirname: str) -> bool:
-    """Check if a directory name represents a book part."""
-    return bool(re.match(r"^\d+-part-\d+", dirname))
-
-
-def escape_latex(text: str) -> str:
-    """Escape special LaTeX characters."""
-    for old, new in [
-        ("\\", r"\textbackslash{}"),
-        ("&", r"\&"),
-        ("%", r"\%"),
-        ("$", r"\$"),
-        ("#", r"\#"),
-        ("_", r"\_"),
-        ("{", r"\{"),
-        ("}", r"\}"),
-        ("~", r"\textasciitilde{}"),
-        ("^", r"\textasciicircum{}"),
-    ]:
-        text = text.replace(old, new)
-    text = text.replace("\u2014", "---")
-    text = text.replace("\u2013", "--")
-    text = text.replace("\u2018", "`")
-    text = text.replace("\u2019", "'")
-    text = text.replace("\u201c", "``")
-    text = text.replace("\u201d", "''")
-    return text
-
-
-def parse_part_intro(filepath: Path) -> str:
-    """Extract title from a part intro file.
-
-    Expected: # Part N: Title {.part}
-    Returns the title string.
-    """
-    content = filepath.read_text(encoding="utf-8").strip()
-
-    match = re.match(
-        r"^#\s+Part\s+\d+:\s*(.+?)\s*(?:\{[^}]*\})?\s*$",
-        content,
-        flags=re.MULTILINE,
-    )
-    if not match:
-        raise ValueError(f"Could not parse part intro: {filepath}")
-
-    return match.group(1).strip()
-
-
 def build_part_latex(title: str, part_number: int) -> str:
     """Build raw LaTeX for a part divider page."""
-    return f"\\part{{{title}}}"
+    return f"\\part{{{escape_latex(title)}}}"
+
 
+def parse_content(manifest: ContentManifest, backend) -> ParsedFiles:
+    """Parsed ASTs (from the shared cache) of the files the PDF includes."""
+    files = [f for f in manifest.files if f.name not in TEMPLATE_HANDLED and f.kind != "part-intro"]
+    return parse_lazily(files, backend)
 
-def raw_latex(code: str) -> str:
-    """Wrap LaTeX code in a pandoc raw block."""
-    return f"\n```{{=latex}}\n{code}\n```\n"
 
+def assemble_blocks(
+    manifest: ContentManifest,
+    documents: ParsedFiles | IndexedFiles,
+    images: dict[Path, ImageVariant] | None = None,
+) -> Iterator[Element]:
+    """Yield the book's blocks in order, decoding one file's AST at a time.
 
-def assemble_markdown() -> str:
-    """Assemble all content into a single markdown string.
+    documents holds each file's parsed AST (parse_content, or
+    book_index.IndexedFiles wrapping it). Image
+    references are pointed at their print variants when images (from
+    book_images.prepare_images) is given.
 
     Structure:
-      [preface markdown - stays in frontmatter]
-      \\mainmatter  (injected before first part)
-      \\part{Title}  (with intro text)
-      [chapter markdown]
+      [preface blocks - stay in frontmatter]
+      \\mainmatter  (raw LaTeX, injected before first part)
+      \\part{Title}  (raw LaTeX)
+      [chapter blocks]
       ...
     """
-    sections: list[str] = []
+    identifiers: set[str] = set()
     mainmatter_injected = False
-    part_number = 0
+    by_section = manifest.by_section()
 
     for dirname in SECTION_ORDER:
-        dirpath = CONTENT_DIR / dirname
-        files = get_markdown_files(dirpath)
+        files = by_section.get(dirname)
 
         if not files:
             print(f"  {dirname}/ (empty or missing)")
@@ -165,30 +143,44 @@ def assemble_markdown() -> str:
                 continue
 
             # Part intro file
-            if f.name == "00-part-intro.md" and is_part_directory(dirname):
-                title = parse_part_intro(f)
-                part_number += 1
-
+            if f.kind == "part-intro":
                 latex = ""
                 if not mainmatter_injected:
                     latex += "\\mainmatter\n"
                     mainmatter_injected = True
 
-                latex += build_part_latex(title, part_number)
-                sections.append(raw_latex(latex))
-                print(f"    [part] {f.name} -> Part {part_number}: {title}")
+                latex += build_part_latex(f.title, f.part_number)
+                print(f"    [part] {f.name} -> Part {f.part_number}: {f.title}")
+                yield raw_block("latex", latex)
                 continue
 
             # Regular content file
-            content = f.read_text(encoding="utf-8").strip()
-            sections.append(content)
+            doc = documents[f.path]
+            if images:
+                rewrite_images(doc, lambda src, base=f.path.parent: variant_path(src, base, images))
+            dedupe_identifiers(doc, identifiers)
             print(f"    [ok]   {f.name}")
-
-    return "\n\n".join(sections)
-
-
-def build_pdf(variant: str, git_hash: str | None, build_date: str | None):
-    """Build a single PDF variant."""
+            yield from doc["blocks"]
+
+
+def dump_chunks(chunks: Iterable[str], path: Path) -> Iterator[str]:
+    """Pass chunks through, also writing them to path."""
+    with path.open("w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(chunk)
+            yield chunk
+
+
+def build_pdf(
+    variant: str,
+    git_hash: str | None,
+    build_date: str | None,
+    manifest: ContentManifest,
+    documents: ParsedFiles | IndexedFiles,
+    images: dict[Path, ImageVariant] | None = None,
+    dump: bool = False,
+):
+    """Build a single PDF variant from parsed content (parse_content)."""
     is_print = variant == "print"
     suffix = "-print" if is_print else ""
     output_file = OUTPUT_DIR / f"{BOOK_TITLE}{suffix}.pdf"
@@ -199,24 +191,14 @@ def build_pdf(variant: str, git_hash: str | None, build_date: str | None):
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    # Assemble content
-    print("Scanning content...")
-    assembled = assemble_markdown()
-
-    if not assembled.strip():
+    if not documents:
         print("ERROR: No content found.")
         sys.exit(1)
 
-    # Write assembled markdown for pandoc (and debugging)
-    assembled_path = OUTPUT_DIR / "assembled.md"
-    assembled_path.write_text(assembled, encoding="utf-8")
-    print(f"\nAssembled markdown: {assembled_path}")
-    print(f"Length: {len(assembled)} chars, {assembled.count(chr(10))} lines")
-
-    # Build pandoc command
+    # Build pandoc command; the document arrives on stdin
     cmd = [
         "pandoc",
-        str(assembled_path),
+        "--from=json",
         "--pdf-engine=xelatex",
         "--top-level-division=chapter",
         "-o",
@@ -243,6 +225,16 @@ def build_pdf(variant: str, git_hash: str | None, build_date: str | None):
     if is_print:
         cmd.append("--variable=print:true")
     else:
+        # Subset fonts load faster in XeLaTeX; the print variant keeps the
+        # installed fonts
+        with TRACE.phase("fonts") as stats:
+            template = TEMPLATE_FILE.read_text(encoding="utf-8") if TEMPLATE_FILE.exists() else ""
+            metadata = METADATA_FILE.read_text(encoding="utf-8") if METADATA_FILE.exists() else ""
+            text = "".join(f.text for f in manifest.files)
+            fonts = subset_fonts(text + template + metadata, FACES, "pdf")
+            stats["built"] = fonts.built if fonts else 0
+        if fonts:
+            cmd.append(f"--variable=fontdir:{fonts.directory.as_posix()}")
         if COVER_IMAGE.exists():
             cmd.extend(
                 [
@@ -251,30 +243,102 @@ def build_pdf(variant: str, git_hash: str | None, build_date: str | None):
                 ]
             )
 
+    if isinstance(documents, IndexedFiles):
+        cmd.append("--variable=index:true")
+
     # Build info
     if git_hash:
         cmd.append(f"--variable=git-hash:{git_hash}")
     if build_date:
         cmd.append(f"--variable=build-date:{build_date}")
 
-    print(f"\nPandoc command:\n  {' '.join(cmd)}\n")
-    print("Running pandoc + xelatex...")
-    result = subprocess.run(cmd, capture_output=True, text=True)
+    # Assemble content as pandoc reads it. One dump file per variant so
+    # both variants can build at the same time.
+    chunks = iter_dumps(assemble_blocks(manifest, documents, images), documents.api_version)
+    assembled_path = OUTPUT_DIR / f"assembled{suffix}.json"
+    if dump:
+        chunks = dump_chunks(chunks, assembled_path)
+
+    print(f"Pandoc command:\n  {' '.join(cmd)}\n")
+    print("Streaming content to pandoc + xelatex...")
+    # pandoc drives XeLaTeX, so this one event covers assembly, pandoc
+    # and XeLaTeX (the child resource figures include the XeLaTeX runs)
+    result = TRACE.run(
+        f"pandoc+xelatex ({variant})",
+        cmd,
+        input=chunks,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+    )
 
     if result.returncode != 0:
         print(f"ERROR:\n{result.stderr}")
-        print(f"\nDEBUG: Check {assembled_path} for the assembled markdown")
+        if dump:
+            print(f"\nDEBUG: Check {assembled_path} for the assembled document")
+        else:
+            print("\nDEBUG: Rerun with --dump-assembled to inspect the assembled document")
         sys.exit(1)
 
+    if dump:
+        print(f"\nAssembled document: {assembled_path}")
     size_kb = output_file.stat().st_size / 1024
     print(f"Done: {output_file} ({size_kb:.1f} KB)")
 
-    # Clean up assembled file on success
-    assembled_path.unlink(missing_ok=True)
-
     return output_file
 
 
+def affects_pdf(path: Path, variant: str = "screen") -> bool:
+    """Whether a changed file feeds a PDF variant (build/epub/ only lends
+    it metadata, the specs only index terms, and the print variant uses
+    the installed fonts)."""
+    if path.is_relative_to(TERM_SOURCES[0].parent):
+        return path in TERM_SOURCES
+    if path.is_relative_to(FONT_DIR):
+        return variant == "screen"
+    return path == METADATA_FILE or not path.is_relative_to(METADATA_FILE.parent)
+
+
+def index_content(documents: ParsedFiles) -> ParsedFiles | IndexedFiles:
+    """documents with glossary terms indexed, if the term sources exist."""
+    matcher = load_matcher()
+    if matcher is None:
+        print("  [skip] index (no glossary or writers-guide)")
+        return documents
+    return IndexedFiles(documents, matcher)
+
+
+def build_variants(
+    variants: list[str], git_hash: str | None, build_date: str | None, dump: bool = False
+):
+    """Scan and parse content once and build each requested variant."""
+    with TRACE.phase("scan"):
+        manifest = load_manifest()
+    with TRACE.phase("images") as stats:
+        images = prepare_images(manifest, "pdf")
+        stats["built"] = sum(1 for v in images.values() if not v.cached)
+    with TRACE.phase("parse") as stats:
+        backend = get_backend("auto", run=TRACE.run)
+        try:
+            documents = parse_content(manifest, backend)
+        except RuntimeError as exc:
+            print(f"ERROR:\n{exc}")
+            sys.exit(1)
+        stats["files"] = len(documents)
+    with TRACE.phase("index") as stats:
+        documents = index_content(documents)
+        stats["terms"] = len(documents.matcher.terms) if isinstance(documents, IndexedFiles) else 0
+    for v in variants:
+        build_pdf(v, git_hash, build_date, manifest, documents, images, dump)
+    if isinstance(documents, IndexedFiles):
+        prune_cache("pdf", {documents.cache_path(path) for path in documents})
+    prune_ast_cache(manifest.files, backend.version())
+
+    print(f"\n{'='*60}")
+    print("  All builds complete.")
+    print(f"{'='*60}")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Build SDD Book PDFs")
     parser.add_argument("--git-hash", help="Short git commit hash")
@@ -282,20 +346,36 @@ def main():
     parser.add_argument(
         "--variant",
         choices=["screen", "print", "both"],
-        default="both",
-        help="Which variant(s) to build (default: both)",
+        help="Which variant(s) to build (default: both, or screen with --watch)",
+    )
+    parser.add_argument("--watch", action="store_true", help="Rebuild when sources change")
+    parser.add_argument("--poll", action="store_true", help="Watch by polling, not inotify")
+    parser.add_argument(
+        "--dump-assembled",
+        action="store_true",
+        help="Also write the document pandoc reads to output/ (for debugging)",
     )
     args = parser.parse_args()
 
-    variants = ["screen", "print"] if args.variant == "both" else [args.variant]
-    for v in variants:
-        build_pdf(v, args.git_hash, args.build_date)
+    variant = args.variant or ("screen" if args.watch else "both")
+    variants = ["screen", "print"] if variant == "both" else [variant]
+    if args.watch:
 
-    print(f"\n{'='*60}")
-    print("  All builds complete.")
-    print(f"{'='*60}")
+        def rebuild(changed: set[Path]) -> None:
+            stale = [v for v in variants if not changed or any(affects_pdf(p, v) for p in changed)]
+            build_variants(stale, args.git_hash, args.build_date, args.dump_assembled)
+
+        watch(
+            WATCH_PATHS,
+            rebuild,
+            relevant=lambda path: any(affects_pdf(path, v) for v in variants),
+            polling=args.poll,
+        )
+    else:
+        build_variants(variants, args.git_hash, args.build_date, args.dump_assembled)
 
 
 if __name__ == "__main__":
     check_deps()
-    main()
+    with TRACE:
+        main()
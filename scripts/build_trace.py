@@ -0,0 +1,216 @@
+"""Build timing and resource instrumentation.
+
+Shared by the build and deploy scripts. A Tracer times named phases and
+child processes and writes them as a Chrome trace-event JSON file
+(load it in chrome://tracing or https://ui.perfetto.dev):
+
+    TRACE = Tracer("build-epub")
+
+    with TRACE.phase("scan"):
+        ...
+    result = TRACE.run("pandoc", ["pandoc", ...], capture_output=True, text=True)
+
+run() takes input as one string, or as an iterable of chunks (such as a
+generator) that is written to the child's stdin as it is produced.
+
+    if __name__ == "__main__":
+        with TRACE:
+            main()
+
+Child processes are reaped with os.wait4, so each "run" event carries
+the child's peak RSS and user/system CPU time. The kernel folds reaped
+grandchildren into those figures, so pandoc's numbers include the
+XeLaTeX runs it drives.
+
+Traces are written to output/traces/<name>.json, or to the path in the
+BUILD_TRACE environment variable (the orchestrator sets it per target
+and merges the results into output/build-trace.json).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager, suppress
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+TRACE_DIR = REPO_ROOT / "output" / "traces"
+
+
+def _now_us() -> int:
+    """Wall-clock microseconds, so traces from separate processes line up."""
+    return time.time_ns() // 1000
+
+
+class Tracer:
+    """Collects trace events for one script run."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pid = os.getpid()
+        self.events: list[dict] = []
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> Tracer:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.save()
+
+    def _record(self, name: str, cat: str, start_us: int, args: dict) -> None:
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": start_us,
+            "dur": max(_now_us() - start_us, 0),
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with self._lock:
+            self.events.append(event)
+
+    @contextmanager
+    def phase(self, name: str, **args) -> Iterator[dict]:
+        """Time a block of work. Yields the event's args dict for annotation."""
+        start = _now_us()
+        try:
+            yield args
+        finally:
+            self._record(name, "phase", start, args)
+
+    def run(
+        self,
+        name: str,
+        cmd: list[str],
+        *,
+        input: str | bytes | Iterable[str | bytes] | None = None,
+        capture_output: bool = False,
+        check: bool = False,
+        text: bool = False,
+        **kwargs,
+    ) -> subprocess.CompletedProcess:
+        """subprocess.run() that also records the child's resource usage."""
+        if capture_output:
+            kwargs["stdout"] = kwargs["stderr"] = subprocess.PIPE
+        if input is not None:
+            kwargs["stdin"] = subprocess.PIPE
+
+        start = _now_us()
+        proc = subprocess.Popen(cmd, text=text, **kwargs)
+        stdout, stderr, error = _communicate(proc, input)
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+
+        args = {
+            "cmd": " ".join(str(c) for c in cmd[:3]),
+            "returncode": proc.returncode,
+            "max_rss_kb": usage.ru_maxrss,
+            "user_cpu_s": round(usage.ru_utime, 3),
+            "system_cpu_s": round(usage.ru_stime, 3),
+        }
+        if error is not None:
+            args["error"] = repr(error)
+        self._record(name, "run", start, args)
+
+        if error is not None:
+            # The child was reaped above; keep what it said alongside the cause
+            if stderr:
+                error.add_note(f"{cmd[0]} stderr:\n{stderr}")
+            raise error
+        if check and proc.returncode != 0:
+            raise subprocess.CalledProcessError(proc.returncode, cmd, stdout, stderr)
+        return subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+
+    def trace_path(self) -> Path:
+        override = os.environ.get("BUILD_TRACE")
+        return Path(override) if override else TRACE_DIR / f"{self.name}.json"
+
+    def trace_events(self) -> list[dict]:
+        """Recorded events, led by the metadata event that names the process."""
+        metadata = {
+            "name": "process_name",
+            "ph": "M",
+            "pid": self.pid,
+            "args": {"name": self.name},
+        }
+        return [metadata, *self.events]
+
+    def save(self) -> Path:
+        """Write the Chrome trace-event JSON file."""
+        path = self.trace_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        trace = {"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}
+        path.write_text(json.dumps(trace), encoding="utf-8")
+        return path
+
+
+def _communicate(
+    proc: subprocess.Popen, input: str | bytes | Iterable[str | bytes] | None
+) -> tuple:
+    """Feed stdin and drain stdout/stderr without reaping the process.
+
+    An iterable input is written chunk by chunk as it is consumed. If it
+    raises, stdin is closed and the output still drained, and the
+    exception is returned third, for the caller to raise once the child
+    is reaped.
+
+    Popen.communicate() waits on the child itself, which would discard
+    the resource usage that os.wait4 reports.
+    """
+    results: dict[str, str | bytes | None] = {"stdout": None, "stderr": None}
+    error: Exception | None = None
+
+    def _drain(key: str) -> None:
+        stream = getattr(proc, key)
+        results[key] = stream.read()
+        stream.close()
+
+    readers = [
+        threading.Thread(target=_drain, args=(key,), daemon=True)
+        for key in ("stdout", "stderr")
+        if getattr(proc, key) is not None
+    ]
+    for reader in readers:
+        reader.start()
+
+    if proc.stdin is not None:
+        try:
+            if isinstance(input, str | bytes):
+                proc.stdin.write(input)
+            elif input is not None:
+                for chunk in input:
+                    proc.stdin.write(chunk)
+        except BrokenPipeError:
+            pass  # Child exited early; its exit status reports why
+        except Exception as exc:  # A failing generator; raised after the child is reaped
+            error = exc
+        finally:
+            # Also on a failing generator, so the child sees EOF and exits
+            with suppress(BrokenPipeError):
+                proc.stdin.close()
+
+    for reader in readers:
+        reader.join()
+    return results["stdout"], results["stderr"], error
+
+
+def merge_traces(paths: list[Path], output: Path, extra_events: list[dict] | None = None) -> Path:
+    """Combine several trace files (one per process) into one timeline."""
+    events = list(extra_events or [])
+    for path in paths:
+        try:
+            events.extend(json.loads(path.read_text(encoding="utf-8"))["traceEvents"])
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            continue
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8"
+    )
+    return output
@@ -1,10 +1,47 @@
 #!/usr/bin/env python3
-"""Upload build artifacts to Azure Blob Storage."""
+"""Upload build artifacts to Azure Blob Storage.
 
+Every artifact is published under an immutable, content-addressed name
+(spec-driven-development.<sha256 prefix>.pdf) with a one-year immutable
+Cache-Control, then under its stable name (linked from the site) with a
+short TTL. Finally latest.json, which maps each artifact to its
+immutable object, is replaced with a one-minute TTL. The manifest is
+only written after every immutable object is in place.
+
+Each artifact's MD5 and SHA-256 are computed locally and compared with
+the stored blob's Content-MD5 and sha256 metadata; unchanged artifacts
+are skipped, and only their Content-Type and Cache-Control are updated
+if those differ. Changed artifacts upload concurrently. az uploads files
+above its single-put threshold as parallel block uploads
+(--max-connections), and failed az calls are retried with backoff.
+
+Usage:
+  python scripts/deploy-content.py <storage-account> [container]
+      [--auth-mode login|key] [--connection-string CONN] [--jobs N] [--retries N]
+
+To test without a live account, run the Azurite emulator and use
+--azurite, which targets its well-known development account:
+
+  docker run -p 10000:10000 mcr.microsoft.com/azure-storage/azurite \
+      azurite-blob --blobHost 0.0.0.0
+  python scripts/deploy-content.py devstoreaccount1 --azurite
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import re
 import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 
+from build_trace import Tracer
+
 REPO_ROOT = Path(__file__).resolve().parent.parent
 OUTPUT_DIR = REPO_ROOT / "output"
 
@@ -14,6 +51,84 @@ ARTIFACTS = [
     "spec-driven-development-print.pdf",
 ]
 
+# Well-known Azurite development account (public, emulator only)
+AZURITE_CONNECTION_STRING = (
+    "DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;"
+    "AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw==;"
+    "BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;"
+)
+
+MANIFEST_NAME = "latest.json"
+MANIFEST_FILE = OUTPUT_DIR / MANIFEST_NAME
+
+# Content-addressed objects never change; the manifest and the stable
+# aliases (linked from the site) must be picked up quickly.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+ALIAS_CACHE_CONTROL = "public, max-age=300"
+MANIFEST_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+
+CONTENT_TYPES = {
+    ".epub": "application/epub+zip",
+    ".pdf": "application/pdf",
+    ".json": "application/json",
+}
+
+HASH_NAME_LENGTH = 16
+HASH_CHUNK_SIZE = 1024 * 1024
+MAX_CONNECTIONS = 4
+RETRY_BACKOFF = 2.0
+
+_NOT_FOUND_PATTERN = re.compile(r"BlobNotFound|ResourceNotFound|specified blob does not exist")
+
+TRACE = Tracer("deploy-content")
+
+
+@dataclass
+class Artifact:
+    """A local build artifact and its content hashes."""
+
+    name: str
+    path: Path
+    size: int
+    md5: str  # base64, as Azure stores Content-MD5
+    sha256: str  # hex, stored in blob metadata
+
+    @property
+    def immutable_name(self) -> str:
+        """Content-addressed blob name, e.g. spec-driven-development.3f2a….pdf."""
+        return f"{self.path.stem}.{self.sha256[:HASH_NAME_LENGTH]}{self.path.suffix}"
+
+    @property
+    def content_type(self) -> str:
+        return CONTENT_TYPES.get(self.path.suffix, "application/octet-stream")
+
+
+@dataclass
+class BlobTarget:
+    """Where artifacts go, and how az authenticates to get there."""
+
+    container: str
+    account: str | None = None
+    connection_string: str | None = None
+    auth_mode: str | None = None
+
+    def az_args(self) -> list[str]:
+        """Account, container and auth arguments shared by every az call."""
+        args = ["--container-name", self.container]
+        if self.connection_string:
+            return [*args, "--connection-string", self.connection_string]
+        args += ["--account-name", str(self.account)]
+        if self.auth_mode:
+            args += ["--auth-mode", self.auth_mode]
+        return args
+
+    def url(self) -> str:
+        if self.connection_string:
+            match = re.search(r"BlobEndpoint=([^;]+)", self.connection_string)
+            if match:
+                return f"{match.group(1).rstrip('/')}/{self.container}/"
+        return f"https://{self.account}.blob.core.windows.net/{self.container}/"
+
 
 def check_deps():
     """Verify az CLI is available."""
@@ -24,53 +139,295 @@ def check_deps():
         sys.exit(1)
 
 
-def upload(storage_account: str, container: str):
-    """Upload artifacts to blob storage."""
-    uploaded = 0
-    for filename in ARTIFACTS:
-        filepath = OUTPUT_DIR / filename
-        if not filepath.exists():
-            print(f"  Skip {filename} (not found)")
-            continue
+def hash_file(path: Path) -> tuple[str, str]:
+    """Return (base64 MD5, hex SHA-256) of a file, reading it once."""
+    md5 = hashlib.md5(usedforsecurity=False)
+    sha256 = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            md5.update(chunk)
+            sha256.update(chunk)
+    return base64.b64encode(md5.digest()).decode("ascii"), sha256.hexdigest()
+
+
+def load_artifact(filename: str) -> Artifact | None:
+    filepath = OUTPUT_DIR / filename
+    if not filepath.exists():
+        return None
+    md5, sha256 = hash_file(filepath)
+    return Artifact(filename, filepath, filepath.stat().st_size, md5, sha256)
+
+
+def az(args: list[str], retries: int) -> subprocess.CompletedProcess:
+    """Run an az command, retrying transient failures with backoff.
+
+    Not-found responses are returned immediately so callers can tell a
+    missing blob from a failed request.
+    """
+    for attempt in range(retries + 1):
+        result = TRACE.run(
+            f"az {' '.join(args[:3])}", ["az", *args], capture_output=True, text=True
+        )
+        if result.returncode == 0 or _NOT_FOUND_PATTERN.search(result.stderr):
+            return result
+        if attempt < retries:
+            time.sleep(RETRY_BACKOFF * 2**attempt)
+    return result
+
+
+def remote_properties(target: BlobTarget, name: str, retries: int) -> dict[str, str] | None:
+    """Return the stored blob's Content-MD5, sha256 metadata, Content-Type and
+    Cache-Control (md5, sha256, content_type, cache_control), or None if absent."""
+    result = az(
+        [
+            "storage",
+            "blob",
+            "show",
+            *target.az_args(),
+            "--name",
+            name,
+            "--query",
+            "{md5: properties.contentSettings.contentMd5, sha256: metadata.sha256,"
+            " content_type: properties.contentSettings.contentType,"
+            " cache_control: properties.contentSettings.cacheControl}",
+            "--output",
+            "json",
+        ],
+        retries,
+    )
+    if result.returncode != 0:
+        if _NOT_FOUND_PATTERN.search(result.stderr):
+            return None
+        raise RuntimeError(f"az storage blob show {name} failed:\n{result.stderr}")
+    data = json.loads(result.stdout or "{}")
+    return {key: data.get(key) or "" for key in ("md5", "sha256", "content_type", "cache_control")}
+
+
+def update_headers(
+    target: BlobTarget, artifact: Artifact, name: str, cache_control: str, retries: int
+) -> None:
+    """Set an unchanged blob's Content-Type and Cache-Control without re-uploading it.
+
+    Content-MD5 is passed too, as setting blob properties replaces all of them.
+    """
+    result = az(
+        [
+            "storage",
+            "blob",
+            "update",
+            *target.az_args(),
+            "--name",
+            name,
+            "--content-md5",
+            artifact.md5,
+            "--content-type",
+            artifact.content_type,
+            "--content-cache-control",
+            cache_control,
+            "--only-show-errors",
+        ],
+        retries,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"az storage blob update {name} failed:\n{result.stderr}")
+
+
+def upload_artifact(
+    target: BlobTarget, artifact: Artifact, name: str, cache_control: str, retries: int
+) -> bool:
+    """Upload one artifact as blob `name` unless the stored blob already matches.
+
+    A matching blob whose Content-Type or Cache-Control differs (e.g. an
+    alias uploaded before its TTL changed) has just those headers updated.
+    Returns True if the artifact was uploaded.
+    """
+    remote = remote_properties(target, name, retries)
+    if remote and remote["md5"] == artifact.md5 and remote["sha256"] in ("", artifact.sha256):
+        headers = (artifact.content_type, cache_control)
+        if (remote["content_type"], remote["cache_control"]) == headers:
+            print(f"  Unchanged {name}")
+        else:
+            update_headers(target, artifact, name, cache_control, retries)
+            print(f"  Unchanged {name} (headers updated)")
+        return False
 
-        size_kb = filepath.stat().st_size / 1024
-        print(f"  Uploading {filename} ({size_kb:.1f} KB)...")
-        subprocess.run(
+    size_kb = artifact.size / 1024
+    print(f"  Uploading {name} ({size_kb:.1f} KB)...")
+    with TRACE.phase(f"upload {name}", bytes=artifact.size):
+        result = az(
             [
-                "az",
                 "storage",
                 "blob",
                 "upload",
-                "--account-name",
-                storage_account,
-                "--container-name",
-                container,
+                *target.az_args(),
                 "--name",
-                filename,
+                name,
                 "--file",
-                str(filepath),
+                str(artifact.path),
+                "--content-md5",
+                artifact.md5,
+                "--content-type",
+                artifact.content_type,
+                "--content-cache-control",
+                cache_control,
+                "--metadata",
+                f"sha256={artifact.sha256}",
+                "--max-connections",
+                str(MAX_CONNECTIONS),
                 "--overwrite",
+                "--only-show-errors",
             ],
-            check=True,
+            retries,
         )
-        uploaded += 1
+    if result.returncode != 0:
+        raise RuntimeError(f"az storage blob upload {name} failed:\n{result.stderr}")
+    print(f"  Uploaded {name}")
+    return True
 
-    print(f"\n{uploaded}/{len(ARTIFACTS)} uploaded.")
-    print(f"https://{storage_account}.blob.core.windows.net/{container}/")
 
+def upload_all(
+    target: BlobTarget,
+    uploads: list[tuple[Artifact, str]],
+    cache_control: str,
+    jobs: int,
+    retries: int,
+) -> tuple[int, int, list[str]]:
+    """Upload (artifact, blob_name) pairs concurrently.
 
-def main():
-    if len(sys.argv) < 2:
-        print(f"Usage: {sys.argv[0]} <storage-account> [container]")
+    Returns (uploaded, unchanged, errors).
+    """
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = [
+            pool.submit(upload_artifact, target, artifact, name, cache_control, retries)
+            for artifact, name in uploads
+        ]
+
+    uploaded = unchanged = 0
+    errors = []
+    for future in futures:
+        try:
+            if future.result():
+                uploaded += 1
+            else:
+                unchanged += 1
+        except RuntimeError as exc:
+            errors.append(str(exc))
+    return uploaded, unchanged, errors
+
+
+def write_manifest(artifacts: list[Artifact], version: str | None) -> Artifact:
+    """Write output/latest.json, mapping each artifact to its immutable blob."""
+    manifest = {
+        "version": version,
+        "artifacts": {
+            a.name: {
+                "path": a.immutable_name,
+                "sha256": a.sha256,
+                "size": a.size,
+                "content_type": a.content_type,
+            }
+            for a in artifacts
+        },
+    }
+    MANIFEST_FILE.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    md5, sha256 = hash_file(MANIFEST_FILE)
+    return Artifact(MANIFEST_NAME, MANIFEST_FILE, MANIFEST_FILE.stat().st_size, md5, sha256)
+
+
+def upload(target: BlobTarget, jobs: int, retries: int, version: str | None = None):
+    """Publish artifacts: immutable objects, then aliases, then latest.json.
+
+    latest.json is only replaced once every immutable object is in
+    place, so readers following it never see a half-updated set.
+    """
+    artifacts = []
+    with TRACE.phase("hash"):
+        for filename in ARTIFACTS:
+            artifact = load_artifact(filename)
+            if artifact is None:
+                print(f"  Skip {filename} (not found)")
+                continue
+            artifacts.append(artifact)
+
+    steps = [
+        ("Immutable objects", [(a, a.immutable_name) for a in artifacts], IMMUTABLE_CACHE_CONTROL),
+        ("Stable aliases", [(a, a.name) for a in artifacts], ALIAS_CACHE_CONTROL),
+    ]
+    totals = [0, 0]
+    for label, uploads, cache_control in steps:
+        print(f"\n{label}:")
+        with TRACE.phase(label.lower()):
+            uploaded, unchanged, errors = upload_all(target, uploads, cache_control, jobs, retries)
+        totals[0] += uploaded
+        totals[1] += unchanged
+        if errors:
+            for error in errors:
+                print(f"\nERROR: {error}")
+            print(f"\n{MANIFEST_NAME} not updated.")
+            sys.exit(1)
+
+    print("\nManifest:")
+    manifest = write_manifest(artifacts, version)
+    try:
+        upload_artifact(target, manifest, MANIFEST_NAME, MANIFEST_CACHE_CONTROL, retries)
+    except RuntimeError as exc:
+        print(f"\nERROR: {exc}")
         sys.exit(1)
 
-    storage_account = sys.argv[1]
-    container = sys.argv[2] if len(sys.argv) > 2 else "downloads"
+    print(f"\n{totals[0]} uploaded, {totals[1]} unchanged.")
+    print(f"{target.url()}{MANIFEST_NAME}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload build artifacts to Azure Blob Storage")
+    parser.add_argument("storage_account", help="Storage account name")
+    parser.add_argument("container", nargs="?", default="downloads", help="Blob container")
+    parser.add_argument(
+        "--connection-string",
+        default=os.environ.get("AZURE_STORAGE_CONNECTION_STRING"),
+        help="Authenticate with a connection string, e.g. for Azurite",
+    )
+    parser.add_argument(
+        "--azurite",
+        action="store_true",
+        help="Target a local Azurite emulator (creates the container if needed)",
+    )
+    parser.add_argument("--auth-mode", choices=["login", "key"], help="az auth mode")
+    parser.add_argument("--jobs", type=int, default=len(ARTIFACTS), help="Concurrent uploads")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per az call")
+    parser.add_argument("--version", help="Build reference recorded in latest.json")
+    args = parser.parse_args()
+
+    if args.azurite:
+        args.connection_string = AZURITE_CONNECTION_STRING
+
+    target = BlobTarget(
+        container=args.container,
+        account=args.storage_account,
+        connection_string=args.connection_string,
+        auth_mode=args.auth_mode,
+    )
+
+    if args.azurite:
+        az(
+            [
+                "storage",
+                "container",
+                "create",
+                "--name",
+                target.container,
+                "--connection-string",
+                AZURITE_CONNECTION_STRING,
+                "--only-show-errors",
+            ],
+            0,
+        )
 
-    print(f"Uploading to {storage_account}/{container}...\n")
-    upload(storage_account, container)
+    print(f"Uploading to {target.url()}...\n")
+    upload(target, args.jobs, args.retries, args.version)
 
 
 if __name__ == "__main__":
     check_deps()
-    main()
+    with TRACE:
+        main()
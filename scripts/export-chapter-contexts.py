@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Export every chapter's context bundle for offline agents.
+
+Writes the text the spec server's get_chapter_context returns for each
+of the 26 chapters, so batch jobs can read bundles from disk instead of
+making one MCP call per chapter:
+
+  - the specs are read once into memory; bundles are assembled from
+    that copy by .specmcp/chapter_context.py (the server's own code,
+    loaded without the MCP SDK)
+  - bundles are gzip-compressed and named by content hash,
+    chNN-context.<hash>.md.gz, in a thread pool (zlib releases the GIL)
+  - manifest.json lists each chapter's file, hash and sizes; a bundle
+    whose hash matches the manifest is not compressed or written again,
+    and files no longer in the manifest are removed
+
+Usage:
+  python scripts/export-chapter-contexts.py [--output DIR] [--jobs N] [--force]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from book_content import OUTPUT_DIR, REPO_ROOT
+from mcp_common import load_module
+from spec_graph import SPECS_ROOT, find_specs, outline_sections
+
+CHAPTER_CONTEXT = REPO_ROOT / ".specmcp" / "chapter_context.py"
+EXPORT_DIR = OUTPUT_DIR / "chapter-context"
+MANIFEST_NAME = "manifest.json"
+
+# Bump when the manifest layout changes; older manifests are ignored
+EXPORT_VERSION = 1
+
+
+def load_specs(specs_dir: Path = SPECS_ROOT) -> dict[str, str]:
+    """Every spec's text by name, read once."""
+    return {name: path.read_text(encoding="utf-8") for name, path in find_specs(specs_dir).items()}
+
+
+def load_export_manifest(output_dir: Path) -> dict[int, dict]:
+    """The previous export's entries by chapter number, if there is one."""
+    try:
+        data = json.loads((output_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+        if data.get("version") == EXPORT_VERSION:
+            return {entry["chapter"]: entry for entry in data["chapters"]}
+    except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+        pass  # Missing or corrupt — export everything
+    return {}
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    tmp_path.replace(path)
+
+
+def export_bundle(
+    number: int, title: str, text: str, previous: dict | None, output_dir: Path, force: bool
+) -> tuple[dict, bool]:
+    """Write one chapter's bundle unless the previous export has it.
+
+    Returns its manifest entry and whether it was written.
+    """
+    data = text.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    filename = f"ch{number:02d}-context.{digest[:16]}.md.gz"
+    if (
+        not force
+        and previous is not None
+        and previous["sha256"] == digest
+        and (output_dir / filename).exists()
+    ):
+        return previous, False
+
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    write_atomic(output_dir / filename, compressed)
+    entry = {
+        "chapter": number,
+        "title": title,
+        "file": filename,
+        "sha256": digest,
+        "bytes": len(data),
+        "compressed_bytes": len(compressed),
+    }
+    return entry, True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export chapter context bundles")
+    parser.add_argument("--output", type=Path, default=EXPORT_DIR, help="Export directory")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Parallel workers")
+    parser.add_argument("--force", action="store_true", help="Rewrite every bundle")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    context = load_module(CHAPTER_CONTEXT)
+    specs = load_specs()
+
+    def load_spec(name: str) -> str:
+        if name not in specs:
+            raise ValueError(f"Spec '{name}' not found.")
+        return specs[name]
+
+    titles = {
+        number: title for number, (title, _) in outline_sections(specs["chapter-outline"]).items()
+    }
+    args.output.mkdir(parents=True, exist_ok=True)
+    previous = load_export_manifest(args.output)
+
+    def export(number: int) -> tuple[dict, bool]:
+        text = context.chapter_context(number, load_spec)
+        return export_bundle(
+            number, titles.get(number, ""), text, previous.get(number), args.output, args.force
+        )
+
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(pool.map(export, context.CHAPTERS))
+
+    entries = [entry for entry, _ in results]
+    manifest = {"version": EXPORT_VERSION, "chapters": entries}
+    write_atomic(args.output / MANIFEST_NAME, json.dumps(manifest, indent=2).encode("utf-8"))
+
+    current = {entry["file"] for entry in entries}
+    for stale in args.output.glob("ch*-context.*.md.gz"):
+        if stale.name not in current:
+            stale.unlink()
+
+    written = sum(1 for _, was_written in results if was_written)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(
+        f"{len(entries)} bundles in {args.output} "
+        f"({written} written, {len(entries) - written} unchanged, {elapsed:.0f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
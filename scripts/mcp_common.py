@@ -0,0 +1,244 @@
+"""Shared runtime for the MCP servers: instrumentation, the file cache
+and response encoding.
+
+The spec, brand and skill servers import this module (each puts
+scripts/ on sys.path first), so the three stay in step. It imports
+nothing from the MCP SDK. Metrics are per process, and each server
+runs in its own process, so server_stats reports one server's calls.
+
+Scripts that reuse a server's SDK-free modules (its rules or chapter
+context code) import them by path with load_module.
+
+Usage (in a server):
+    @mcp.tool()
+    @instrumented
+    def get_thing(name: str) -> str:
+        return read_text(THINGS_DIR / f"{name}.md")
+"""
+
+from __future__ import annotations
+
+import bisect
+import functools
+import importlib.util
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Instrumentation
+# ---------------------------------------------------------------------------
+
+# Calls slower than this are logged to stderr as warnings.
+SLOW_CALL_MS = float(os.environ.get("MCP_SLOW_CALL_MS", "250"))
+
+# Latency histogram bucket upper bounds, in milliseconds.
+LATENCY_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+
+@dataclass
+class ToolStats:
+    """Aggregated metrics for one tool."""
+
+    calls: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+
+    def record(self, elapsed_ms: float, bytes_in: int, bytes_out: int, failed: bool) -> None:
+        self.calls += 1
+        self.errors += failed
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def to_dict(self) -> dict:
+        labels = [f"<={b}ms" for b in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "latency_histogram": dict(zip(labels, self.buckets, strict=True)),
+        }
+
+
+_stats_lock = threading.Lock()
+_tool_stats: dict[str, ToolStats] = {}
+_cache_stats = {"hits": 0, "misses": 0}
+_started = time.monotonic()
+_call_ids = itertools.count(1)
+
+
+def _payload_size(value: object) -> int:
+    """Approximate wire size of a tool argument or result, in bytes."""
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return len(json.dumps(value, default=str).encode("utf-8"))
+
+
+def instrumented(fn: Callable[..., str]) -> Callable[..., str]:
+    """Record call count, latency and payload sizes for a tool.
+
+    Apply below @mcp.tool() so FastMCP registers the wrapped function;
+    functools.wraps keeps the signature and docstring it builds the
+    tool schema from.
+    """
+    with _stats_lock:
+        stats = _tool_stats.setdefault(fn.__name__, ToolStats())
+
+    @functools.wraps(fn)
+    def wrapper(*args: object, **kwargs: object) -> str:
+        call_id = next(_call_ids)
+        bytes_in = _payload_size([args, kwargs])
+        result = ""
+        failed = True
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            bytes_out = _payload_size(result)
+            with _stats_lock:
+                stats.record(elapsed_ms, bytes_in, bytes_out, failed)
+            logger.debug(
+                "call %d %s %.1fms in=%dB out=%dB",
+                call_id,
+                fn.__name__,
+                elapsed_ms,
+                bytes_in,
+                bytes_out,
+            )
+            if elapsed_ms >= SLOW_CALL_MS:
+                logger.warning(
+                    "Slow tool call %d: %s took %.1fms (in=%dB out=%dB)",
+                    call_id,
+                    fn.__name__,
+                    elapsed_ms,
+                    bytes_in,
+                    bytes_out,
+                )
+
+    return wrapper
+
+
+def stats_report(server: str) -> dict:
+    """The server_stats report: per-tool metrics, slowest total first, and
+    the file cache's hit ratio."""
+    with _stats_lock:
+        tools = {name: s.to_dict() for name, s in _tool_stats.items() if s.calls}
+        hits, misses = _cache_stats["hits"], _cache_stats["misses"]
+    return {
+        "server": server,
+        "uptime_s": round(time.monotonic() - _started, 1),
+        "slow_call_ms": SLOW_CALL_MS,
+        "tools": dict(sorted(tools.items(), key=lambda item: -item[1]["total_ms"])),
+        "file_cache": {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else None,
+            "entries": len(_file_cache),
+        },
+    }
+
+
+# ---------------------------------------------------------------------------
+# File cache
+# ---------------------------------------------------------------------------
+
+_file_cache: dict[Path, tuple[int, int, str]] = {}
+
+
+def read_text(path: Path) -> str:
+    """Read a UTF-8 file, reusing the cached text while its mtime and size match."""
+    stat = path.stat()
+    cached = _file_cache.get(path)
+    hit = cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size)
+    with _stats_lock:
+        _cache_stats["hits" if hit else "misses"] += 1
+    if hit:
+        return cached[2]
+    text = path.read_text(encoding="utf-8")
+    _file_cache[path] = (stat.st_mtime_ns, stat.st_size, text)
+    return text
+
+
+# ---------------------------------------------------------------------------
+# Response encoding
+# ---------------------------------------------------------------------------
+
+# "pretty" (indented JSON), "compact" (JSON without whitespace) or "table"
+# (compact JSON with record lists as {"columns": [...], "rows": [[...]]}).
+# Tools take a per-call `encoding`; MCP_RESPONSE_ENCODING sets the default.
+ENCODINGS = ("pretty", "compact", "table")
+DEFAULT_ENCODING = os.environ.get("MCP_RESPONSE_ENCODING", "pretty")
+
+
+def encode(
+    data: list | dict,
+    encoding: str | None = None,
+    fields: list[str] | None = None,
+    records_key: str | None = None,
+) -> str:
+    """Serialize a tool response.
+
+    `data` is a list of records, or a dict holding one under `records_key`
+    (e.g. a report's "issues"). `fields` keeps only those keys of each
+    record. Returns an error string for an unknown encoding or field.
+    """
+    encoding = encoding or DEFAULT_ENCODING
+    if encoding not in ENCODINGS:
+        return f"Unknown encoding '{encoding}'. Choose from: {', '.join(ENCODINGS)}."
+
+    records = data[records_key] if isinstance(data, dict) and records_key else data
+    if isinstance(records, list) and (fields or encoding == "table"):
+        columns = list(dict.fromkeys(key for record in records for key in record))
+        if fields:
+            unknown = [f for f in fields if f not in columns]
+            if records and unknown:
+                return f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(columns)}."
+            columns = list(fields)
+            records = [{k: r[k] for k in columns if k in r} for r in records]
+        if encoding == "table":
+            records = {"columns": columns, "rows": [[r.get(c) for c in columns] for r in records]}
+        data = {**data, records_key: records} if isinstance(data, dict) else records
+
+    if encoding == "pretty":
+        return json.dumps(data, indent=2)
+    return json.dumps(data, separators=(",", ":"))
+
+
+# ---------------------------------------------------------------------------
+# Server modules
+# ---------------------------------------------------------------------------
+
+
+def load_module(path: Path) -> ModuleType:
+    """Import a server's module by path, without the MCP SDK or its server."""
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot load {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[path.stem] = module  # dataclasses resolves annotations through sys.modules
+    spec.loader.exec_module(module)
+    return module
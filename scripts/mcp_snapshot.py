@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Pack the MCP servers' trees into one read-only snapshot.
+
+The spec, brand and skill servers walk their directories and read files
+to answer every call. Started with --snapshot, they read a packed SQLite
+file built here instead: startup opens one file, and listings and
+lookups are indexed reads. The live directories stay the default, for
+authoring; a snapshot shows the trees as they were when it was packed.
+
+One snapshot holds all three trees:
+
+  specs   .specmcp/specs
+  brand   .brandmcp/brand
+  skills  .skillmcp/skills
+
+Tables:
+
+  meta    key/value pairs: version, built_at
+  files   one row per .md or .json file: root (a name above), seq (its
+          place in the sorted directory walk, so listings keep the live
+          order), path (relative to the root), name (the stem), category
+          (the parent directory's name), title (first `# ` heading, or
+          the name), size_bytes and text
+
+The file is written to a temporary name and renamed into place, so a
+server reading the old snapshot is never disturbed.
+
+The servers read it through Snapshot, one root per server, and open it
+from their --snapshot argument with snapshot_from_args.
+
+Usage:
+  python scripts/mcp_snapshot.py [--output PATH]
+  python .specmcp/server.py --snapshot output/mcp-snapshot.sqlite
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sqlite3
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+from book_content import OUTPUT_DIR, REPO_ROOT
+
+ROOTS = {
+    "specs": REPO_ROOT / ".specmcp" / "specs",
+    "brand": REPO_ROOT / ".brandmcp" / "brand",
+    "skills": REPO_ROOT / ".skillmcp" / "skills",
+}
+SNAPSHOT_FILE = OUTPUT_DIR / "mcp-snapshot.sqlite"
+
+logger = logging.getLogger(__name__)
+
+# Bump when the schema changes; servers refuse snapshots of another version
+SNAPSHOT_VERSION = 1
+
+# The only files the servers read
+PACKED_SUFFIXES = frozenset({".md", ".json"})
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE files (
+    root TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    title TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (root, seq)
+);
+CREATE UNIQUE INDEX files_path ON files (root, path);
+CREATE INDEX files_name ON files (root, name, seq);
+"""
+
+
+def extract_title(text: str, name: str) -> str:
+    """The first markdown heading, as the servers' _extract_title reads it."""
+    for line in text.splitlines():
+        if line.startswith("# "):
+            return line.removeprefix("# ").strip()
+    return name
+
+
+def pack(roots: dict[str, Path] = ROOTS, output: Path = SNAPSHOT_FILE) -> int:
+    """Write a snapshot of roots (name -> directory) to output.
+
+    Returns the number of files packed.
+    """
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp_path)
+    count = 0
+    try:
+        conn.executescript(SCHEMA)
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [
+                ("version", str(SNAPSHOT_VERSION)),
+                ("built_at", datetime.now(UTC).isoformat(timespec="seconds")),
+            ],
+        )
+        for root, directory in roots.items():
+            paths = [
+                p
+                for p in sorted(directory.rglob("*"))
+                if p.suffix in PACKED_SUFFIXES and p.is_file()
+            ]
+            rows = []
+            for seq, path in enumerate(paths):
+                data = path.read_bytes()
+                text = data.decode("utf-8")
+                rows.append(
+                    (
+                        root,
+                        seq,
+                        str(path.relative_to(directory)),
+                        path.stem,
+                        path.parent.name,
+                        extract_title(text, path.stem),
+                        len(data),
+                        text,
+                    )
+                )
+            conn.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            count += len(rows)
+        conn.commit()
+    finally:
+        conn.close()
+    tmp_path.replace(output)
+    return count
+
+
+# The columns of the servers' SpecInfo, BrandInfo and SkillInfo records, in order
+INFO_COLUMNS = "name, category, path, title, size_bytes"
+
+# The files the servers' live directory walks list (provenance has its own tools)
+MARKDOWN = "path GLOB '*.md' AND name NOT GLOB '*.provenance'"
+
+
+class Snapshot:
+    """One root of a packed snapshot, opened read-only for a server."""
+
+    def __init__(self, path: Path, root: str):
+        """Open path for root ("specs", "brand" or "skills").
+
+        Raises ValueError unless it is a snapshot of this version holding root.
+        """
+        self.path = path
+        self.root = root
+        # immutable: the file is never written in place (pack renames a new one over it)
+        uri = f"{path.resolve().as_uri()}?mode=ro&immutable=1"
+        try:
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            version = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            files = self._conn.execute("SELECT count(*) FROM files WHERE root = ?", (root,))
+            count = files.fetchone()[0]
+        except sqlite3.Error as exc:
+            raise ValueError(f"Cannot read snapshot {path}: {exc}") from exc
+        if version != (str(SNAPSHOT_VERSION),) or not count:
+            self._conn.close()
+            raise ValueError(f"{path} is not a version {SNAPSHOT_VERSION} snapshot of {root}/")
+
+    def _rows(self, columns: str, where: str, params: tuple) -> list[tuple]:
+        sql = f"SELECT {columns} FROM files WHERE root = ? AND {where} ORDER BY seq"
+        return self._conn.execute(sql, (self.root, *params)).fetchall()
+
+    def infos(self, where: str, *params: object) -> list[tuple]:
+        """INFO_COLUMNS of the files matching where, in directory-walk order."""
+        return self._rows(INFO_COLUMNS, where, params)
+
+    def text(self, where: str, *params: object) -> str | None:
+        """The text of the first file matching where, or None."""
+        rows = self._rows("text", where, params)
+        return rows[0][0] if rows else None
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def snapshot_from_args(description: str, root: str) -> Snapshot | None:
+    """Parse a server's command line and open its --snapshot, if given.
+
+    Exits with a usage error if the snapshot cannot serve root.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--snapshot",
+        type=Path,
+        help=f"Serve {root}/ from a packed snapshot ({Path(__file__).name})",
+    )
+    args = parser.parse_args()
+    if args.snapshot is None:
+        return None
+    try:
+        snapshot = Snapshot(args.snapshot, root)
+    except ValueError as exc:
+        parser.error(str(exc))
+    logger.info("Serving %s/ from %s", root, args.snapshot)
+    return snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack the MCP servers' trees into a snapshot")
+    parser.add_argument("--output", type=Path, default=SNAPSHOT_FILE, help="Snapshot file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = pack(output=args.output)
+    elapsed = (time.perf_counter() - start) * 1000
+    size = args.output.stat().st_size / 1024
+    print(f"Packed {count} files into {args.output} ({size:.0f} KB, {elapsed:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Pandoc conversions through a running pandoc server, or subprocesses.
+
+Every `pandoc` process pays Haskell runtime start-up and option parsing
+before it converts anything. A long-lived `pandoc server` (or the
+separate `pandoc-server` binary) pays that once; conversions are then
+HTTP requests, and a whole book's chapters go in a single /batch
+request.
+
+    backend = get_backend("auto")           # server if one answers, else subprocess
+    html = backend.convert_many([Conversion(text, {"from": "markdown", "to": "html5"})])
+
+Options use pandoc-server's JSON names, which match the long command
+line options (`{"wrap": "none"}` is `--wrap=none`), so the subprocess
+backend runs the same conversion. The server is found at $PANDOC_SERVER,
+or http://127.0.0.1:3030 (start it with `pandoc server`). If it stops
+answering mid-build, the remaining conversions fall back to
+subprocesses.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import subprocess
+import urllib.error
+import urllib.request
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+SERVER_ENV = "PANDOC_SERVER"
+DEFAULT_SERVER_URL = "http://127.0.0.1:3030"
+BACKENDS = ("auto", "server", "subprocess")
+
+# A quick probe: a local server answers /version in milliseconds
+PROBE_TIMEOUT_SECONDS = 0.5
+REQUEST_TIMEOUT_SECONDS = 120
+BATCH_SIZE = 64
+
+
+class PandocError(RuntimeError):
+    """A conversion pandoc rejected (bad input or options), from either backend."""
+
+
+@dataclass
+class Conversion:
+    """One document to convert, with pandoc-server style options."""
+
+    text: str
+    options: dict[str, str | bool] = field(default_factory=dict)
+
+    def to_request(self) -> dict:
+        return {"text": self.text, **self.options}
+
+    def to_args(self) -> list[str]:
+        args = []
+        for key, value in self.options.items():
+            if value is True:
+                args.append(f"--{key}")
+            elif value is not False:
+                args.append(f"--{key}={value}")
+        return args
+
+
+def _run_pandoc(name: str, cmd: list[str], **kwargs) -> subprocess.CompletedProcess:
+    return subprocess.run(cmd, **kwargs)
+
+
+class SubprocessBackend:
+    """One pandoc process per conversion, run from a thread pool.
+
+    run has build_trace.Tracer.run's signature, so builds can pass
+    TRACE.run and keep per-process timings in their traces.
+    """
+
+    name = "subprocess"
+
+    def __init__(self, run: Callable[..., subprocess.CompletedProcess] = _run_pandoc):
+        self._run = run
+
+    def version(self) -> str:
+        result = subprocess.run(["pandoc", "--version"], capture_output=True, text=True, check=True)
+        return result.stdout.splitlines()[0]
+
+    def convert(self, conversion: Conversion) -> str:
+        result = self._run(
+            "pandoc",
+            ["pandoc", *conversion.to_args()],
+            input=conversion.text,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise PandocError(result.stderr)
+        return result.stdout
+
+    def convert_many(self, conversions: list[Conversion]) -> list[str]:
+        if len(conversions) <= 1:
+            return [self.convert(c) for c in conversions]
+        with ThreadPoolExecutor(os.cpu_count()) as pool:
+            return list(pool.map(self.convert, conversions))
+
+
+class ServerBackend:
+    """Conversions as HTTP requests to a running pandoc server.
+
+    Falls back to `fallback` for any batch the server cannot be reached
+    for; conversion errors reported by the server raise PandocError.
+    """
+
+    name = "server"
+
+    def __init__(self, url: str, fallback: SubprocessBackend | None = None):
+        self.url = url.rstrip("/")
+        self.fallback = fallback
+        self.requests = 0
+
+    def _request(self, path: str, payload=None, timeout: float = REQUEST_TIMEOUT_SECONDS):
+        data = None if payload is None else json.dumps(payload).encode("utf-8")
+        request = urllib.request.Request(
+            f"{self.url}{path}",
+            data=data,
+            headers={"Content-Type": "application/json", "Accept": "application/json"},
+        )
+        self.requests += 1
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.read().decode("utf-8")
+        except urllib.error.HTTPError as exc:
+            raise PandocError(exc.read().decode("utf-8", "replace") or str(exc)) from exc
+
+    def available(self) -> bool:
+        """True if a pandoc server (not just any HTTP server) answers at url."""
+        try:
+            version = self._server_version(PROBE_TIMEOUT_SECONDS)
+        except (OSError, PandocError):
+            return False
+        return bool(re.fullmatch(r"\d+(\.\d+)*", version))
+
+    def _server_version(self, timeout: float = REQUEST_TIMEOUT_SECONDS) -> str:
+        body = self._request("/version", timeout=timeout).strip()
+        try:
+            version = json.loads(body)  # A JSON string when asked for JSON
+        except ValueError:
+            version = body
+        return str(version)
+
+    def version(self) -> str:
+        # Matches the first line of `pandoc --version`, so caches keyed on
+        # the version are shared between backends
+        return f"pandoc {self._server_version()}"
+
+    def _convert_batch(self, batch: list[Conversion]) -> list[str]:
+        results = json.loads(self._request("/batch", [c.to_request() for c in batch]))
+        outputs = []
+        for result in results:
+            if isinstance(result, str):  # Older servers return bare output
+                outputs.append(result)
+                continue
+            if result.get("error"):
+                raise PandocError(result["error"])
+            if result.get("base64"):
+                raise PandocError("pandoc server returned binary output for a text format")
+            outputs.append(result["output"])
+        return outputs
+
+    def convert(self, conversion: Conversion) -> str:
+        return self.convert_many([conversion])[0]
+
+    def convert_many(self, conversions: list[Conversion]) -> list[str]:
+        outputs: list[str] = []
+        for start in range(0, len(conversions), BATCH_SIZE):
+            batch = conversions[start : start + BATCH_SIZE]
+            try:
+                outputs.extend(self._convert_batch(batch))
+            except (OSError, ValueError) as exc:  # Unreachable, or not a pandoc server
+                if self.fallback is None:
+                    raise
+                print(f"  Warning: pandoc server failed ({exc}); using subprocesses")
+                outputs.extend(self.fallback.convert_many(conversions[start:]))
+                break
+        return outputs
+
+
+def get_backend(
+    mode: str = "auto",
+    url: str | None = None,
+    run: Callable[..., subprocess.CompletedProcess] = _run_pandoc,
+) -> SubprocessBackend | ServerBackend:
+    """Pick a backend.
+
+    auto uses the server when it answers, otherwise subprocesses. server
+    insists on the server (still falling back mid-build if it goes away).
+    """
+    if mode not in BACKENDS:
+        raise ValueError(f"Unknown pandoc backend {mode!r} (choose from {', '.join(BACKENDS)})")
+    subprocess_backend = SubprocessBackend(run)
+    if mode == "subprocess":
+        return subprocess_backend
+    server = ServerBackend(
+        url or os.environ.get(SERVER_ENV, DEFAULT_SERVER_URL), subprocess_backend
+    )
+    if server.available():
+        return server
+    if mode == "server":
+        raise PandocError(f"No pandoc server answering at {server.url} (start one: pandoc server)")
+    return subprocess_backend
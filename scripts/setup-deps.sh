@@ -6,8 +6,10 @@ REPO_ROOT="$(cd "$SCRIPT_DIR/.." && pwd)"
 FONT_DIR="$REPO_ROOT/assets/fonts"
 FONT_INSTALL_DIR="/usr/local/share/fonts/sdd-book"
 
-# Short-circuit if dependencies are already installed (cache hit)
-if command -v xelatex > /dev/null && command -v pandoc > /dev/null && command -v rsvg-convert > /dev/null && command -v pre-commit > /dev/null && [ -f "$FONT_INSTALL_DIR/SourceSerif4-Regular.ttf" ]; then
+# Short-circuit if dependencies are already installed (cache hit), including
+# Pillow and fontTools, which the image and font stages quietly skip without
+if command -v xelatex > /dev/null && command -v pandoc > /dev/null && command -v rsvg-convert > /dev/null && command -v gs > /dev/null && command -v pre-commit > /dev/null && [ -f "$FONT_INSTALL_DIR/SourceSerif4-Regular.ttf" ] \
+  && python3 -c "import PIL, fontTools" 2> /dev/null; then
   echo "==> Dependencies already installed (cache hit), skipping."
   exit 0
 fi
@@ -16,6 +18,7 @@ echo "==> Installing system dependencies..."
 sudo apt-get update -qq || echo "    Warning: apt-get update had errors, continuing..."
 sudo apt-get install -y -qq \
   librsvg2-bin \
+  ghostscript \
   pandoc \
   texlive-xetex \
   texlive-latex-extra \
@@ -41,6 +44,7 @@ sudo fc-cache -f > /dev/null 2>&1
 
 echo "==> Verifying..."
 command -v rsvg-convert > /dev/null && echo "    rsvg-convert: OK" || { echo "    rsvg-convert: MISSING"; exit 1; }
+command -v gs > /dev/null && echo "    ghostscript: OK" || { echo "    ghostscript: MISSING"; exit 1; }
 command -v pandoc > /dev/null && echo "    pandoc: OK" || { echo "    pandoc: MISSING"; exit 1; }
 command -v xelatex > /dev/null && echo "    xelatex: OK" || { echo "    xelatex: MISSING"; exit 1; }
 command -v pre-commit > /dev/null && echo "    pre-commit: OK" || { echo "    pre-commit: MISSING"; exit 1; }
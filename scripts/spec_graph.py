@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""Spec-to-chapter dependency graph for targeted rebuilds and re-validation.
+
+Answers "which chapters does this change affect?", so validation and
+rebuilds can be limited to those chapters. Each chapter depends on the
+spec text the spec server's get_chapter_context bundles for it, split
+as finely as the specs allow:
+
+  book-brief, writers-guide,        whole specs, in every chapter's
+  prior-art, continuity-tracker     context
+  chapter-outline#N                 the `### Chapter N:` section
+  diataxis-integration#N            the chapter's classification row
+  chNN-brief                        the chapter brief (a missing brief
+                                    is a node too, so adding one counts)
+  glossary                          the glossary outside its entries
+  glossary#Term                     one `### Term` entry; a chapter
+                                    depends on the entries for the
+                                    terms its content uses
+
+Chapters are numbered by chapter-outline.md. Chapter N's content is the
+chapter file of content/ whose H1 is the outline's title for chapter N
+(ignoring case and punctuation) or starts `Chapter N:`, if one has been
+written. Position in the book is not used, so chapters can be drafted in
+any order; a file matching no outline chapter is left unmapped.
+
+The graph is saved, with a hash of every node, to
+output/.cache/spec-graph.json. Rebuilding it is incremental: spec
+sections are rehashed (a few reads), but a chapter's term usage is only
+rescanned when its content or the glossary's term list changed.
+`affected` compares the current specs and content with the saved graph.
+
+Usage:
+  python scripts/spec_graph.py affected [PATH ...]   # chapters affected since the last update
+  python scripts/spec_graph.py affected --files      # ...as content paths, for other tools
+  python scripts/spec_graph.py affected --update     # ...then save the current graph
+  python scripts/spec_graph.py update                # save the current graph
+  python scripts/spec_graph.py show N                # what chapter N depends on
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from book_content import CONTENT_DIR, OUTPUT_DIR, REPO_ROOT, ContentFile, load_manifest
+from book_index import TermMatcher, glossary_terms
+
+SPECS_ROOT = REPO_ROOT / ".specmcp" / "specs"
+GRAPH_CACHE = OUTPUT_DIR / ".cache" / "spec-graph.json"
+
+# Bump when node naming or hashing changes; older graphs are rebuilt from scratch
+GRAPH_VERSION = 1
+
+# Whole specs in every chapter's context
+SHARED_SPECS = ["book-brief", "writers-guide", "prior-art", "continuity-tracker"]
+OUTLINE = "chapter-outline"
+DIATAXIS = "diataxis-integration"
+GLOSSARY = "glossary"
+
+_CHAPTER_HEADING_PATTERN = re.compile(r"^### Chapter (\d+):\s*(.*?)\s*$")
+_CHAPTER_TITLE_PATTERN = re.compile(r"^Chapter (\d+):", re.IGNORECASE)
+_WORD_PATTERN = re.compile(r"\w+")
+_OUTLINE_END_PATTERN = re.compile(r"^###? ")
+_DIATAXIS_ROW_PATTERN = re.compile(r"^\|\s*(\d+)\s*\|")
+_SECTION_END_PATTERN = re.compile(r"^#{1,3} ")
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def brief_name(number: int) -> str:
+    return f"ch{number:02d}-brief"
+
+
+def spec_name(node: str) -> str:
+    """The spec a node's text comes from: the node id up to any '#'."""
+    return node.partition("#")[0]
+
+
+# ---------------------------------------------------------------------------
+# Spec sections
+# ---------------------------------------------------------------------------
+
+
+def find_specs(specs_dir: Path = SPECS_ROOT) -> dict[str, Path]:
+    """Spec files by name, found the way the spec server's load_spec finds them."""
+    specs: dict[str, Path] = {}
+    for path in sorted(specs_dir.rglob("*.md")):
+        if not path.stem.endswith(".provenance"):
+            specs.setdefault(path.stem, path)
+    return specs
+
+
+def outline_sections(text: str) -> dict[int, tuple[str, str]]:
+    """(title, section text) for each `### Chapter N:` of the outline.
+
+    A section runs to the next `##` or `###` heading, as in the spec
+    server's extract_chapter_section.
+    """
+    sections: dict[int, tuple[str, str]] = {}
+    lines = text.splitlines()
+    current: tuple[int, str, int] | None = None
+    for i, line in enumerate([*lines, "## "]):
+        if current is not None and _OUTLINE_END_PATTERN.match(line):
+            number, title, start = current
+            sections.setdefault(number, (title, "\n".join(lines[start:i]).strip()))
+            current = None
+        match = _CHAPTER_HEADING_PATTERN.match(line)
+        if match:
+            current = (int(match.group(1)), match.group(2), i)
+    return sections
+
+
+def diataxis_rows(text: str) -> dict[int, str]:
+    """The first `| N |` classification row for each chapter."""
+    rows: dict[int, str] = {}
+    for line in text.splitlines():
+        match = _DIATAXIS_ROW_PATTERN.match(line)
+        if match:
+            rows.setdefault(int(match.group(1)), line.strip())
+    return rows
+
+
+def glossary_sections(text: str) -> tuple[str, dict[str, str]]:
+    """The glossary outside its entries, and each `### Term` entry's text
+    (heading to the next heading of level 3 or above) by term name."""
+    entries: dict[str, list[str]] = {}
+    rest: list[str] = []
+    current: list[str] = rest
+    for line in text.splitlines():
+        terms = glossary_terms(line) if line.startswith("###") else []
+        if terms:
+            current = entries.setdefault(terms[0].name, [])
+        elif _SECTION_END_PATTERN.match(line):
+            current = rest
+        current.append(line)
+    return "\n".join(rest), {name: "\n".join(lines) for name, lines in entries.items()}
+
+
+# ---------------------------------------------------------------------------
+# The graph
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class Chapter:
+    """A chapter and the nodes it depends on."""
+
+    number: int
+    title: str  # From the outline
+    path: str | None  # Content file relative to the repository, if written
+    sha256: str | None  # Of the content file
+    terms: list[str] = field(default_factory=list)  # Glossary terms the content uses
+
+    @property
+    def depends(self) -> list[str]:
+        return [
+            *SHARED_SPECS,
+            f"{OUTLINE}#{self.number}",
+            f"{DIATAXIS}#{self.number}",
+            brief_name(self.number),
+            GLOSSARY,
+            *(f"{GLOSSARY}#{term}" for term in self.terms),
+        ]
+
+
+@dataclass
+class SpecGraph:
+    """Node hashes and the chapters that depend on them."""
+
+    nodes: dict[str, str] = field(default_factory=dict)  # Node id -> hash of its text
+    chapters: list[Chapter] = field(default_factory=list)
+    terms_key: str = ""  # TermMatcher.key of the glossary the terms were found with
+
+    def chapter(self, number: int) -> Chapter | None:
+        return next((c for c in self.chapters if c.number == number), None)
+
+    def to_dict(self) -> dict:
+        return {
+            "version": GRAPH_VERSION,
+            "nodes": self.nodes,
+            "chapters": [asdict(c) for c in self.chapters],
+            "terms_key": self.terms_key,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> SpecGraph:
+        return cls(
+            nodes=data["nodes"],
+            chapters=[Chapter(**entry) for entry in data["chapters"]],
+            terms_key=data["terms_key"],
+        )
+
+    def save(self, path: Path = GRAPH_CACHE) -> None:
+        """Write the graph atomically so concurrent readers never see half a file."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(self.to_dict()), encoding="utf-8")
+        tmp_path.replace(path)
+
+
+def load_graph(path: Path = GRAPH_CACHE) -> SpecGraph:
+    """The saved graph, or an empty one if there is none (or it is outdated)."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") == GRAPH_VERSION:
+            return SpecGraph.from_dict(data)
+    except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+        pass  # Missing or corrupt — start from an empty graph
+    return SpecGraph()
+
+
+def spec_reader(specs_dir: Path = SPECS_ROOT) -> Callable[[str], str | None]:
+    """A function reading a spec's text by name from specs_dir (None if missing)."""
+    specs = find_specs(specs_dir)
+
+    def read_spec(name: str) -> str | None:
+        path = specs.get(name)
+        return path.read_text(encoding="utf-8") if path else None
+
+    return read_spec
+
+
+def spec_nodes(
+    read_spec: Callable[[str], str | None] | None = None,
+) -> tuple[dict[str, str], dict[int, str], str]:
+    """Hash every node the specs define.
+
+    Specs are read with read_spec (name -> text, or None if there is no
+    such spec); the default reads the live specs/ tree. Returns the node
+    hashes, the outline's chapter titles by number, and the glossary
+    text (for term matching).
+    """
+    read_spec = read_spec or spec_reader()
+
+    def read(name: str) -> str:
+        return read_spec(name) or ""
+
+    nodes = {name: _hash(read(name)) for name in SHARED_SPECS}
+    outline = outline_sections(read(OUTLINE))
+    for number, (_, section) in outline.items():
+        nodes[f"{OUTLINE}#{number}"] = _hash(section)
+    for number, row in diataxis_rows(read(DIATAXIS)).items():
+        nodes[f"{DIATAXIS}#{number}"] = _hash(row)
+    for number in outline:
+        brief = read_spec(brief_name(number))
+        if brief is not None:
+            nodes[brief_name(number)] = _hash(brief)
+
+    glossary = read(GLOSSARY)
+    rest, entries = glossary_sections(glossary)
+    nodes[GLOSSARY] = _hash(rest)
+    for name, entry in entries.items():
+        nodes[f"{GLOSSARY}#{name}"] = _hash(entry)
+
+    titles = {number: title for number, (title, _) in outline.items()}
+    return nodes, titles, glossary
+
+
+def _title_key(title: str) -> str:
+    """A title with case and punctuation ignored, for matching headings."""
+    return " ".join(_WORD_PATTERN.findall(title.casefold()))
+
+
+def chapter_files(files: list[ContentFile], titles: dict[int, str]) -> dict[int, ContentFile]:
+    """Written chapter files by outline chapter number.
+
+    A file is chapter N if its H1 starts `Chapter N:` or is the outline's
+    title for chapter N. Files matching no chapter, or one an earlier
+    file already matched, are left out.
+    """
+    numbers = {_title_key(title): number for number, title in titles.items()}
+    found: dict[int, ContentFile] = {}
+    for f in files:
+        if f.kind != "chapter":
+            continue
+        match = _CHAPTER_TITLE_PATTERN.match(f.title)
+        number = int(match.group(1)) if match else numbers.get(_title_key(f.title))
+        if number in titles:
+            found.setdefault(number, f)
+    return found
+
+
+def build_graph(
+    previous: SpecGraph | None = None,
+    read_spec: Callable[[str], str | None] | None = None,
+    content_dir: Path = CONTENT_DIR,
+) -> SpecGraph:
+    """The graph for the current specs and content.
+
+    Specs are read as spec_nodes reads them. A chapter's term usage is
+    copied from `previous` when neither its content nor the glossary's
+    terms have changed since.
+    """
+    previous = previous or SpecGraph()
+    nodes, titles, glossary = spec_nodes(read_spec)
+    matcher = TermMatcher(glossary_terms(glossary))
+
+    written = chapter_files(load_manifest(content_dir).files, titles)
+    chapters = []
+    for number, title in sorted(titles.items()):
+        chapter = Chapter(number, title, path=None, sha256=None)
+        content = written.get(number)
+        if content is not None:
+            chapter.path = content.path.relative_to(REPO_ROOT).as_posix()
+            chapter.sha256 = content.sha256
+            before = previous.chapter(number)
+            if (
+                before is not None
+                and before.sha256 == content.sha256
+                and previous.terms_key == matcher.key
+            ):
+                chapter.terms = before.terms
+            else:
+                chapter.terms = sorted({name for _, _, name in matcher.find(content.text)})
+        chapters.append(chapter)
+
+    return SpecGraph(nodes=nodes, chapters=chapters, terms_key=matcher.key)
+
+
+def repo_path(path: str) -> str:
+    """A path given on the command line (absolute, or relative to the
+    working directory) relative to the repository, in posix form."""
+    resolved = Path(path).resolve()
+    try:
+        return resolved.relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        return resolved.as_posix()
+
+
+def affected(
+    previous: SpecGraph, current: SpecGraph, paths: list[str] | None = None
+) -> list[tuple[Chapter, list[str]]]:
+    """Chapters of `current` affected by the changes since `previous`, each
+    with its reasons: the changed nodes it depends on, and "content" if
+    its own file changed.
+
+    With paths (relative to the repository), only changes to those spec
+    and content files count.
+    """
+    changed = {
+        node
+        for node in previous.nodes.keys() | current.nodes.keys()
+        if previous.nodes.get(node) != current.nodes.get(node)
+    }
+    relative = [Path(p).as_posix() for p in paths or []]
+    if paths is not None:
+        specs = {Path(p).stem for p in relative if p.startswith(".specmcp/specs/")}
+        changed = {node for node in changed if spec_name(node) in specs}
+
+    results = []
+    for chapter in current.chapters:
+        # Usage before the change counts too: removing a term's last use affects the chapter
+        before = previous.chapter(chapter.number)
+        depends = set(chapter.depends) | set(before.depends if before else [])
+        reasons = sorted(changed & depends)
+        content_changed = before is None or (before.path, before.sha256) != (
+            chapter.path,
+            chapter.sha256,
+        )
+        if content_changed and chapter.path and (paths is None or chapter.path in relative):
+            reasons.insert(0, "content")
+        if reasons:
+            results.append((chapter, reasons))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spec-to-chapter dependency graph")
+    commands = parser.add_subparsers(dest="command", required=True)
+    affected_parser = commands.add_parser(
+        "affected", help="Chapters affected by changes since the last update"
+    )
+    affected_parser.add_argument("paths", nargs="*", help="Only count changes to these files")
+    affected_parser.add_argument(
+        "--files", action="store_true", help="Print only the affected content files"
+    )
+    affected_parser.add_argument(
+        "--update", action="store_true", help="Save the current graph afterwards"
+    )
+    commands.add_parser("update", help="Save the current graph")
+    show_parser = commands.add_parser("show", help="What a chapter depends on")
+    show_parser.add_argument("chapter", type=int)
+    args = parser.parse_args()
+
+    previous = load_graph()
+    current = build_graph(previous)
+
+    if args.command == "show":
+        chapter = current.chapter(args.chapter)
+        if chapter is None:
+            sys.exit(f"No chapter {args.chapter} in {OUTLINE}.md")
+        print(f"Chapter {chapter.number}: {chapter.title}")
+        print(f"  content: {chapter.path or '(not written)'}")
+        for node in chapter.depends:
+            print(f"  {node}" + ("" if node in current.nodes else "  (missing)"))
+        return
+
+    if args.command == "affected":
+        paths = [repo_path(p) for p in args.paths] or None
+        results = affected(previous, current, paths)
+        for chapter, reasons in results:
+            if args.files:
+                if chapter.path:
+                    print(chapter.path)
+                continue
+            print(
+                f"  Chapter {chapter.number}: {chapter.title} — {chapter.path or '(not written)'}"
+            )
+            print(f"      {', '.join(reasons)}")
+        if not args.files:
+            print(f"{len(results)} of {len(current.chapters)} chapters affected")
+
+    if args.command == "update" or args.update:
+        current.save()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Character-substitution text transforms for the build scripts.
+
+A TextTransform maps single characters to replacement strings and applies
+them as if in a single pass: replacements are never re-scanned, so a
+mapping may emit characters that are themselves mapped (the backslash's
+replacement contains braces).
+
+str.translate() would be the obvious single pass, but on CPython it
+looks up every character of the text in the table and was several times
+slower than the chain of str.replace() calls it was meant to replace.
+Instead each call only runs str.replace() for the mapped characters
+actually present, ordered so that no pass sees an earlier pass's output;
+characters whose replacements depend on each other in a cycle are parked
+on private-use sentinels first. The plan is cached per set of present
+characters (scripts/benchmark-text.py compares the approaches).
+
+Most calls the build makes escape one short string: a part title, or an
+index term once per occurrence. There, scanning for each mapped character
+costs more than the replacing, so short texts go through one regex
+substitution instead (single-pass by construction), and their results
+are cached, since index terms recur.
+
+    from text_transform import escape_latex, LATEX_ESCAPE
+
+    escape_latex("R&D — 100%")          # 'R\\&D --- 100\\%'
+    LATEX_ESCAPE.many(titles)           # escape a list of fields at once
+    LATEX_ESCAPE.fields(entry, ["term", "definition"])
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Mapping
+from functools import lru_cache
+
+# Characters with special meaning in LaTeX
+LATEX_SPECIAL = {
+    "\\": r"\textbackslash{}",
+    "&": r"\&",
+    "%": r"\%",
+    "$": r"\$",
+    "#": r"\#",
+    "_": r"\_",
+    "{": r"\{",
+    "}": r"\}",
+    "~": r"\textasciitilde{}",
+    "^": r"\textasciicircum{}",
+}
+
+# Unicode punctuation to TeX ligature input
+LATEX_TYPOGRAPHIC = {
+    "—": "---",
+    "–": "--",
+    "‘": "`",
+    "’": "'",
+    "“": "``",
+    "”": "''",
+}
+
+# Joins fields for bulk transforms; never mapped and not expected in text
+_SEPARATOR = "\0"
+
+# Sentinels for characters whose replacements would otherwise be re-scanned
+_SENTINEL_BASE = 0xE000
+
+# Texts up to this length are substituted by regex, and cached
+SHORT_TEXT = 200
+
+
+class TextTransform:
+    """A character-to-string substitution with single-pass semantics."""
+
+    def __init__(self, mapping: Mapping[str, str]):
+        bad = [key for key in mapping if len(key) != 1]
+        if bad:
+            raise ValueError(f"TextTransform keys must be single characters: {bad!r}")
+        if _SEPARATOR in mapping:
+            raise ValueError("TextTransform cannot map the NUL separator")
+        self.mapping = dict(mapping)
+        self._keys = tuple(self.mapping)
+        self._sentinels = {key: chr(_SENTINEL_BASE + i) for i, key in enumerate(self._keys)}
+        self._pattern = re.compile(f"[{re.escape(''.join(self._keys))}]")
+        self._replacement = lambda match: self.mapping[match[0]]
+        self._plan = lru_cache(maxsize=256)(self._build_plan)
+        self._short = lru_cache(maxsize=4096)(self._substitute)
+
+    def _build_plan(self, present: tuple[str, ...]) -> tuple[tuple[str, ...], tuple[str, ...]]:
+        """Split present keys into (parked on sentinels, replaced in order).
+
+        A key is replaced only after every key its replacement contains, so
+        later passes never touch earlier output. Keys left in a cycle are
+        parked on sentinels, which nothing else scans for.
+        """
+        after = {k: {j for j in present if j != k and j in self.mapping[k]} for k in present}
+        parked: list[str] = []
+        ordered: list[str] = []
+        remaining = list(present)
+        while remaining:
+            ready = [k for k in remaining if not after[k]]
+            if not ready:
+                ready = remaining[:1]
+                parked.extend(ready)
+            else:
+                ordered.extend(ready)
+            for key in ready:
+                remaining.remove(key)
+                for deps in after.values():
+                    deps.discard(key)
+        return tuple(parked), tuple(ordered)
+
+    def __call__(self, text: str) -> str:
+        return self._short(text) if len(text) <= SHORT_TEXT else self._transform(text)
+
+    def _substitute(self, text: str) -> str:
+        return self._pattern.sub(self._replacement, text)
+
+    def _transform(self, text: str) -> str:
+        present = tuple(key for key in self._keys if key in text)
+        if not present:
+            return text
+        parked, ordered = self._plan(present)
+        if any(self._sentinels[key] in text for key in parked):
+            return "".join(self.mapping.get(c, c) for c in text)  # Text uses our sentinels
+        for key in parked:
+            text = text.replace(key, self._sentinels[key])
+        for key in ordered:
+            text = text.replace(key, self.mapping[key])
+        for key in parked:
+            text = text.replace(self._sentinels[key], self.mapping[key])
+        return text
+
+    def many(self, texts: Iterable[str]) -> list[str]:
+        """Transform many strings in a single pass over their concatenation."""
+        texts = list(texts)
+        if not texts:
+            return []
+        joined = _SEPARATOR.join(texts)
+        if joined.count(_SEPARATOR) != len(texts) - 1:
+            return [self(text) for text in texts]  # A field contains NUL itself
+        return self(joined).split(_SEPARATOR)
+
+    def fields(self, record: Mapping[str, object], keys: Iterable[str]) -> dict[str, object]:
+        """Copy of record with the string values under keys transformed."""
+        keys = [k for k in keys if isinstance(record.get(k), str)]
+        result = dict(record)
+        result.update(zip(keys, self.many(str(record[k]) for k in keys), strict=True))
+        return result
+
+
+LATEX_ESCAPE = TextTransform({**LATEX_SPECIAL, **LATEX_TYPOGRAPHIC})
+
+
+def escape_latex(text: str) -> str:
+    """Escape special LaTeX characters and convert typographic punctuation."""
+    return LATEX_ESCAPE(text)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Validate the staged changes to content/ before a commit.
+
+A pre-commit entry point for the spec server's validate_content rules
+and the brand server's validate_brand rules. It checks only the lines
+the commit adds or changes, not whole documents:
+
+  - one `git diff --cached -U0` gives every staged file's changed lines
+  - one `git cat-file --batch` reads the staged text of those files
+  - code blocks are stripped from the whole staged text (one regex
+    pass), so a changed line inside a fenced block is still treated as
+    code; then both rule sets run on the changed prose lines alone
+
+The rules come from .specmcp/content_rules.py and
+.brandmcp/brand_rules.py, loaded by path without the MCP SDK (whose
+import alone takes longer than this whole check).
+
+Issues are printed as path:line: message; the exit status is 1 if there
+are any.
+
+Usage:
+  python scripts/validate-staged.py [PATH ...]   # default: staged markdown under content/
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+
+from mcp_common import load_module
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+WRITERS_GUIDE_FILE = REPO_ROOT / ".specmcp" / "specs" / "editorial" / "writers-guide.md"
+TOKENS_FILE = REPO_ROOT / ".brandmcp" / "brand" / "tokens.json"
+CONTENT_RULES = REPO_ROOT / ".specmcp" / "content_rules.py"
+BRAND_RULES = REPO_ROOT / ".brandmcp" / "brand_rules.py"
+
+# What is validated when no paths are given
+DEFAULT_PATHSPEC = ["content/"]
+
+_DIFF_FILE_PATTERN = re.compile(r"^\+\+\+ (?:b/)?(.+)$")
+_HUNK_PATTERN = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+
+def git(*args: str, input: bytes | None = None) -> bytes:
+    result = subprocess.run(
+        ["git", "-c", "core.quotepath=off", *args],
+        cwd=REPO_ROOT,
+        input=input,
+        capture_output=True,
+        check=True,
+    )
+    return result.stdout
+
+
+def changed_lines(pathspec: list[str]) -> dict[str, set[int]]:
+    """Staged markdown files and the line numbers (in the staged text) each
+    adds or changes."""
+    diff = git("diff", "--cached", "-U0", "--no-color", "--no-ext-diff", "--", *pathspec)
+    changed: dict[str, set[int]] = {}
+    lines: set[int] | None = None
+    for line in diff.decode("utf-8", errors="replace").splitlines():
+        if line.startswith("+++ "):
+            match = _DIFF_FILE_PATTERN.match(line)
+            path = match.group(1) if match else "/dev/null"
+            lines = changed.setdefault(path, set()) if path.endswith(".md") else None
+        elif lines is not None and line.startswith("@@"):
+            match = _HUNK_PATTERN.match(line)
+            if match:
+                start, count = int(match.group(1)), int(match.group(2) or 1)
+                lines.update(range(start, start + count))
+    return {path: lines for path, lines in changed.items() if lines}
+
+
+def staged_texts(paths: list[str]) -> dict[str, str]:
+    """The staged (index) text of each path, read in one git call."""
+    output = git("cat-file", "--batch", input="".join(f":{p}\n" for p in paths).encode())
+    texts: dict[str, str] = {}
+    offset = 0
+    for path in paths:
+        header_end = output.index(b"\n", offset)
+        header = output[offset:header_end].split()
+        if header[-1] == b"missing":
+            offset = header_end + 1
+            continue
+        size = int(header[2])
+        texts[path] = output[header_end + 1 : header_end + 1 + size].decode("utf-8")
+        offset = header_end + 1 + size + 1
+    return texts
+
+
+def describe(issue: dict) -> str:
+    """One line for a validate_content or validate_brand issue."""
+    kind = issue["type"]
+    if kind == "banned_word":
+        suggestion = f' (use "{issue["suggestion"]}")' if issue.get("suggestion") else ""
+        return f'banned word "{issue["word"]}"{suggestion}'
+    if kind == "terminology":
+        return f'"{issue["found"]}": use "{issue["preferred"]}"'
+    if kind == "structure":
+        return str(issue["issue"])
+    return f"{kind.replace('_', ' ')} {issue['found']}: {issue['suggestion']}"
+
+
+def validate(
+    path: str, text: str, lines: set[int], content: ModuleType, brand: ModuleType
+) -> list[str]:
+    """Issues on the changed lines of one staged file, as path:line: message.
+
+    content and brand are the loaded content_rules and brand_rules modules.
+    """
+    prose = [(i, line) for i, line in brand.strip_code_blocks(text) if i in lines]
+    content_rules = content.rules_for(WRITERS_GUIDE_FILE.read_text(encoding="utf-8"))
+    brand_rules = brand.rules_for(TOKENS_FILE.read_text(encoding="utf-8"))
+    issues = content_rules.check(prose) + brand_rules.check(prose)
+    issues.sort(key=lambda issue: issue["line"])
+    return [f"{path}:{issue['line']}: {describe(issue)}" for issue in issues]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate staged changes to content/")
+    parser.add_argument("paths", nargs="*", help="Limit to these paths (pre-commit passes them)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    changed = changed_lines(args.paths or DEFAULT_PATHSPEC)
+    if not changed:
+        return
+
+    content, brand = load_module(CONTENT_RULES), load_module(BRAND_RULES)
+    problems = []
+    for path, text in staged_texts(sorted(changed)).items():
+        problems.extend(validate(path, text, changed[path], content, brand))
+
+    for problem in problems:
+        print(problem)
+    if problems:
+        elapsed = (time.perf_counter() - start) * 1000
+        checked = sum(len(lines) for lines in changed.values())
+        print(
+            f"{len(problems)} issue(s) in {checked} changed lines of {len(changed)} files "
+            f"({elapsed:.0f} ms)"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()